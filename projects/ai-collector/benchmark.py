@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# benchmark.py
+# 吞吐量基准测试：收集器（基于本地测试源服务器）和内容处理器（多进程扩展性）
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# 添加src目录到Python路径
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from fixture_server import FeedFixtureServer, synthetic_articles
+from feed_fetcher import FeedFetcher
+from rss_collector import AITechRSSCollector
+from content_processor import AITechContentProcessor
+
+def serve_fixtures(conn, defaults):
+    """子进程：运行测试源服务器，把地址发回父进程"""
+    server = FeedFixtureServer(**defaults)
+    conn.send(server.base_url)
+    server.httpd.serve_forever()
+
+def peak_rss_mb():
+    """当前进程的峰值常驻内存（MB）"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux单位为KB，macOS为字节
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def benchmark_options(args):
+    """可写入结果文件的命令行参数"""
+    return {key: value for key, value in vars(args).items() if key != 'handler'}
+
+def percentile(values, pct):
+    """最近秩百分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def run_round(feeds, args, http_cache_file):
+    """运行一轮收集，返回本轮指标"""
+    collector = AITechRSSCollector(
+        max_workers=args.workers,
+        host_delay=0,
+        http_cache_file=http_cache_file,
+        stream_parse=args.stream,
+        max_entries=args.max_entries,
+        fetcher=FeedFetcher(retries=args.retries, backoff_base=0.05)
+    )
+    collector.feeds = feeds
+    
+    started = time.perf_counter()
+    # 收集器的逐源进度输出会干扰计时和结果展示
+    with contextlib.redirect_stdout(io.StringIO()):
+        articles = collector.fetch_all_feeds()
+    elapsed = time.perf_counter() - started
+    
+    latencies = [r['latency'] * 1000 for r in collector.fetch_results]
+    return {
+        'elapsed': elapsed,
+        'feeds': len(collector.fetch_results),
+        'failed': sum(1 for r in collector.fetch_results if not r['ok']),
+        'not_modified': sum(1 for r in collector.fetch_results if r['not_modified']),
+        'articles': len(articles),
+        'feeds_per_sec': len(collector.fetch_results) / elapsed if elapsed else 0.0,
+        'articles_per_sec': len(articles) / elapsed if elapsed else 0.0,
+        'latency_p50_ms': percentile(latencies, 50),
+        'latency_p99_ms': percentile(latencies, 99),
+        'latency_mean_ms': statistics.mean(latencies) if latencies else 0.0
+    }
+
+def print_round(index, metrics):
+    """打印一轮的指标"""
+    print(f"第{index}轮: {metrics['feeds']}个源 ({metrics['failed']}失败, {metrics['not_modified']}未变化), "
+          f"{metrics['articles']}篇文章, 用时{metrics['elapsed']:.2f}秒")
+    print(f"   吞吐量: {metrics['feeds_per_sec']:.1f} 源/秒, {metrics['articles_per_sec']:.1f} 文章/秒")
+    print(f"   延迟: p50 {metrics['latency_p50_ms']:.1f}ms, p99 {metrics['latency_p99_ms']:.1f}ms")
+
+def run_collector_benchmark(args):
+    """收集器基准：并发获取本地测试源的吞吐量和延迟"""
+    defaults = {
+        'entries': args.entries, 'body': args.body, 'format': args.format,
+        'latency': args.latency, 'error_rate': args.error_rate, 'etag': 0 if args.no_etag else 1
+    }
+    # 服务器放在独立进程中，峰值内存只反映收集器本身
+    parent_conn, child_conn = multiprocessing.Pipe()
+    server_process = multiprocessing.Process(target=serve_fixtures, args=(child_conn, defaults), daemon=True)
+    server_process.start()
+    base_url = parent_conn.recv()
+    
+    feeds = [
+        {
+            'name': f"Fixture {args.kind} {i}",
+            'url': f"{base_url}/{args.kind}/{i}.xml",
+            'category': '测试源',
+            'enabled': True
+        }
+        for i in range(args.feeds)
+    ]
+    
+    print("=" * 60)
+    print("⏱️ 收集器吞吐量基准测试")
+    print("=" * 60)
+    print(f"测试源: {args.feeds}个{args.kind}源 @ {base_url}, 延迟{args.latency:g}ms, 错误率{args.error_rate:g}")
+    print(f"收集器: {args.workers}线程, {'流式' if args.stream else '完整'}解析, 每源最多{args.max_entries}篇")
+    print()
+    
+    rounds = []
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            http_cache_file = os.path.join(tmp, 'http_cache.json')
+            for index in range(1, args.rounds + 1):
+                metrics = run_round(feeds, args, http_cache_file)
+                rounds.append(metrics)
+                print_round(index, metrics)
+    finally:
+        server_process.terminate()
+        server_process.join()
+        
+    peak = peak_rss_mb()
+    if peak is not None:
+        print(f"\n💾 峰值内存: {peak:.1f} MB")
+        
+    if args.json_file:
+        with open(args.json_file, 'w', encoding='utf-8') as f:
+            json.dump({'options': benchmark_options(args), 'rounds': rounds, 'peak_rss_mb': peak}, f, ensure_ascii=False, indent=2)
+        print(f"💾 结果已保存: {args.json_file}")
+        
+    if args.min_feeds_per_sec is not None and rounds[0]['feeds_per_sec'] < args.min_feeds_per_sec:
+        print(f"❌ 吞吐量 {rounds[0]['feeds_per_sec']:.1f} 源/秒 低于要求的 {args.min_feeds_per_sec:g}")
+        sys.exit(1)
+
+
+def benchmark_articles(count, body_size):
+    """生成基准文章：标题各不相同，摘要为较长的HTML以覆盖清洗和截断的开销"""
+    per_feed = 100
+    articles = []
+    for feed in range((count + per_feed - 1) // per_feed):
+        for article in synthetic_articles(f"bench{feed}", min(per_feed, count - feed * per_feed), body_size):
+            article['summary'] = article['content']
+            article['source'] = f"Bench {feed}"
+            articles.append(article)
+    return articles
+
+def run_processor_benchmark(args):
+    """处理器基准：不同进程数下的处理吞吐量，并确认输出与单进程一致"""
+    cpu_count = os.cpu_count() or 1
+    if args.workers:
+        # 超过CPU核数的进程数会被处理器截断，测了也和按核数运行相同
+        worker_counts = sorted({min(int(n), cpu_count) for n in args.workers.split(',')})
+    else:
+        worker_counts = [1]
+        while worker_counts[-1] * 2 <= cpu_count:
+            worker_counts.append(worker_counts[-1] * 2)
+        if worker_counts[-1] != cpu_count:
+            worker_counts.append(cpu_count)
+    
+    articles = benchmark_articles(args.articles, args.body)
+    processor = AITechContentProcessor(dedupe_threshold=0.4 if args.dedupe else None)
+    
+    print("=" * 60)
+    print("⏱️ 内容处理器扩展性基准测试")
+    print("=" * 60)
+    print(f"文章: {len(articles)}篇, 摘要约{args.body}字节, 每块{args.chunk_size}篇, CPU核数{cpu_count}")
+    print()
+    
+    results = []
+    baseline = None
+    for workers in worker_counts:
+        started = time.perf_counter()
+        processed = list(processor.iter_process_articles(articles, workers, args.chunk_size))
+        elapsed = time.perf_counter() - started
+        
+        if baseline is None:
+            baseline = (processed, elapsed)
+        results.append({
+            'workers': workers,
+            'elapsed': elapsed,
+            'processed': len(processed),
+            'articles_per_sec': len(articles) / elapsed if elapsed else 0.0,
+            'speedup': baseline[1] / elapsed if elapsed else 0.0,
+            'identical': processed == baseline[0]
+        })
+        r = results[-1]
+        print(f"{workers:>3}个进程: {r['elapsed']:.2f}秒, {r['articles_per_sec']:.0f} 文章/秒, "
+              f"加速比 {r['speedup']:.2f}x {'✅' if r['identical'] else '❌ 输出与单进程不一致'}")
+    
+    peak = peak_rss_mb()
+    if peak is not None:
+        print(f"\n💾 峰值内存: {peak:.1f} MB")
+    
+    if args.json_file:
+        with open(args.json_file, 'w', encoding='utf-8') as f:
+            json.dump({'options': benchmark_options(args), 'results': results}, f, ensure_ascii=False, indent=2)
+        print(f"💾 结果已保存: {args.json_file}")
+    
+    if not all(r['identical'] for r in results):
+        sys.exit(1)
+    
+    parallel = [r['speedup'] for r in results if r['workers'] > 1]
+    if args.min_speedup is not None:
+        if not parallel:
+            print(f"⚠️ 只有{cpu_count}个CPU核，无法测量多进程加速比")
+        elif max(parallel) < args.min_speedup:
+            print(f"❌ 最高加速比 {max(parallel):.2f}x 低于要求的 {args.min_speedup:.2f}x")
+            sys.exit(1)
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='吞吐量基准测试')
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    collector = commands.add_parser('collector', help='收集器吞吐量（本地测试源）')
+    collector.add_argument('--feeds', type=int, default=50, help='测试源数量')
+    collector.add_argument('--kind', choices=['synthetic', 'recorded'], default='synthetic',
+                           help='合成源，或由 data/raw_articles_*.json 还原的录制源')
+    collector.add_argument('--entries', type=int, default=20, help='每个合成源的条目数')
+    collector.add_argument('--body', type=int, default=2000, help='每篇正文的大约字节数')
+    collector.add_argument('--format', choices=['rss', 'atom'], default='rss', help='源格式')
+    collector.add_argument('--latency', type=float, default=50, help='服务器响应延迟（毫秒）')
+    collector.add_argument('--error-rate', type=float, default=0.0, help='服务器返回500的概率')
+    collector.add_argument('--no-etag', action='store_true', help='服务器不发送ETag')
+    collector.add_argument('--workers', type=int, default=8, help='并发获取的线程数')
+    collector.add_argument('--stream', action='store_true', help='使用流式解析')
+    collector.add_argument('--max-entries', type=int, default=10, help='每个源最多取的文章数')
+    collector.add_argument('--retries', type=int, default=0, help='临时性错误的重试次数')
+    collector.add_argument('--rounds', type=int, default=2,
+                           help='运行轮数（共用HTTP缓存，第2轮起测量条件请求路径）')
+    collector.add_argument('--json', dest='json_file', help='把结果写入JSON文件')
+    collector.add_argument('--min-feeds-per-sec', type=float,
+                           help='第1轮吞吐量低于该值时以非零状态退出，用于把关收集器改动')
+    collector.set_defaults(handler=run_collector_benchmark)
+    
+    processor = commands.add_parser('processor', help='内容处理器多进程扩展性')
+    processor.add_argument('--articles', type=int, default=20000, help='文章数量')
+    processor.add_argument('--body', type=int, default=4000, help='每篇HTML摘要的大约字节数')
+    processor.add_argument('--workers', default=None,
+                           help='逗号分隔的进程数列表（默认1,2,4...直到CPU核数）')
+    processor.add_argument('--chunk-size', type=int, default=256, help='每块的文章数')
+    processor.add_argument('--dedupe', action='store_true', help='同时进行近重复合并（在主进程中串行）')
+    processor.add_argument('--min-speedup', type=float,
+                           help='多进程的最高加速比低于该值时以非零状态退出，用于确认 --process-workers 在目标机器上有效')
+    processor.add_argument('--json', dest='json_file', help='把结果写入JSON文件')
+    processor.set_defaults(handler=run_processor_benchmark)
+    
+    args = parser.parse_args()
+    args.handler(args)
+
+if __name__ == "__main__":
+    main()
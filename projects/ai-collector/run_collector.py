@@ -9,11 +9,22 @@ from datetime import datetime
 # 添加src目录到Python路径
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
+# RSS源配置文件
+CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'feeds_config.json')
+
 from rss_collector import AITechRSSCollector
+from sharded_collector import ShardedRSSCollector
 from content_processor import AITechContentProcessor
 from report_generator import AITechReportGenerator
+from ranking import ArticleRanker, load_source_priorities
+from blob_store import BlobStore, save_run_file
+from process_cache import ProcessingCache
+from stats_aggregator import DailyStatsStore
+from entity_extractor import EntityIndex
+from archive_site import ArchiveSiteBuilder
 
-def run_full_pipeline():
+def run_full_pipeline(max_workers=8, new_only=False, stream_parse=False, scheduled=False, shards=0,
+                      process_workers=1, incremental=False, archive=False, site=False):
     """运行完整的收集处理管道"""
     print("=" * 70)
     print("🚀 MOSS AI技术动态收集系统 v1.0")
@@ -26,52 +37,89 @@ def run_full_pipeline():
     # 步骤1: 收集RSS数据
     print("📡 步骤1: 收集RSS数据")
     print("-" * 40)
-    collector = AITechRSSCollector()
-    raw_articles = collector.fetch_all_feeds()
+    collector_options = {
+        'http_cache_file': 'data/http_cache.json',
+        'breaker_file': 'data/circuit_breakers.json',
+        'stream_parse': stream_parse
+    }
+    if shards > 1:
+        # 分片模式：多个工作进程通过本地工作队列领取RSS源
+        collector = ShardedRSSCollector(CONFIG_FILE, workers=shards, **collector_options)
+        raw_stream = collector.fetch_all_feeds(new_only=new_only, scheduled=scheduled)
+    else:
+        # 每个源完成后立即进入处理，不等待全部源获取完毕
+        collector = AITechRSSCollector(config_file=CONFIG_FILE, max_workers=max_workers, **collector_options)
+        raw_stream = collector.iter_articles(new_only=new_only, scheduled=scheduled)
+    
+    # 内容未变的文章直接复用之前运行的处理结果
+    process_cache = ProcessingCache('data/process_cache.db')
+    processor = AITechContentProcessor(cache=process_cache)
+    try:
+        processed_articles = list(processor.iter_process_articles(raw_stream, workers=process_workers))
+        processor.score_articles(processed_articles)
+    finally:
+        process_cache.close()
+    raw_articles = collector.articles
     
     if not raw_articles:
-        print("❌ 没有收集到文章，流程终止")
+        if new_only:
+            print("ℹ️ 没有新文章，流程终止")
+        else:
+            print("❌ 没有收集到文章，流程终止")
         return None
     
-    # 保存原始数据
+    # 保存原始数据（正文写入blob存储，运行文件只保存引用）
+    blob_store = BlobStore('data/blobs')
     raw_data_file = f"data/raw_articles_{timestamp}.json"
-    collector.save_articles(raw_data_file)
+    collector.save_articles(raw_data_file, blob_store)
     
     print(f"✅ 步骤1完成: 收集到 {len(raw_articles)} 篇文章")
     print()
     
-    # 步骤2: 处理内容
+    # 步骤2: 处理内容（已在收集过程中逐篇完成）
     print("🧠 步骤2: 处理内容")
     print("-" * 40)
-    processor = AITechContentProcessor()
-    processed_articles = processor.process_articles(raw_articles)
     
     if not processed_articles:
+        # 原始数据已保存且处理正常结束，这些文章以后不必再当作新文章处理
+        if new_only:
+            collector.commit_seen()
         print("❌ 没有处理后的文章，流程终止")
         return None
     
     # 保存处理后的数据
-    processed_data = {
-        'processed_at': datetime.now().isoformat(),
-        'article_count': len(processed_articles),
-        'articles': processed_articles
-    }
-    
     processed_data_file = f"data/processed_articles_{timestamp}.json"
-    os.makedirs(os.path.dirname(processed_data_file), exist_ok=True)
-    
-    import json
-    with open(processed_data_file, 'w', encoding='utf-8') as f:
-        json.dump(processed_data, f, ensure_ascii=False, indent=2)
+    save_run_file(processed_data_file, {
+        'processed_at': datetime.now().isoformat(),
+        'article_count': len(processed_articles)
+    }, processed_articles, blob_store)
     
     print(f"✅ 步骤2完成: 处理了 {len(processed_articles)} 篇文章")
     print()
     
+    # 实体倒排索引：按实体查询文章时不需要重新读取文章文件
+    entity_index = EntityIndex('data/entity_index.db')
+    try:
+        indexed = entity_index.add_articles(processed_articles)
+    finally:
+        entity_index.close()
+    print(f"🏢 实体索引: {indexed} 篇文章提到已知实体")
+    
+    # 本次运行的收集和处理统计合并进当天的统计快照
+    run_stats = collector.stats.merge(processor.stats)
+    DailyStatsStore('data/stats').add(run_stats)
+    
     # 步骤3: 生成报告
     print("📊 步骤3: 生成报告")
     print("-" * 40)
-    generator = AITechReportGenerator()
-    result = generator.generate_and_save(processed_articles)
+    # 推荐文章按综合排名选择，来源优先级取自RSS源配置
+    ranker = ArticleRanker(source_priorities=load_source_priorities(CONFIG_FILE))
+    generator = AITechReportGenerator(ranker)
+    if incremental:
+        # 每天一份报告，只把本次的新文章合并进去
+        result = generator.update_daily_report(processed_articles, archive=archive)
+    else:
+        result = generator.generate_and_save(processed_articles, archive=archive)
     
     if not result:
         print("❌ 报告生成失败")
@@ -80,12 +128,27 @@ def run_full_pipeline():
     print(f"✅ 步骤3完成: 生成 {result['article_count']} 篇文章的报告")
     print()
     
+    # 报告保存成功后才把本次的文章记为已见，之前任何一步失败，下次运行都会重新收集它们
+    if new_only:
+        committed = collector.commit_seen()
+        print(f"👁️ 已见文章索引: 记录 {committed} 篇")
+        print()
+    
+    if site:
+        # 归档站点由处理后的文章文件生成，只重建受新文章影响的页面
+        site_result = ArchiveSiteBuilder('../reports', 'data').build()
+        print(f"🌐 归档站点: 重建 {site_result['pages_built']} 个页面，跳过 {site_result['pages_skipped']} 个")
+        print()
+    
     # 总结
     print("🎯 流程总结")
     print("-" * 40)
     print(f"   开始时间: {datetime.now().strftime('%H:%M:%S')}")
     print(f"   原始文章: {len(raw_articles)} 篇")
     print(f"   处理文章: {len(processed_articles)} 篇")
+    latency = run_stats.quantiles('fetch_latency', (0.5, 0.95))
+    if latency['p50'] is not None:
+        print(f"   获取耗时: P50 {latency['p50']:.2f}s / P95 {latency['p95']:.2f}s")
     print(f"   报告文件: {result.get('markdown', 'N/A')}")
     print(f"   完成时间: {datetime.now().strftime('%H:%M:%S')}")
     print()
@@ -109,7 +172,7 @@ def test_system():
     
     # 测试RSS收集器
     print("1. 测试RSS收集器...")
-    collector = AITechRSSCollector()
+    collector = AITechRSSCollector(config_file=CONFIG_FILE)
     test_feeds = [feed for feed in collector.feeds if feed.get('enabled', True)][:2]  # 只测试前2个
     
     test_articles = []
@@ -159,6 +222,15 @@ def main():
     parser.add_argument('--test', action='store_true', help='测试系统功能')
     parser.add_argument('--run', action='store_true', help='运行完整收集流程')
     parser.add_argument('--quick', action='store_true', help='快速测试（只测试2个源）')
+    parser.add_argument('--workers', type=int, default=8, help='并发获取RSS源的线程数')
+    parser.add_argument('--new-only', action='store_true', help='只处理之前运行中没有见过的文章')
+    parser.add_argument('--stream', action='store_true', help='流式解析RSS，只读取需要保留的条目')
+    parser.add_argument('--scheduled', action='store_true', help='按自适应调度只获取到期的RSS源')
+    parser.add_argument('--shards', type=int, default=0, help='分片收集的工作进程数（大于1时启用）')
+    parser.add_argument('--process-workers', type=int, default=1, help='并行处理文章的进程数（不超过CPU核数；文章数千篇以上时才明显更快，可用 benchmark.py processor 确认）')
+    parser.add_argument('--incremental', action='store_true', help='增量更新当天的报告，而不是每次生成新报告')
+    parser.add_argument('--archive', action='store_true', help='同时生成分页、按需加载的HTML报告')
+    parser.add_argument('--site', action='store_true', help='报告生成后增量更新归档站点')
     
     args = parser.parse_args()
     
@@ -171,7 +243,17 @@ def main():
             sys.exit(1)
     
     elif args.run:
-        result = run_full_pipeline()
+        result = run_full_pipeline(
+            max_workers=args.workers,
+            new_only=args.new_only,
+            stream_parse=args.stream,
+            scheduled=args.scheduled,
+            shards=args.shards,
+            process_workers=args.process_workers,
+            incremental=args.incremental,
+            archive=args.archive,
+            site=args.site
+        )
         if result:
             print("🎉 AI技术动态收集完成!")
             print(f"   报告文件: {result['report_files']['markdown']}")
@@ -181,7 +263,17 @@ def main():
     
     else:
         # 默认运行完整流程
-        result = run_full_pipeline()
+        result = run_full_pipeline(
+            max_workers=args.workers,
+            new_only=args.new_only,
+            stream_parse=args.stream,
+            scheduled=args.scheduled,
+            shards=args.shards,
+            process_workers=args.process_workers,
+            incremental=args.incremental,
+            archive=args.archive,
+            site=args.site
+        )
         if result:
             print("🎉 AI技术动态收集完成!")
         else:
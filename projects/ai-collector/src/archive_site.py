@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+# archive_site.py
+# 报告归档静态站点：按日期、分类、来源浏览和跨天趋势，按依赖增量重建
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import time
+
+from blob_store import load_run_file
+from html_text import html_to_text
+from report_model import primary_category
+from report_templates import TEMPLATES_DIR, load_templates
+from seen_index import article_key
+
+# 站点生成逻辑的版本，页面结构变化时递增，所有页面随之重建
+BUILDER_VERSION = 2
+
+# 处理后的文章文件：processed_articles_<日期>_<时间>.json
+DATA_PATTERN = re.compile(r'^processed_articles_(\d{8})_\d{6}\.json$')
+
+# 报告文件名：ai_report_<日期>.<扩展名>（日内增量报告）或 ai_report_<日期>_<时间>.<扩展名>
+REPORT_PATTERN = re.compile(r'^ai_report_(\d{8})(?:_\d{6})?\.(md|html)$')
+
+# 趋势表最多展示的分类数和来源数
+TREND_COLUMNS = 8
+
+# 趋势条形图的最大宽度（像素）
+BAR_WIDTH = 80
+
+def site_article(article):
+    """站点中保存的文章字段（来自处理后的文章，标题和摘要保持完整）"""
+    return {
+        'title': article.get('title', ''),
+        'link': article.get('link', ''),
+        'source': article.get('source', ''),
+        'category': primary_category(article),
+        'categories': list(article.get('categories') or ['其他']),
+        'ai_score': article.get('ai_score', 0),
+        'published': article.get('published') or '未知',
+        'summary': article.get('processed_summary') or html_to_text(article.get('summary', ''))
+    }
+
+def slugify(name):
+    """分类或来源名称对应的文件名（ASCII部分 + 名称哈希，中文名称只用哈希）"""
+    ascii_part = re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')[:40]
+    digest = hashlib.blake2b(name.encode('utf-8'), digest_size=4).hexdigest()
+    return f"{ascii_part}-{digest}" if ascii_part else digest
+
+def day_label(day):
+    """YYYYMMDD -> YYYY年MM月DD日"""
+    return f"{day[:4]}年{day[4:6]}月{day[6:]}日"
+
+def month_label(month):
+    """YYYYMM -> YYYY年MM月"""
+    return f"{month[:4]}年{month[4:]}月"
+
+class ArchiveSiteBuilder:
+    """报告归档静态站点生成器
+    
+    站点结构（默认输出到 <报告目录>/site/）:
+        index.html                         按日期浏览
+        days/<日期>.html                    某天的全部文章（附原始报告链接）
+        categories/index.html              按分类浏览
+        categories/<分类>/<年月>.html        某分类某月的文章
+        sources/index.html、sources/<来源>/<年月>.html
+        trends.html                        各分类、各来源的逐日文章数
+        data/days/<日期>.json               每天合并后的文章（增量构建的中间结果）
+        manifest.json                      构建清单
+    
+    文章来自处理后的文章文件（data/processed_articles_*.json），不解析渲染后的报告，
+    报告模板的变化不影响站点，标题、摘要和发布时间也保持完整。报告文件只用于生成
+    每天的原始报告链接。构建清单记录每个输入文件的修改时间和大小、每天数据的摘要和
+    计数，以及每个页面依赖的天数据摘要。只有输入文件变化的那几天会重新合并；页面的
+    依赖摘要没有变化且文件存在时直接跳过。分类和来源页面按月分页，新增一天的报告只会重建这一天、
+    当月涉及的分类和来源页面，以及只读取计数的索引和趋势页面。
+    """
+    
+    def __init__(self, reports_dir='../reports', data_dir='data', output_dir=None, templates_dir=TEMPLATES_DIR):
+        """初始化生成器
+        
+        参数:
+            reports_dir: 报告目录（包含 markdown/、html/、archive/）
+            data_dir: 处理后的文章文件所在目录
+            output_dir: 站点输出目录（默认 <reports_dir>/site）
+            templates_dir: 模板目录（使用其中的 site/ 模板）
+        """
+        self.reports_dir = reports_dir
+        self.data_dir = data_dir
+        self.output_dir = output_dir or os.path.join(reports_dir, 'site')
+        self.templates = load_templates('site', templates_dir)
+        self.version = f"{BUILDER_VERSION}:{self.templates.version}"
+        self.manifest_file = os.path.join(self.output_dir, 'manifest.json')
+        self._day_cache = {}
+    
+    def build(self, full=False):
+        """构建站点，返回本次构建的统计
+        
+        参数:
+            full: 忽略构建清单，重新合并所有文章文件并重建所有页面
+        """
+        manifest = self.load_manifest()
+        if full or manifest.get('version') != self.version:
+            # 保留旧的页面列表，完整重建后仍能删除不再需要的页面
+            manifest = {'version': self.version, 'inputs': {}, 'days': {}, 'pages': manifest.get('pages', {})}
+        self._day_cache = {}
+        
+        # 1. 找出输入文件有变化的日期，重新合并这些天
+        inputs = self.scan_inputs()
+        data_files, report_files = {}, {}
+        for name, (day, _) in inputs.items():
+            files = data_files if name.startswith('data/') else report_files
+            files.setdefault(day, []).append(name)
+        old_inputs = manifest['inputs']
+        dirty_days = {day for name, (day, stat) in inputs.items()
+                      if old_inputs.get(name, [None, None])[1] != stat}
+        dirty_days.update(old_inputs[name][0] for name in old_inputs if name not in inputs)
+        # 中间结果被删除的日期也需要重新合并
+        dirty_days.update(day for day in data_files if day in manifest['days']
+                          and not os.path.exists(os.path.join(self.output_dir, 'data', 'days', f"{day}.json")))
+        
+        for day in sorted(dirty_days):
+            if day in data_files:
+                manifest['days'][day] = self.merge_day(day, sorted(data_files[day]), sorted(report_files.get(day, [])))
+            else:
+                manifest['days'].pop(day, None)
+                self._remove(os.path.join('data', 'days', f"{day}.json"))
+        manifest['inputs'] = {name: list(entry) for name, entry in inputs.items()}
+        
+        # 2. 依赖摘要变化或文件缺失的页面才重新渲染
+        days = manifest['days']
+        built = skipped = 0
+        pages = {}
+        for path, dependencies, render in self.page_specs(days):
+            signature = self.signature(path, dependencies, days)
+            pages[path] = signature
+            if manifest['pages'].get(path) == signature and os.path.exists(os.path.join(self.output_dir, path)):
+                skipped += 1
+                continue
+            self._write(path, render())
+            built += 1
+        
+        # 3. 删除不再需要的页面
+        removed = 0
+        for path in manifest['pages']:
+            if path not in pages:
+                self._remove(path)
+                removed += 1
+        manifest['pages'] = pages
+        self.save_manifest(manifest)
+        
+        return {
+            'days': len(days),
+            'days_merged': len(dirty_days),
+            'pages_built': built,
+            'pages_skipped': skipped,
+            'pages_removed': removed
+        }
+    
+    def load_manifest(self):
+        """读取构建清单，不存在或无法读取时返回空清单"""
+        if not os.path.exists(self.manifest_file):
+            return {}
+        try:
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"⚠️ 读取构建清单失败，将完整重建: {e}")
+            return {}
+    
+    def save_manifest(self, manifest):
+        """原子写入构建清单"""
+        self._write('manifest.json', json.dumps(manifest, ensure_ascii=False))
+    
+    def scan_inputs(self):
+        """输入文件 {名称: (日期, [修改时间ns, 大小])}
+        
+        名称为 data/<文章文件名>，或相对报告目录的报告路径（markdown/、html/、archive/<日期>/index.html）。
+        """
+        inputs = {}
+        if os.path.isdir(self.data_dir):
+            for entry in os.scandir(self.data_dir):
+                match = DATA_PATTERN.match(entry.name)
+                if match and entry.is_file():
+                    stat = entry.stat()
+                    inputs[f"data/{entry.name}"] = (match.group(1), [stat.st_mtime_ns, stat.st_size])
+        for subdir in ('markdown', 'html'):
+            report_dir = os.path.join(self.reports_dir, subdir)
+            if not os.path.isdir(report_dir):
+                continue
+            for entry in os.scandir(report_dir):
+                match = REPORT_PATTERN.match(entry.name)
+                if match and entry.is_file():
+                    stat = entry.stat()
+                    inputs[f"{subdir}/{entry.name}"] = (match.group(1), [stat.st_mtime_ns, stat.st_size])
+        archive_dir = os.path.join(self.reports_dir, 'archive')
+        if os.path.isdir(archive_dir):
+            for entry in os.scandir(archive_dir):
+                index_file = os.path.join(entry.path, 'index.html')
+                if re.fullmatch(r'\d{8}', entry.name) and os.path.isfile(index_file):
+                    stat = os.stat(index_file)
+                    inputs[f"archive/{entry.name}/index.html"] = (entry.name, [stat.st_mtime_ns, stat.st_size])
+        return inputs
+    
+    def merge_day(self, day, data_names, report_names):
+        """合并某天的所有文章文件，保存当天数据，返回清单中的当天条目
+        
+        同一篇文章（按 seen_index.article_key 识别）出现在多个文件中时，后处理的文件覆盖之前的。
+        """
+        articles = {}
+        for name in data_names:
+            for article in load_run_file(os.path.join(self.data_dir, os.path.basename(name))).get('articles', []):
+                articles[article_key(article)] = site_article(article)
+        data = {
+            'day': day,
+            'reports': [name for name in report_names if not name.startswith('archive/')],
+            'archive': next((name for name in report_names if name.startswith('archive/')), None),
+            'articles': list(articles.values())
+        }
+        text = json.dumps(data, ensure_ascii=False)
+        self._write(os.path.join('data', 'days', f"{day}.json"), text)
+        self._day_cache[day] = data
+        
+        categories, sources = {}, {}
+        for article in data['articles']:
+            categories[article['category']] = categories.get(article['category'], 0) + 1
+            sources[article['source']] = sources.get(article['source'], 0) + 1
+        return {
+            'digest': hashlib.blake2b(text.encode('utf-8'), digest_size=12).hexdigest(),
+            'total': len(data['articles']),
+            'categories': categories,
+            'sources': sources
+        }
+    
+    def load_day(self, day):
+        """读取某天合并后的数据（同一次构建中缓存）"""
+        if day not in self._day_cache:
+            with open(os.path.join(self.output_dir, 'data', 'days', f"{day}.json"), 'r', encoding='utf-8') as f:
+                self._day_cache[day] = json.load(f)
+        return self._day_cache[day]
+    
+    def signature(self, path, dependencies, days):
+        """页面签名：生成器版本、页面路径和所依赖的天数据摘要"""
+        parts = [self.version, path] + [f"{day}:{days[day]['digest']}" for day in dependencies]
+        return hashlib.blake2b('|'.join(parts).encode('utf-8'), digest_size=12).hexdigest()
+    
+    def page_specs(self, days):
+        """所有页面 [(路径, 依赖的日期, 渲染函数)]，只读取清单中的计数"""
+        all_days = sorted(days)
+        specs = [
+            ('index.html', all_days, lambda: self.render_index(days)),
+            ('categories/index.html', all_days, lambda: self.render_group_index('categories', days)),
+            ('sources/index.html', all_days, lambda: self.render_group_index('sources', days)),
+            ('trends.html', all_days, lambda: self.render_trends(days))
+        ]
+        for day in all_days:
+            specs.append((f"days/{day}.html", [day], lambda day=day: self.render_day(day)))
+        
+        for group in ('categories', 'sources'):
+            # (名称, 月份) -> 该月中出现过该分类/来源的日期
+            months = {}
+            for day in all_days:
+                for name in days[day][group]:
+                    months.setdefault((name, day[:6]), []).append(day)
+            for (name, month), month_days in months.items():
+                specs.append((
+                    f"{group}/{slugify(name)}/{month}.html",
+                    month_days,
+                    lambda group=group, name=name, month=month, month_days=month_days:
+                        self.render_group_month(group, name, month, month_days)
+                ))
+        return specs
+    
+    def render_index(self, days):
+        """首页：按日期浏览"""
+        link_item = self.templates['link_item']
+        items = []
+        for day in sorted(days, reverse=True):
+            summary = days[day]
+            top = sorted(summary['categories'].items(), key=lambda item: item[1], reverse=True)[:3]
+            items.append(link_item.render({
+                'href': f"days/{day}.html",
+                'label': day_label(day),
+                'note': f"{summary['total']}篇 · " + '，'.join(f"{name} {count}" for name, count in top)
+            }))
+        content = self.templates['section'].render({'heading': f"全部日期 ({len(days)}天)", 'items': items})
+        return self.page('AI技术动态归档', '', content)
+    
+    def render_group_index(self, group, days):
+        """分类或来源索引：每个分类/来源的总篇数和各月页面"""
+        link_item = self.templates['link_item']
+        totals, months = {}, {}
+        for day in sorted(days):
+            for name, count in days[day][group].items():
+                totals[name] = totals.get(name, 0) + count
+                month_counts = months.setdefault(name, {})
+                month_counts[day[:6]] = month_counts.get(day[:6], 0) + count
+        
+        content = []
+        for name, total in sorted(totals.items(), key=lambda item: (-item[1], item[0])):
+            items = [
+                link_item.render({'href': f"{slugify(name)}/{month}.html", 'label': month_label(month), 'note': f"{count}篇"})
+                for month, count in sorted(months[name].items(), reverse=True)
+            ]
+            content.append(self.templates['section'].render({'heading': f"{name} ({total}篇)", 'items': items}))
+        title = '按分类浏览' if group == 'categories' else '按来源浏览'
+        return self.page(title, '../', ''.join(content))
+    
+    def render_trends(self, days):
+        """趋势页：文章最多的几个分类和来源的逐日文章数"""
+        content = [self.trend_table('每日文章数', days, None)]
+        for group, heading in (('categories', '分类趋势'), ('sources', '来源趋势')):
+            content.append(self.trend_table(heading, days, group))
+        return self.page('跨天趋势', '', ''.join(content))
+    
+    def trend_table(self, heading, days, group):
+        """一张趋势表；group 为 None 时只统计每天的总数"""
+        if group is None:
+            columns = ['总数']
+            counts = {day: {'总数': days[day]['total']} for day in days}
+        else:
+            totals = {}
+            for summary in days.values():
+                for name, count in summary[group].items():
+                    totals[name] = totals.get(name, 0) + count
+            columns = [name for name, _ in sorted(totals.items(), key=lambda item: (-item[1], item[0]))[:TREND_COLUMNS]]
+            counts = {day: days[day][group] for day in days}
+        peak = max((counts[day].get(name, 0) for day in counts for name in columns), default=0) or 1
+        
+        header = self.templates['trend_header']
+        cell = self.templates['trend_cell']
+        row = self.templates['trend_row']
+        rows = []
+        for day in sorted(days, reverse=True):
+            cells = ''.join(
+                cell.render({'width': round(counts[day].get(name, 0) / peak * BAR_WIDTH), 'count': counts[day].get(name, 0)})
+                for name in columns
+            )
+            rows.append(row.render({'href': f"days/{day}.html", 'day': day_label(day), 'cells': cells}))
+        return self.templates['trend_table'].render({
+            'heading': heading,
+            'headers': ''.join(header.render({'label': name}) for name in columns),
+            'rows': rows
+        })
+    
+    def render_day(self, day):
+        """某天的页面：原始报告链接和按分类组织的全部文章"""
+        data = self.load_day(day)
+        link_item = self.templates['link_item']
+        report_items = []
+        for report in data['reports']:
+            note = 'Markdown' if report.startswith('markdown/') else 'HTML'
+            report_items.append(link_item.render({'href': f"../../{report}", 'label': report, 'note': note}))
+        if data['archive']:
+            report_items.append(link_item.render({'href': f"../../{data['archive']}", 'label': data['archive'], 'note': '分页HTML'}))
+        
+        sections = {}
+        for article in data['articles']:
+            sections.setdefault(article['category'], []).append(article)
+        content = [self.templates['section'].render({'heading': '原始报告', 'items': report_items})]
+        for category, articles in sorted(sections.items()):
+            content.append(self.templates['section'].render({
+                'heading': f"{category} ({len(articles)}篇)",
+                'items': (self.article_item(article) for article in articles)
+            }))
+        return self.page(f"{day_label(day)} ({len(data['articles'])}篇)", '../', ''.join(content))
+    
+    def render_group_month(self, group, name, month, month_days):
+        """某分类或来源某月的页面：按日期从新到旧列出文章"""
+        field = 'category' if group == 'categories' else 'source'
+        content = []
+        total = 0
+        for day in sorted(month_days, reverse=True):
+            articles = [article for article in self.load_day(day)['articles'] if article[field] == name]
+            total += len(articles)
+            content.append(self.templates['section'].render({
+                'heading': f"{day_label(day)} ({len(articles)}篇)",
+                'items': (self.article_item(article) for article in articles)
+            }))
+        return self.page(f"{name} · {month_label(month)} ({total}篇)", '../../', ''.join(content))
+    
+    def article_item(self, article):
+        """文章列表中的一行"""
+        return self.templates['article'].render({
+            'link': article['link'],
+            'title': article['title'],
+            'source': article['source'],
+            'categories': ', '.join(article['categories']),
+            'ai_score': article['ai_score'],
+            'published': article['published'],
+            'summary': article['summary']
+        })
+    
+    def page(self, title, root, content):
+        """套用页面布局"""
+        return self.templates['layout'].render({'title': title, 'root': root, 'content': content})
+    
+    def _write(self, path, text):
+        """原子写入站点中的文件"""
+        full_path = os.path.join(self.output_dir, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        tmp_file = f"{full_path}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_file, full_path)
+    
+    def _remove(self, path):
+        """删除站点中的文件（不存在时忽略）"""
+        full_path = os.path.join(self.output_dir, path)
+        if os.path.exists(full_path):
+            os.remove(full_path)
+
+def main():
+    """主函数：构建或增量更新报告归档站点"""
+    parser = argparse.ArgumentParser(description='生成报告归档静态站点')
+    parser.add_argument('--reports', default='../reports', help='报告目录')
+    parser.add_argument('--data', default='data', help='处理后的文章文件目录')
+    parser.add_argument('--output', help='站点输出目录（默认 <报告目录>/site）')
+    parser.add_argument('--full', action='store_true', help='忽略构建清单，完整重建')
+    args = parser.parse_args()
+    
+    start = time.time()
+    builder = ArchiveSiteBuilder(args.reports, args.data, args.output)
+    result = builder.build(full=args.full)
+    print(f"🌐 归档站点: {builder.output_dir}")
+    print(f"   天数: {result['days']}，重新合并: {result['days_merged']}")
+    print(f"   页面: 重建 {result['pages_built']}，跳过 {result['pages_skipped']}，删除 {result['pages_removed']}")
+    print(f"   耗时: {time.time() - start:.2f}s")
+
+if __name__ == "__main__":
+    main()
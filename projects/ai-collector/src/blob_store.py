@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# blob_store.py
+# 按内容寻址的文章正文存储
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+import zlib
+
+# 写入blob存储的大字段，以及值得外置的最小长度
+BLOB_FIELDS = ('content', 'summary')
+MIN_BLOB_SIZE = 256
+BLOB_REF_KEY = '$blob'
+
+def is_blob_ref(value):
+    """是否为blob引用 {"$blob": "<sha256>"}"""
+    return isinstance(value, dict) and BLOB_REF_KEY in value
+
+class BlobStore:
+    """按内容寻址的压缩blob存储
+    
+    正文按SHA-256哈希存放在 root/ab/cdef... 下，使用zlib压缩。相同内容只写一次，
+    运行文件中只保存引用，磁盘占用随不重复内容增长，而不是随运行次数增长。
+    """
+    
+    def __init__(self, root='data/blobs'):
+        """初始化存储目录"""
+        self.root = root
+    
+    def path(self, key):
+        """blob文件路径"""
+        return os.path.join(self.root, key[:2], key[2:])
+    
+    def put(self, text):
+        """写入文本，返回其哈希；已存在时不重复写入"""
+        data = text.encode('utf-8')
+        key = hashlib.sha256(data).hexdigest()
+        path = self.path(key)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # 临时文件名区分进程和线程，并发写入同一blob时互不干扰
+            tmp_file = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_file, 'wb') as f:
+                f.write(zlib.compress(data, 6))
+            os.replace(tmp_file, path)
+        return key
+    
+    def get(self, key):
+        """读取文本"""
+        with open(self.path(key), 'rb') as f:
+            return zlib.decompress(f.read()).decode('utf-8')
+    
+    def resolve(self, value):
+        """把blob引用解析为文本，其他值原样返回"""
+        if is_blob_ref(value):
+            return self.get(value[BLOB_REF_KEY])
+        return value
+    
+    def externalize(self, article):
+        """返回把大字段替换为blob引用后的文章副本"""
+        stored = dict(article.items())
+        for field in BLOB_FIELDS:
+            value = stored.get(field)
+            if isinstance(value, str) and len(value) >= MIN_BLOB_SIZE:
+                stored[field] = {BLOB_REF_KEY: self.put(value)}
+        return stored
+
+class BlobArticle(dict):
+    """首次访问时才从blob存储读取正文的文章dict
+    
+    通过 [] / get() 访问会解析引用并缓存结果；直接序列化时保留引用，
+    再次保存不会把正文写回运行文件。
+    """
+    
+    def __init__(self, data, store):
+        super().__init__(data)
+        self.store = store
+    
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        if is_blob_ref(value):
+            value = self.store.resolve(value)
+            super().__setitem__(key, value)
+        return value
+    
+    def get(self, key, default=None):
+        if key not in self:
+            return default
+        return self[key]
+    
+    def copy(self):
+        return BlobArticle(super().copy(), self.store)
+
+def save_run_file(output_file, header, articles, store=None):
+    """保存运行文件；提供store时正文写入blob存储，文件只保存引用
+    
+    参数:
+        output_file: 输出文件
+        header: 写在文章列表前的元数据（如 collected_at、article_count）
+        articles: 文章列表
+        store: BlobStore（None表示正文内联）
+    """
+    os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+    data = dict(header)
+    if store:
+        # 记录相对运行文件所在目录的blob路径，读取方据此定位
+        data['blob_store'] = os.path.relpath(store.root, os.path.dirname(os.path.abspath(output_file)))
+        articles = [store.externalize(article) for article in articles]
+    data['articles'] = articles
+    
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    return output_file
+
+def load_run_file(input_file):
+    """读取运行文件；包含blob引用时，文章按需从blob存储解析"""
+    with open(input_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    
+    if data.get('blob_store'):
+        store = BlobStore(os.path.join(os.path.dirname(os.path.abspath(input_file)), data['blob_store']))
+        data['articles'] = [BlobArticle(article, store) for article in data.get('articles', [])]
+    return data
+
+def main():
+    """主函数：把已有的运行文件转换为blob引用格式"""
+    parser = argparse.ArgumentParser(description='把运行文件中的文章正文迁移到blob存储')
+    parser.add_argument('files', nargs='+', help='raw_articles_*.json / processed_articles_*.json')
+    parser.add_argument('--store', default='data/blobs', help='blob存储目录')
+    args = parser.parse_args()
+    
+    store = BlobStore(args.store)
+    for input_file in args.files:
+        data = load_run_file(input_file)
+        if data.get('blob_store'):
+            print(f"⏭️ 已是引用格式: {input_file}")
+            continue
+        before = os.path.getsize(input_file)
+        articles = data.pop('articles', [])
+        save_run_file(input_file, data, articles, store)
+        print(f"📦 {input_file}: {before} -> {os.path.getsize(input_file)} 字节")
+
+if __name__ == "__main__":
+    main()
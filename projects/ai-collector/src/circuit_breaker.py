@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# circuit_breaker.py
+# 按RSS源的熔断器
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+class CircuitOpenError(Exception):
+    """熔断器打开，请求被直接拒绝"""
+
+class FeedCircuitBreaker:
+    """按RSS源的熔断器，状态在多次运行之间持久化
+    
+    - closed: 正常请求，连续失败达到 failure_threshold 次后打开
+    - open: 直接拒绝请求，经过 reset_timeout 秒后进入半开
+    - half_open: 放行一次试探请求，成功则关闭，失败则重新打开（冷却时间翻倍）
+    """
+    
+    def __init__(self, state_file='data/circuit_breakers.json', failure_threshold=3,
+                 reset_timeout=30 * 60, max_reset_timeout=24 * 3600):
+        """初始化熔断器
+        
+        参数:
+            state_file: 状态文件（None表示只在内存中保存）
+            failure_threshold: 连续失败多少次后打开
+            reset_timeout: 打开后多久允许试探（秒）
+            max_reset_timeout: 冷却时间翻倍的上限（秒）
+        """
+        self.state_file = state_file
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self._lock = threading.Lock()
+        self.circuits = self.load()
+    
+    def load(self):
+        """加载熔断器状态"""
+        if not self.state_file or not os.path.exists(self.state_file):
+            return {}
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f).get('circuits', {})
+        except Exception as e:
+            print(f"⚠️ 加载熔断器状态失败: {e}, 全部重置")
+            return {}
+    
+    def save(self):
+        """原子写入熔断器状态"""
+        if not self.state_file:
+            return
+        os.makedirs(os.path.dirname(self.state_file) or '.', exist_ok=True)
+        with self._lock:
+            data = {'saved_at': datetime.now().isoformat(), 'circuits': self.circuits}
+            tmp_file = f"{self.state_file}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_file, self.state_file)
+    
+    def _circuit(self, url):
+        return self.circuits.setdefault(url, {
+            'state': CLOSED,
+            'failures': 0,
+            'opened_at': None,
+            'cooldown': self.reset_timeout
+        })
+    
+    def snapshot(self, url):
+        """某个源的熔断器记录（副本，没有记录时返回None）"""
+        with self._lock:
+            circuit = self.circuits.get(url)
+            return dict(circuit) if circuit else None
+    
+    def restore(self, url, circuit):
+        """用其他进程交回的记录替换某个源的熔断器状态"""
+        with self._lock:
+            self.circuits[url] = dict(circuit)
+    
+    def state(self, url):
+        """当前状态"""
+        with self._lock:
+            return self._circuit(url)['state']
+    
+    def allow(self, url, now=None):
+        """是否放行请求；open 状态冷却结束时转为 half_open 并放行一次"""
+        now = now or time.time()
+        with self._lock:
+            circuit = self._circuit(url)
+            if circuit['state'] == OPEN:
+                if now - circuit['opened_at'] < circuit['cooldown']:
+                    return False
+                circuit['state'] = HALF_OPEN
+            return True
+    
+    def check(self, url, now=None):
+        """不放行时抛出 CircuitOpenError"""
+        if not self.allow(url, now):
+            raise CircuitOpenError(f"熔断中，跳过请求: {url}")
+    
+    def record_success(self, url):
+        """记录成功：关闭熔断器"""
+        with self._lock:
+            circuit = self._circuit(url)
+            circuit.update(state=CLOSED, failures=0, opened_at=None, cooldown=self.reset_timeout)
+    
+    def record_failure(self, url, now=None):
+        """记录失败：达到阈值或半开试探失败时打开熔断器"""
+        now = now or time.time()
+        with self._lock:
+            circuit = self._circuit(url)
+            circuit['failures'] += 1
+            if circuit['state'] == HALF_OPEN:
+                circuit['cooldown'] = min(circuit['cooldown'] * 2, self.max_reset_timeout)
+            elif circuit['failures'] < self.failure_threshold:
+                return
+            circuit['state'] = OPEN
+            circuit['opened_at'] = now
@@ -2,38 +2,97 @@
 # content_processor.py
 # AI技术动态内容处理器
 
-import json
-import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
 from datetime import datetime
+from itertools import islice
 import os
 
+from blob_store import load_run_file
+from entity_extractor import EntityExtractor
+from html_text import html_to_text, truncate_text
+from near_duplicate import NearDuplicateDetector
+from process_cache import content_key, config_fingerprint
+from relevance_scorer import RelevanceScorer, article_document
+from rule_engine import RuleSet, HotReloadingRules
+from stats_aggregator import StatsAggregator
+
+# 分类规则文件（AI判定和分类的关键词、正则、权重与排除项）
+RULES_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'classification_rules.json')
+
+# 实体词典文件（公司、模型、产品及其别名）
+ENTITIES_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'entities.json')
+
+# 分析逻辑（评分、分类、摘要、实体的算法）变化时递增，使之前缓存的处理结果失效
+ANALYSIS_VERSION = 3
+
+# 处理缓存未命中的标记
+_MISS = object()
+
 class AITechContentProcessor:
     """AI技术动态内容处理器"""
     
-    def __init__(self):
-        """初始化处理器"""
-        # AI相关关键词
-        self.ai_keywords = [
-            'AI', '人工智能', '机器学习', '深度学习', '神经网络',
-            '自然语言处理', '计算机视觉', '强化学习', '大语言模型',
-            'GPT', 'Transformer', 'LLM', '生成式AI', 'AIGC',
-            '自动驾驶', '机器人', '智能助手', 'AI Agent'
-        ]
-        
-        # 分类关键词
-        self.category_keywords = {
-            '技术突破': ['突破', '创新', '新技术', '新算法', 'SOTA', 'state-of-the-art'],
-            '应用案例': ['应用', '落地', '案例', '实践', '商用', '部署'],
-            '学术研究': ['论文', '研究', '学术', 'arXiv', '预印本', '期刊'],
-            '工具框架': ['工具', '框架', '库', '平台', '系统', '开源'],
-            '行业动态': ['行业', '市场', '投资', '融资', '合作', '并购']
-        }
+    def __init__(self, dedupe_threshold=0.4, cache=None, rules=RULES_FILE, entities=ENTITIES_FILE):
+        """初始化处理器
+        
+        参数:
+            dedupe_threshold: 判为近重复的相似度阈值（None表示不合并近重复文章）
+            cache: ProcessingCache，跨运行复用内容未变文章的处理结果（None表示不缓存）
+            rules: 分类规则文件路径（文件变化时自动重新加载），或编译好的 RuleSet
+            entities: 实体词典文件路径，或编译好的 EntityExtractor（None表示不抽取实体）
+        """
+        self.dedupe_threshold = dedupe_threshold
+        self.cache = cache
+        
+        # AI判定和分类规则
+        self.rules = HotReloadingRules(rules) if isinstance(rules, str) else rules
+        
+        # 实体词典
+        self.entity_extractor = EntityExtractor.load(entities) if isinstance(entities, str) else entities
+        
+        # 最近一次处理的增量统计
+        self.stats = StatsAggregator()
+    
+    @property
+    def rule_set(self):
+        """当前生效的分类规则；规则文件变化后返回重新编译的新规则"""
+        return self.rules.current()
+    
+    def cache_fingerprint_for(self, rule_set):
+        """处理配置的指纹，分类规则、实体词典或分析逻辑变化时改变"""
+        entities = self.entity_extractor.fingerprint if self.entity_extractor else None
+        return config_fingerprint(ANALYSIS_VERSION, rule_set.fingerprint, entities)
+    
+    @staticmethod
+    def match_text(article):
+        """参与规则判定和实体抽取的文本：标题和摘要"""
+        return f"{article.get('title', '')} {article.get('summary', '')}"
+    
+    def match_rules(self, article, rule_set=None):
+        """对标题和摘要做一次规则判定，返回 RuleMatch"""
+        return (rule_set or self.rule_set).evaluate(self.match_text(article))
+    
+    def extract_entities(self, article):
+        """抽取标题和摘要中出现的实体ID"""
+        if not self.entity_extractor:
+            return []
+        return self.entity_extractor.extract(self.match_text(article))
+    
+    @staticmethod
+    def score_from_match(match):
+        """由规则判定计算AI相关度评分（AI规则权重每1分计2分，最高10分）"""
+        return min(int(round(match.ai_weight * 2)), 10)
+    
+    @staticmethod
+    def categories_from_match(match, rule_set):
+        """由规则判定得出分类，没有命中任何分类时为默认分类（“其他”）"""
+        return match.categories or [rule_set.default_category]
     
     def load_articles(self, input_file):
-        """从文件加载文章"""
+        """从文件加载文章（正文为blob引用时按需读取）"""
         try:
-            with open(input_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = load_run_file(input_file)
             
             print(f"📂 加载文章: {len(data.get('articles', []))}篇")
             return data.get('articles', [])
@@ -43,26 +102,22 @@ class AITechContentProcessor:
             return []
     
     def filter_ai_articles(self, articles):
-        """过滤AI相关文章"""
+        """过滤AI相关文章
+        
+        每篇文章只扫描一次，同一次扫描的结果同时给出AI相关度评分和分类。
+        """
         print("🔍 过滤AI相关文章...")
         
+        rule_set = self.rule_set
         filtered_articles = []
         for article in articles:
             # 组合标题和摘要进行判断
-            content = f"{article.get('title', '')} {article.get('summary', '')}"
-            content_lower = content.lower()
-            
-            # 检查是否包含AI关键词
-            is_ai_related = False
-            for keyword in self.ai_keywords:
-                if keyword.lower() in content_lower:
-                    is_ai_related = True
-                    break
+            match = self.match_rules(article, rule_set)
             
-            if is_ai_related:
-                # 添加AI相关度评分
-                ai_score = self.calculate_ai_score(content)
-                article['ai_score'] = ai_score
+            # 检查是否满足AI规则
+            if match.is_ai:
+                article['ai_score'] = self.score_from_match(match)
+                article['categories'] = self.categories_from_match(match, rule_set)
                 filtered_articles.append(article)
         
         print(f"✅ 过滤完成: {len(filtered_articles)}/{len(articles)} 篇AI相关")
@@ -70,120 +125,240 @@ class AITechContentProcessor:
     
     def calculate_ai_score(self, content):
         """计算AI相关度评分"""
-        content_lower = content.lower()
-        score = 0
-        
-        for keyword in self.ai_keywords:
-            if keyword.lower() in content_lower:
-                score += 1
+        return self.score_from_match(self.rule_set.evaluate(content))
+    
+    def score_articles(self, articles):
+        """按TF-IDF相关度重新计算 ai_score（0-10分），排序比关键词计数更有区分度
         
-        # 归一化到0-10分
-        normalized_score = min(score * 2, 10)
-        return normalized_score
+        主题词、文档频率和满分尺度取自分类规则文件的 relevance 项，每篇文章的得分与同批的其他文章无关。
+        """
+        scorer = RelevanceScorer.from_rules(self.rule_set.config)
+        self.stats.reset_scores()
+        for article, score in zip(articles, scorer.score(article_document(article) for article in articles)):
+            article['ai_score'] = score
+            self.stats.record_score(score)
+        return articles
     
     def categorize_articles(self, articles):
         """对文章进行分类"""
         print("🏷️ 对文章进行分类...")
         
+        rule_set = self.rule_set
         for article in articles:
-            content = f"{article.get('title', '')} {article.get('summary', '')}"
-            content_lower = content.lower()
-            
-            # 初始化分类
-            article['categories'] = []
-            
-            # 检查每个分类的关键词
-            for category, keywords in self.category_keywords.items():
-                for keyword in keywords:
-                    if keyword.lower() in content_lower:
-                        if category not in article['categories']:
-                            article['categories'].append(category)
-                        break
-            
-            # 如果没有分类，标记为"其他"
-            if not article['categories']:
-                article['categories'] = ['其他']
+            article['categories'] = self.categories_from_match(self.match_rules(article, rule_set), rule_set)
         
         return articles
     
+    def merge_near_duplicates(self, articles):
+        """合并不同来源转载的近重复文章，其他来源记录在 alternate_sources 中"""
+        print("🧬 合并近重复文章...")
+        detector = NearDuplicateDetector(self.dedupe_threshold)
+        canonical_articles = detector.deduplicate(articles)
+        print(f"✅ 合并完成: {len(articles)} -> {len(canonical_articles)} 篇")
+        return canonical_articles
+    
     def generate_summary(self, text, max_length=200):
         """生成文章摘要"""
         if not text:
             return "暂无摘要"
         
-        # 清理HTML标签
-        clean_text = re.sub(r'<[^>]+>', '', text)
+        # 提取纯文本：解码实体、跳过脚本和样式、合并空白；只读取截断所需的长度
+        clean_text = html_to_text(text, max_chars=max_length + 1)
         
-        # 清理多余空格和换行
-        clean_text = re.sub(r'\s+', ' ', clean_text).strip()
+        # 截取指定长度，尽量在句子边界（含中文句末标点）截断
+        return truncate_text(clean_text, max_length)
+    
+    def analyze_article(self, article, rule_set=None):
+        """计算单篇文章的处理结果（评分、分类、摘要），不修改文章
         
-        # 截取指定长度
-        if len(clean_text) > max_length:
-            # 尝试在句子边界截断
-            truncated = clean_text[:max_length]
-            last_period = truncated.rfind('.')
-            last_exclamation = truncated.rfind('!')
-            last_question = truncated.rfind('?')
-            
-            cut_point = max(last_period, last_exclamation, last_question)
-            if cut_point > max_length * 0.5:  # 确保截断点不要太靠前
-                summary = truncated[:cut_point + 1]
-            else:
-                summary = truncated + "..."
+        返回:
+            dict: ai_score、categories、entities、processed_summary；与AI无关时返回None
+        """
+        # 同一次规则判定同时给出过滤结果、评分和分类
+        rule_set = rule_set or self.rule_set
+        match = self.match_rules(article, rule_set)
+        if not match.is_ai:
+            return None
+        
+        # 使用摘要或内容生成更好的摘要
+        raw_summary = article.get('summary', '') or article.get('content', '')
+        return {
+            'ai_score': self.score_from_match(match),
+            'categories': self.categories_from_match(match, rule_set),
+            'entities': self.extract_entities(article),
+            'processed_summary': self.generate_summary(raw_summary, 150)
+        }
+    
+    def iter_process_articles(self, articles, workers=1, chunk_size=256):
+        """流式处理文章：逐篇完成过滤、评分分类、摘要和近重复合并，处理完立即产出
+        
+        参数:
+            articles: 任意文章可迭代对象（可以是仍在获取中的生成器）
+            workers: 大于1时把文章分块交给多个进程并行分析，产出顺序与输入一致
+                     （超过CPU核数的部分不启用；只有一个核时始终在当前进程中处理）
+            chunk_size: 并行分析和缓存读写时每块的文章数
+        
+        产出的是输入文章的副本，输入本身不会被修改。近重复合并始终在当前进程中
+        按输入顺序进行，先产出的文章作为规范文章，其 alternate_sources 会在之后
+        的转载出现时继续补充。配置了处理缓存时，内容未变的文章直接复用之前的结果。
+        逐篇产出时 ai_score 为规则权重评分，需要批量相关度评分时再调用 score_articles。
+        
+        分类规则在开始时取一次，整个调用都使用同一份规则；规则文件在处理过程中
+        被修改时，新规则从下一次调用开始生效。产出的文章同时计入 self.stats。
+        """
+        rule_set = self.rule_set
+        self.stats = StatsAggregator()
+        fingerprint = self.cache_fingerprint_for(rule_set) if self.cache is not None else None
+        
+        lookups = self._iter_cache_lookup(articles, fingerprint, chunk_size)
+        # 进程数超过CPU核数时只增加进程间传输的开销，不会更快
+        workers = min(workers, os.cpu_count() or 1)
+        if workers > 1:
+            analyzed = self._iter_parallel_analysis(lookups, rule_set, workers, chunk_size)
         else:
-            summary = clean_text
+            analyzed = self._iter_serial_analysis(lookups, rule_set)
+        detector = NearDuplicateDetector(self.dedupe_threshold) if self.dedupe_threshold is not None else None
         
-        return summary
+        computed = []
+        hits = misses = 0
+        try:
+            for article, key, fields, cached in analyzed:
+                if cached:
+                    hits += 1
+                elif self.cache is not None:
+                    misses += 1
+                    computed.append((key, fields))
+                    if len(computed) >= chunk_size:
+                        self.cache.put_many(computed, fingerprint)
+                        computed = []
+                
+                if fields is None:
+                    continue
+                processed = article.copy()
+                processed.update(fields)
+                
+                # 合并跨来源的近重复文章
+                if detector and detector.check(processed) is not None:
+                    continue
+                self.stats.record_processed(processed)
+                yield processed
+        finally:
+            if self.cache is not None:
+                if computed:
+                    self.cache.put_many(computed, fingerprint)
+                # 删除旧配置的结果、过期条目和超出容量的最久未用条目
+                evicted = self.cache.evict(fingerprint)
+                print(f"♻️ 处理缓存命中: {hits}/{hits + misses}篇" + (f"，清理{evicted}条" if evicted else ""))
     
-    def process_articles(self, articles):
-        """处理文章：过滤、分类、生成摘要"""
-        print("🔄 开始处理文章...")
+    def _iter_cache_lookup(self, articles, fingerprint, chunk_size):
+        """按块查询处理缓存，按输入顺序产出 (文章, 内容键, 缓存结果或_MISS)"""
+        if self.cache is None:
+            for article in articles:
+                yield article, None, _MISS
+            return
         
-        # 1. 过滤AI相关文章
-        ai_articles = self.filter_ai_articles(articles)
+        for chunk in _iter_chunks(articles, chunk_size):
+            keys = [content_key(article) for article in chunk]
+            found = self.cache.get_many(keys, fingerprint)
+            for article, key in zip(chunk, keys):
+                yield article, key, found.get(key, _MISS)
+    
+    def _iter_serial_analysis(self, lookups, rule_set):
+        """在当前进程中分析缓存未命中的文章，产出 (文章, 内容键, 处理结果, 是否来自缓存)"""
+        for article, key, fields in lookups:
+            if fields is _MISS:
+                yield article, key, self.analyze_article(article, rule_set), False
+            else:
+                yield article, key, fields, True
+    
+    def _iter_parallel_analysis(self, lookups, rule_set, workers, chunk_size):
+        """在进程池中分块分析缓存未命中的文章，按输入顺序产出 (文章, 内容键, 处理结果, 是否来自缓存)
         
-        # 2. 对文章进行分类
-        categorized_articles = self.categorize_articles(ai_articles)
+        每个工作进程启动时按父进程的规则和实体词典编译一次，之后只传输分析用到的
+        字段（_analysis_input）和结果字段，不传输正文。同时在途的块数有上限，输入为
+        生成器时不会被一次读完。进程启动和传输有固定开销，文章较多（数千篇以上）
+        且有多个CPU核时才会更快，可以用 benchmark.py processor 在目标机器上确认。
+        输入可能来自仍在运行的获取线程，因此用spawn启动工作进程，避免fork时复制线程持有的锁。
+        """
+        config = (rule_set.config, self.entity_extractor.config if self.entity_extractor else None)
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                 initializer=_init_worker, initargs=config) as executor:
+            pending = deque()
+            for chunk in _iter_chunks(lookups, chunk_size):
+                misses = [_analysis_input(article) for article, _, fields in chunk if fields is _MISS]
+                pending.append((chunk, executor.submit(_analyze_chunk, misses) if misses else None))
+                if len(pending) >= workers * 2:
+                    yield from _merge_chunk(*pending.popleft())
+            while pending:
+                yield from _merge_chunk(*pending.popleft())
+    
+    def process_articles(self, articles, workers=1):
+        """处理文章：过滤、分类、生成摘要，返回处理后的文章列表
         
-        # 3. 生成更好的摘要
-        processed_articles = []
-        for article in categorized_articles:
-            # 使用摘要或内容生成更好的摘要
-            raw_summary = article.get('summary', '') or article.get('content', '')
-            better_summary = self.generate_summary(raw_summary, 150)
-            article['processed_summary'] = better_summary
-            
-            processed_articles.append(article)
+        参数:
+            workers: 并行分析的进程数（1表示在当前进程中处理）
+        """
+        print("🔄 开始处理文章..." if workers <= 1 else f"🔄 开始处理文章（{workers}个进程）...")
+        
+        processed_articles = list(self.iter_process_articles(articles, workers))
+        self.score_articles(processed_articles)
         
         print(f"✅ 处理完成: {len(processed_articles)}篇文章")
         return processed_articles
     
-    def get_processing_statistics(self, articles):
-        """获取处理统计信息"""
-        if not articles:
-            return {"total": 0}
+    def get_processing_statistics(self, articles=None):
+        """获取处理统计信息
         
-        stats = {
-            'total_processed': len(articles),
-            'category_distribution': {},
-            'ai_score_distribution': {'high': 0, 'medium': 0, 'low': 0}
-        }
+        参数:
+            articles: 要统计的文章列表；为None时直接返回处理过程中增量累计的统计
+        """
+        if articles is None:
+            return self.stats.processing_statistics()
         
+        stats = StatsAggregator()
         for article in articles:
-            # 分类分布
-            for category in article.get('categories', []):
-                stats['category_distribution'][category] = stats['category_distribution'].get(category, 0) + 1
-            
-            # AI评分分布
-            ai_score = article.get('ai_score', 0)
-            if ai_score >= 7:
-                stats['ai_score_distribution']['high'] += 1
-            elif ai_score >= 4:
-                stats['ai_score_distribution']['medium'] += 1
-            else:
-                stats['ai_score_distribution']['low'] += 1
-        
-        return stats
+            stats.record_processed(article)
+        return stats.processing_statistics()
+
+# 工作进程内的处理器，由 _init_worker 在进程启动时创建一次
+_worker_processor = None
+
+def _init_worker(rules_config, entities_config):
+    """工作进程初始化：按父进程的规则和实体词典编译并创建处理器（不读取配置文件）"""
+    global _worker_processor
+    entities = EntityExtractor(entities_config) if entities_config is not None else None
+    _worker_processor = AITechContentProcessor(dedupe_threshold=None, rules=RuleSet(rules_config), entities=entities)
+
+def _analysis_input(article):
+    """交给工作进程的文章字段：analyze_article 只读取标题和摘要，没有摘要时才用正文"""
+    fields = {'title': article.get('title', ''), 'summary': article.get('summary', '')}
+    if not fields['summary']:
+        fields['content'] = article.get('content', '')
+    return fields
+
+def _analyze_chunk(chunk):
+    """工作进程：分析一块文章，只返回结果字段以减少进程间传输"""
+    rule_set = _worker_processor.rule_set
+    return [_worker_processor.analyze_article(article, rule_set) for article in chunk]
+
+def _merge_chunk(chunk, future):
+    """把工作进程的分析结果按顺序填回缓存未命中的位置"""
+    results = iter(future.result() if future else ())
+    for article, key, fields in chunk:
+        if fields is _MISS:
+            yield article, key, next(results), False
+        else:
+            yield article, key, fields, True
+
+def _iter_chunks(items, size):
+    """把任意可迭代对象切成列表块"""
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
 
 def main():
     """主函数"""
@@ -210,7 +385,7 @@ def main():
         processed_articles = processor.process_articles(articles)
         
         # 显示统计信息
-        stats = processor.get_processing_statistics(processed_articles)
+        stats = processor.get_processing_statistics()
         print("\n📊 处理统计:")
         print(f"   处理文章数: {stats['total_processed']}")
         print(f"   分类分布: {stats['category_distribution']}")
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# daily_report.py
+# 日内增量报告：每天一份报告，之后的运行只合并新文章
+
+from datetime import datetime
+import json
+import os
+
+from report_model import ReportDocument, TOP_ARTICLES, primary_category
+from seen_index import article_key
+
+# 报告状态文件的格式版本（2：不再保存渲染片段，ai_score 改为与批次无关的评分）
+STATE_VERSION = 2
+
+# 报告中用到的文章字段（正文等其他字段不进入报告状态）
+REPORT_FIELDS = ('title', 'link', 'source', 'categories', 'ai_score', 'published',
+                 'processed_summary', 'summary', 'alternate_sources')
+
+class DailyReportState:
+    """一天的报告状态
+    
+    只保存已收录文章的ID和报告所需字段、分类统计、按主分类分组的文章ID，
+    渲染结果不进入状态，报告每次由这些数据重新渲染，修改模板后不会留下旧片段。
+    新文章只需更新计数并追加到所属分类末尾，已有文章在列表中的序号不变；
+    合并后的报告与用全部文章重新生成的报告完全一致。
+    """
+    
+    def __init__(self, day, articles=None, category_counts=None, sections=None):
+        """初始化状态
+        
+        参数:
+            day: 报告日期（date）
+            articles: {文章ID: 报告字段}，按收录顺序
+            category_counts: {分类: 篇数}，按分类首次出现的顺序
+            sections: {主分类: [文章ID, ...]}
+        """
+        self.day = day
+        self.articles = articles or {}
+        self.category_counts = category_counts or {}
+        self.sections = sections or {}
+    
+    @classmethod
+    def load(cls, path, day):
+        """读取某天的报告状态，不存在或无法读取时返回空状态"""
+        if not os.path.exists(path):
+            return cls(day)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != STATE_VERSION or data.get('day') != day.isoformat():
+                print(f"⚠️ 报告状态与当前版本或日期不符，重新开始: {path}")
+                return cls(day)
+            return cls(day, data['articles'], data['category_counts'], data['sections'])
+        except Exception as e:
+            print(f"⚠️ 读取报告状态失败 {path}: {e}")
+            return cls(day)
+    
+    def save(self, path):
+        """原子写入报告状态"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_file = f"{path}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': STATE_VERSION,
+                'day': self.day.isoformat(),
+                'updated_at': datetime.now().isoformat(),
+                'articles': self.articles,
+                'category_counts': self.category_counts,
+                'sections': self.sections
+            }, f, ensure_ascii=False)
+        os.replace(tmp_file, path)
+    
+    def merge(self, articles):
+        """合并文章，已收录的文章（同一GUID或规范化链接）跳过，返回新收录的篇数"""
+        added = 0
+        for article in articles:
+            key = str(article_key(article))
+            if key in self.articles:
+                continue
+            record = {field: article[field] for field in REPORT_FIELDS if field in article}
+            self.articles[key] = record
+            for category in record.get('categories', []):
+                self.category_counts[category] = self.category_counts.get(category, 0) + 1
+            self.sections.setdefault(primary_category(record), []).append(key)
+            added += 1
+        return added
+    
+    def document(self, ranker, now=None, top_n=TOP_ARTICLES):
+        """由状态构建报告文档（推荐文章在全部已收录文章中重新排名）"""
+        now = now or datetime.now()
+        return ReportDocument(
+            date=self.day.strftime('%Y年%m月%d日'),
+            generated_at=now,
+            total=len(self.articles),
+            category_stats=sorted(self.category_counts.items(), key=lambda item: item[1], reverse=True),
+            top_articles=ranker.top_k(self.articles.values(), top_n),
+            sections=sorted((category, [self.articles[key] for key in keys])
+                            for category, keys in self.sections.items())
+        )
+
+def state_path(day, directory='data/reports'):
+    """某天报告状态文件的路径"""
+    return os.path.join(directory, f"report_{day.strftime('%Y%m%d')}.json")
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# entity_extractor.py
+# 基于词典的实体（公司、模型、产品）抽取与倒排索引
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+from keyword_matcher import KeywordMatcher, is_word_match
+from process_cache import content_key
+from stream_parser import parse_date
+
+class EntityExtractor:
+    """词典实体抽取器
+    
+    实体词典中每个实体有规范ID、名称、类型和若干别名，所有别名编译进同一个
+    Aho-Corasick自动机，一篇文章只扫描一遍即可找出全部实体，耗时不随词典大小增长。
+    别名按单词边界匹配（"Grok" 不会命中 "Groking"）；case_sensitive 的实体只接受
+    大小写完全一致的别名，用于 Cursor、Whisper 这类同时是普通英文单词的名称。
+    """
+    
+    def __init__(self, config):
+        """编译实体词典，格式有误时抛出 ValueError
+        
+        参数:
+            config: {"entities": [{"id", "name", "type", "aliases", "case_sensitive"}, ...]}
+        """
+        self.config = config
+        self.fingerprint = hashlib.sha256(
+            json.dumps(config, ensure_ascii=False, sort_keys=True).encode('utf-8')
+        ).hexdigest()[:16]
+        self.entities = {}
+        
+        # 别名编号 -> (实体ID, 别名原文, 是否区分大小写)
+        self.aliases = []
+        self.matcher = KeywordMatcher()
+        for entity in config.get('entities', []):
+            entity_id = entity.get('id')
+            if not entity_id or entity_id in self.entities:
+                raise ValueError(f"实体ID缺失或重复: {entity!r}")
+            self.entities[entity_id] = {'name': entity.get('name', entity_id), 'type': entity.get('type', '')}
+            case_sensitive = bool(entity.get('case_sensitive', False))
+            for alias in entity.get('aliases', [entity.get('name', '')]):
+                if alias:
+                    self.matcher.add(alias, len(self.aliases))
+                    self.aliases.append((entity_id, alias, case_sensitive))
+        self.matcher.build()
+    
+    @classmethod
+    def load(cls, entities_file):
+        """读取并编译实体词典文件"""
+        with open(entities_file, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+    
+    def extract(self, text):
+        """返回文本中出现的实体ID列表（去重、排序）"""
+        lowered = text.lower()
+        # 个别字符转小写后长度会变化，此时无法按位置核对原文大小写
+        same_length = len(lowered) == len(text)
+        found = set()
+        for start, end, alias_ids in self.matcher.iter_matches(lowered):
+            if not is_word_match(lowered, start, end):
+                continue
+            for alias_id in alias_ids:
+                entity_id, alias, case_sensitive = self.aliases[alias_id]
+                if entity_id in found:
+                    continue
+                if case_sensitive and not (same_length and text[start:end] == alias):
+                    continue
+                found.add(entity_id)
+        return sorted(found)
+    
+    def name(self, entity_id):
+        """实体的显示名称"""
+        entity = self.entities.get(entity_id)
+        return entity['name'] if entity else entity_id
+
+def article_timestamp(article):
+    """文章发布时间（Unix时间戳）；无法解析时依次退回收集时间和当前时间"""
+    published = parse_date(article.get('published', ''))
+    if published:
+        return published.timestamp()
+    try:
+        return datetime.fromisoformat(article.get('collected_at', '')).timestamp()
+    except (TypeError, ValueError):
+        return time.time()
+
+class EntityIndex:
+    """实体到文章的倒排索引（SQLite）
+    
+    文章以内容键标识，只保存标题、链接、来源和发布时间，按 (实体, 发布时间)
+    建索引；“本周提到某个模型的所有文章”这类查询直接走索引，不需要重新扫描文章。
+    """
+    
+    def __init__(self, db_file='data/entity_index.db'):
+        """打开（或创建）索引"""
+        os.makedirs(os.path.dirname(db_file) or '.', exist_ok=True)
+        self.db_file = db_file
+        self.conn = sqlite3.connect(db_file)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS articles (
+                key INTEGER PRIMARY KEY,
+                title TEXT NOT NULL,
+                link TEXT NOT NULL,
+                source TEXT NOT NULL,
+                published REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS mentions (
+                entity TEXT NOT NULL,
+                published REAL NOT NULL,
+                key INTEGER NOT NULL,
+                PRIMARY KEY (entity, published, key)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS mentions_key ON mentions (key);
+        """)
+        self.conn.commit()
+    
+    def close(self):
+        """关闭索引"""
+        self.conn.close()
+    
+    def add_articles(self, articles):
+        """索引带 entities 字段的文章，已索引的文章会被覆盖，返回索引的文章数"""
+        rows, mentions = [], []
+        for article in articles:
+            entities = article.get('entities')
+            if not entities:
+                continue
+            key = content_key(article)
+            published = article_timestamp(article)
+            rows.append((key, article.get('title', ''), article.get('link', ''), article.get('source', ''), published))
+            mentions.extend((entity, published, key) for entity in entities)
+        
+        if rows:
+            # 重新索引的文章先删除旧的实体关联
+            self.conn.executemany('DELETE FROM mentions WHERE key = ?', ((row[0],) for row in rows))
+            self.conn.executemany('INSERT OR REPLACE INTO articles VALUES (?, ?, ?, ?, ?)', rows)
+            self.conn.executemany('INSERT OR IGNORE INTO mentions VALUES (?, ?, ?)', mentions)
+            self.conn.commit()
+        return len(rows)
+    
+    def articles_for(self, entity_id, since=None, until=None, limit=100):
+        """提到某个实体的文章，按发布时间从新到旧
+        
+        参数:
+            since/until: 发布时间范围（datetime或Unix时间戳，None表示不限）
+        """
+        rows = self.conn.execute(
+            'SELECT a.key, a.title, a.link, a.source, a.published FROM mentions m '
+            'JOIN articles a ON a.key = m.key '
+            'WHERE m.entity = ? AND m.published >= ? AND m.published <= ? '
+            'ORDER BY m.published DESC LIMIT ?',
+            (entity_id, _timestamp(since, float('-inf')), _timestamp(until, float('inf')), limit)
+        )
+        return [
+            {'key': key, 'title': title, 'link': link, 'source': source,
+             'published': datetime.fromtimestamp(published).isoformat()}
+            for key, title, link, source, published in rows
+        ]
+    
+    def top_entities(self, since=None, until=None, limit=20):
+        """时间范围内被提到最多的实体 [(实体ID, 文章数), ...]"""
+        rows = self.conn.execute(
+            'SELECT entity, COUNT(*) AS mentions FROM mentions '
+            'WHERE published >= ? AND published <= ? GROUP BY entity ORDER BY mentions DESC, entity LIMIT ?',
+            (_timestamp(since, float('-inf')), _timestamp(until, float('inf')), limit)
+        )
+        return rows.fetchall()
+
+def _timestamp(value, default):
+    """datetime、Unix时间戳或None统一为时间戳"""
+    if value is None:
+        return default
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return float(value)
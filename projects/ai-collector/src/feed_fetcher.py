@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# feed_fetcher.py
+# RSS源HTTP获取器
+
+import functools
+import http.client
+import random
+import socket
+import time
+import zlib
+import urllib.request
+import urllib.error
+
+DEFAULT_USER_AGENT = 'MOSS-AI-Collector/1.0 (+https://github.com/flyskyson/clawd-moss)'
+
+# 可以重试的HTTP状态码
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+class FetchTimeoutError(TimeoutError):
+    """读取响应超过总时限"""
+
+class _ReadTimeoutMixin:
+    """连接建立后把socket超时切换为读取超时"""
+    
+    def connect(self):
+        super().connect()
+        self.sock.settimeout(self.read_timeout)
+
+class _TimeoutHTTPConnection(_ReadTimeoutMixin, http.client.HTTPConnection):
+    def __init__(self, *args, read_timeout=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.read_timeout = read_timeout
+
+class _TimeoutHTTPSConnection(_ReadTimeoutMixin, http.client.HTTPSConnection):
+    def __init__(self, *args, read_timeout=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.read_timeout = read_timeout
+
+class _TimeoutHTTPHandler(urllib.request.HTTPHandler):
+    def __init__(self, read_timeout):
+        super().__init__()
+        self.read_timeout = read_timeout
+        
+    def http_open(self, req):
+        return self.do_open(functools.partial(_TimeoutHTTPConnection, read_timeout=self.read_timeout), req)
+
+class _TimeoutHTTPSHandler(urllib.request.HTTPSHandler):
+    def __init__(self, read_timeout):
+        super().__init__()
+        self.read_timeout = read_timeout
+        
+    def https_open(self, req):
+        return self.do_open(
+            functools.partial(_TimeoutHTTPSConnection, read_timeout=self.read_timeout),
+            req, context=self._context
+        )
+
+class FeedFetcher:
+    """RSS源HTTP获取器
+    
+    - 支持 ETag / Last-Modified 条件请求
+    - 连接超时、读取超时和单次请求总时限分别控制
+    - 临时性错误按带抖动的指数退避有限次重试
+    """
+    
+    def __init__(self, connect_timeout=10, read_timeout=30, max_duration=120, retries=2,
+                 backoff_base=1.0, backoff_cap=30.0, user_agent=DEFAULT_USER_AGENT):
+        """初始化获取器
+        
+        参数:
+            connect_timeout: 建立连接的超时（秒）
+            read_timeout: 两次读取之间的超时（秒）
+            max_duration: 单次请求从连接到读完正文的总时限（秒）
+            retries: 临时性错误的最大重试次数
+            backoff_base: 退避基数（秒），第n次重试最多等待 base * 2^n
+            backoff_cap: 单次退避的上限（秒）
+        """
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_duration = max_duration
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.user_agent = user_agent
+        self.opener = urllib.request.build_opener(
+            _TimeoutHTTPHandler(read_timeout),
+            _TimeoutHTTPSHandler(read_timeout)
+        )
+        
+    def build_request(self, url, etag=None, last_modified=None):
+        """构建带条件请求头的HTTP请求"""
+        headers = {
+            'User-Agent': self.user_agent,
+            'Accept': 'application/rss+xml, application/atom+xml, application/xml;q=0.9, */*;q=0.8',
+            'Accept-Encoding': 'gzip, deflate'
+        }
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        return urllib.request.Request(url, headers=headers)
+        
+    def fetch(self, url, etag=None, last_modified=None, stream=False, chunk_size=64 * 1024):
+        """获取RSS源内容，临时性错误自动重试
+        
+        参数:
+            stream: 为True时不读取完整正文，而是返回按块解压的 chunks 迭代器
+                    （流式模式只重试建立连接阶段）
+                    
+        返回:
+            dict: status(200/304)、body(bytes, 304或流式时为None)、chunks、headers、etag、last_modified、url
+        """
+        attempt = 0
+        while True:
+            try:
+                return self._fetch_once(url, etag, last_modified, stream, chunk_size)
+            except Exception as e:
+                if attempt >= self.retries or not self.is_retryable(e):
+                    raise
+                delay = self.backoff_delay(attempt, e)
+                print(f"🔁 重试({attempt + 1}/{self.retries}) {url}: {e}，{delay:.1f}秒后")
+                time.sleep(delay)
+                attempt += 1
+                
+    def _fetch_once(self, url, etag, last_modified, stream, chunk_size):
+        """发送一次请求"""
+        deadline = time.monotonic() + self.max_duration
+        request = self.build_request(url, etag, last_modified)
+        try:
+            response = self.opener.open(request, timeout=self.connect_timeout)
+        except urllib.error.HTTPError as e:
+            if e.code != 304:
+                raise
+            # 304 Not Modified: 服务器确认内容未变化
+            headers = {k.lower(): v for k, v in e.headers.items()}
+            return {
+                'status': 304,
+                'body': None,
+                'chunks': None,
+                'headers': headers,
+                'etag': headers.get('etag') or etag,
+                'last_modified': headers.get('last-modified') or last_modified,
+                'url': url
+            }
+            
+        headers = {k.lower(): v for k, v in response.headers.items()}
+        result = {
+            'status': response.status,
+            'body': None,
+            'chunks': None,
+            'headers': headers,
+            'etag': headers.get('etag'),
+            'last_modified': headers.get('last-modified'),
+            'url': response.geturl()
+        }
+        content_encoding = headers.get('content-encoding', '')
+        chunks = self.iter_chunks(response, content_encoding, chunk_size, deadline)
+        if stream:
+            result['chunks'] = chunks
+        else:
+            result['body'] = b''.join(chunks)
+        return result
+        
+    @staticmethod
+    def is_retryable(error):
+        """判断错误是否为临时性错误"""
+        if isinstance(error, urllib.error.HTTPError):
+            return error.code in RETRYABLE_STATUS
+        return isinstance(error, (urllib.error.URLError, socket.timeout, TimeoutError,
+                                  ConnectionError, http.client.HTTPException))
+    
+    def backoff_delay(self, attempt, error=None):
+        """带完全抖动的指数退避；服务器给出较短的 Retry-After 时遵从"""
+        retry_after = getattr(error, 'headers', None) and error.headers.get('Retry-After')
+        if retry_after and retry_after.isdigit() and int(retry_after) <= self.backoff_cap:
+            return float(retry_after)
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+        
+    @staticmethod
+    def iter_chunks(response, content_encoding, chunk_size, deadline=None):
+        """按块读取并解压响应体；超过总时限时中止，迭代器提前关闭时同时关闭连接
+        
+        用 read1 读取：每次只返回已经到达的数据（最多 chunk_size），不等凑满一整块，
+        每收到一批数据就检查一次总时限。read 会一直等到整块读满，服务器以略快于
+        读取超时的速度慢慢发送时，一次读取就可能远远超过总时限。
+        """
+        encoding = content_encoding.lower()
+        if encoding == 'gzip':
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif encoding == 'deflate':
+            decompressor = zlib.decompressobj()
+        else:
+            decompressor = None
+            
+        read = getattr(response, 'read1', response.read)
+        try:
+            while True:
+                if deadline and time.monotonic() > deadline:
+                    raise FetchTimeoutError('读取响应超过总时限')
+                chunk = read(chunk_size)
+                if not chunk:
+                    break
+                yield decompressor.decompress(chunk) if decompressor else chunk
+            if decompressor:
+                yield decompressor.flush()
+        finally:
+            response.close()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# feed_scheduler.py
+# 自适应RSS源轮询调度器
+
+import hashlib
+import json
+import os
+import time
+from datetime import datetime
+
+class FeedScheduler:
+    """自适应RSS源轮询调度器
+    
+    为每个源记录观测到的更新间隔、请求耗时和失败历史，据此计算下次轮询时间：
+    - 更新频繁的源轮询得更勤，长时间没有新内容的源逐步放慢
+    - priority 数值越小越优先，轮询间隔越短，预算不足时先被选中
+    - 连续失败按指数退避，失败次数过多自动隔离一段时间
+    """
+    
+    EWMA_ALPHA = 0.3
+    
+    def __init__(self, state_file='data/feed_schedule.json', min_interval=15 * 60,
+                 max_interval=24 * 3600, quarantine_after=5, quarantine_seconds=24 * 3600):
+        """初始化调度器
+        
+        参数:
+            state_file: 调度状态文件
+            min_interval: 最短轮询间隔（秒）
+            max_interval: 最长轮询间隔（秒）
+            quarantine_after: 连续失败多少次后隔离
+            quarantine_seconds: 隔离时长（秒）
+        """
+        self.state_file = state_file
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.quarantine_after = quarantine_after
+        self.quarantine_seconds = quarantine_seconds
+        self.states = self.load()
+    
+    def load(self):
+        """加载调度状态"""
+        if not self.state_file or not os.path.exists(self.state_file):
+            return {}
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f).get('feeds', {})
+        except Exception as e:
+            print(f"⚠️ 加载调度状态失败: {e}, 重新开始调度")
+            return {}
+    
+    def save(self):
+        """原子写入调度状态"""
+        os.makedirs(os.path.dirname(self.state_file) or '.', exist_ok=True)
+        tmp_file = f"{self.state_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({'saved_at': datetime.now().isoformat(), 'feeds': self.states}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, self.state_file)
+    
+    def state(self, feed):
+        """获取（或创建）某个源的调度状态"""
+        return self.states.setdefault(feed['url'], {
+            'name': feed.get('name', ''),
+            'last_polled': None,
+            'next_poll': 0,
+            'last_changed': None,
+            'update_interval': None,
+            'poll_interval': self.min_interval,
+            'avg_latency': None,
+            'polls': 0,
+            'failures': 0,
+            'consecutive_failures': 0,
+            'quarantined_until': None,
+            'fingerprint': None
+        })
+    
+    def priority_factor(self, feed):
+        """优先级系数：priority=1 为1.0，每降一级轮询间隔延长25%"""
+        priority = feed.get('priority', 1)
+        return 1 + 0.25 * max(priority - 1, 0)
+    
+    def is_quarantined(self, feed, now=None):
+        """源是否处于隔离期"""
+        now = now or time.time()
+        until = self.state(feed).get('quarantined_until')
+        return bool(until and until > now)
+    
+    def due_feeds(self, feeds, now=None, budget=None):
+        """返回到期需要轮询的源，按 priority、到期时间排序
+        
+        参数:
+            feeds: 候选源列表
+            budget: 本次最多轮询的源数量（None表示不限）
+        """
+        now = now or time.time()
+        due = []
+        for feed in feeds:
+            if self.is_quarantined(feed, now):
+                continue
+            if self.state(feed)['next_poll'] <= now:
+                due.append(feed)
+        
+        due.sort(key=lambda feed: (feed.get('priority', 1), self.state(feed)['next_poll']))
+        return due[:budget] if budget is not None else due
+    
+    @staticmethod
+    def fingerprint(articles):
+        """文章列表指纹，用于判断源是否出现新内容"""
+        keys = sorted(a.get('guid') or a.get('link', '') for a in articles)
+        return hashlib.sha1('\n'.join(keys).encode('utf-8')).hexdigest()
+    
+    def record_result(self, feed, result, now=None):
+        """记录一次轮询结果并计算下次轮询时间
+        
+        参数:
+            feed: 源配置
+            result: AITechRSSCollector.fetch_feed_result 的返回值
+        
+        熔断器跳过的源（skipped）没有发出请求，不记录本次结果，也不计入失败。
+        """
+        if result.get('skipped'):
+            return
+        now = now or time.time()
+        state = self.state(feed)
+        state['name'] = feed.get('name', state.get('name', ''))
+        state['last_polled'] = now
+        state['polls'] += 1
+        state['avg_latency'] = self._ewma(state['avg_latency'], result['latency'])
+        
+        if not result['ok']:
+            self._record_failure(feed, state, result, now)
+            return
+        
+        state['consecutive_failures'] = 0
+        state['quarantined_until'] = None
+        
+        fingerprint = self.fingerprint(result['articles'])
+        changed = fingerprint != state['fingerprint']
+        state['fingerprint'] = fingerprint
+        
+        if changed:
+            if state['last_changed']:
+                state['update_interval'] = self._ewma(state['update_interval'], now - state['last_changed'])
+            state['last_changed'] = now
+            # 以观测到的更新间隔的一半轮询，尽快发现新内容
+            interval = (state['update_interval'] or self.min_interval * 2) / 2
+        else:
+            # 没有新内容，逐步放慢
+            interval = state['poll_interval'] * 1.5
+        
+        interval = self._clamp(interval * self.priority_factor(feed))
+        state['poll_interval'] = interval
+        state['next_poll'] = now + interval
+    
+    def _record_failure(self, feed, state, result, now):
+        """记录失败：指数退避，连续失败过多时隔离"""
+        state['failures'] += 1
+        state['consecutive_failures'] += 1
+        state['last_error'] = result.get('error')
+        
+        backoff = self._clamp(self.min_interval * 2 ** (state['consecutive_failures'] - 1))
+        state['next_poll'] = now + backoff
+        
+        if state['consecutive_failures'] >= self.quarantine_after:
+            state['quarantined_until'] = now + self.quarantine_seconds
+            state['next_poll'] = state['quarantined_until']
+            print(f"🚫 隔离RSS源: {feed.get('name', feed['url'])} (连续失败{state['consecutive_failures']}次)")
+    
+    def _clamp(self, interval):
+        return min(max(interval, self.min_interval), self.max_interval)
+    
+    def _ewma(self, current, value):
+        if current is None:
+            return value
+        return self.EWMA_ALPHA * value + (1 - self.EWMA_ALPHA) * current
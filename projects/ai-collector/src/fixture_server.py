@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# fixture_server.py
+# 本地RSS/Atom测试源服务器
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+from xml.sax.saxutils import escape
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+AI_TOPICS = ['大语言模型', 'AI Agent', 'Transformer', '机器学习', 'GPT', '计算机视觉', '强化学习', 'AIGC']
+ACTIONS = ['开源', '发布', '论文', '融资', '落地', '突破', '部署', '合作']
+
+def load_recorded_feeds(pattern=None):
+    """从已保存的 raw_articles_*.json 按来源还原录制的源 {来源名: 文章列表}"""
+    pattern = pattern or os.path.join(DATA_DIR, 'raw_articles_*.json')
+    feeds = {}
+    for path in sorted(glob.glob(pattern)):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                articles = json.load(f).get('articles', [])
+        except (OSError, ValueError):
+            continue
+        for article in articles:
+            feed = feeds.setdefault(article.get('source', 'recorded'), {})
+            feed.setdefault(article.get('link', ''), article)
+    return {name: list(articles.values()) for name, articles in feeds.items()}
+
+def synthetic_articles(feed_id, entries, body_size):
+    """生成确定性的合成文章（同一 feed_id 每次内容相同）"""
+    rng = random.Random(feed_id)
+    published = datetime(2026, 1, 31, 12, tzinfo=timezone.utc)
+    articles = []
+    for i in range(entries):
+        topic, action = rng.choice(AI_TOPICS), rng.choice(ACTIONS)
+        paragraph = f"<p>{topic}领域出现新的{action}进展，研究人员表示这将影响整个行业。</p>"
+        articles.append({
+            'title': f"[{feed_id}] {topic}{action} #{i}",
+            'link': f"https://fixture.local/{feed_id}/{i}",
+            'published': format_datetime(published - timedelta(minutes=10 * i)),
+            'summary': f"{topic}相关的{action}动态，第{i}篇。",
+            'content': paragraph * max(1, body_size // len(paragraph.encode('utf-8')))
+        })
+    return articles
+
+def render_rss(title, articles):
+    """渲染RSS 2.0文档"""
+    items = ''.join(
+        f"<item><title>{escape(a['title'])}</title><link>{escape(a['link'])}</link>"
+        f"<guid>{escape(a.get('guid') or a['link'])}</guid><pubDate>{escape(a.get('published', ''))}</pubDate>"
+        f"<description>{escape(a.get('summary', ''))}</description>"
+        f"<content:encoded>{escape(a.get('content', ''))}</content:encoded></item>"
+        for a in articles
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<rss version="2.0" xmlns:content="http://purl.org/rss/1.0/modules/content/">'
+        f"<channel><title>{escape(title)}</title><link>https://fixture.local/</link>"
+        f"<description>fixture</description>{items}</channel></rss>"
+    ).encode('utf-8')
+
+def render_atom(title, articles):
+    """渲染Atom文档"""
+    entries = ''.join(
+        f"<entry><title>{escape(a['title'])}</title><link href=\"{escape(a['link'])}\"/>"
+        f"<id>{escape(a.get('guid') or a['link'])}</id><updated>{escape(a.get('published', ''))}</updated>"
+        f"<summary>{escape(a.get('summary', ''))}</summary>"
+        f"<content type=\"html\">{escape(a.get('content', ''))}</content></entry>"
+        for a in articles
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?><feed xmlns="http://www.w3.org/2005/Atom">'
+        f"<title>{escape(title)}</title><id>https://fixture.local/</id>"
+        f"<updated>2026-01-31T12:00:00Z</updated>{entries}</feed>"
+    ).encode('utf-8')
+
+class FixtureRequestHandler(BaseHTTPRequestHandler):
+    """测试源请求处理
+    
+    路径:
+        /synthetic/<feed_id>.xml   合成源
+        /recorded/<序号>.xml        按来源还原的录制源
+        
+    查询参数（也可由服务器默认值提供）:
+        entries     条目数（合成源）
+        body        每篇正文的大约字节数（合成源）
+        format      rss 或 atom
+        latency     响应前等待的毫秒数
+        error_rate  返回500的概率
+        etag        1 发送ETag并支持304，0 不发送
+    """
+    
+    server_version = 'MOSSFixture/1.0'
+    
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        params = dict(self.server.defaults)
+        params.update({k: v[-1] for k, v in parse_qs(parts.query).items()})
+        
+        latency = float(params.get('latency', 0)) / 1000
+        if latency:
+            time.sleep(latency)
+        if random.random() < float(params.get('error_rate', 0)):
+            self.send_error(500, 'fixture error')
+            return
+            
+        body = self.render(parts.path, params)
+        if body is None:
+            self.send_error(404, 'no such fixture')
+            return
+            
+        etag = f'"{hashlib.md5(body).hexdigest()}"' if str(params.get('etag', 1)) == '1' else None
+        if etag and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+            
+        content_type = 'application/atom+xml' if params.get('format') == 'atom' else 'application/rss+xml'
+        self.send_response(200)
+        self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        if etag:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+        
+    def render(self, path, params):
+        """按路径渲染源文档，未知路径返回None"""
+        name = os.path.splitext(os.path.basename(path))[0]
+        if path.startswith('/synthetic/'):
+            articles = synthetic_articles(name, int(params.get('entries', 20)), int(params.get('body', 2000)))
+            title = f"Synthetic {name}"
+        elif path.startswith('/recorded/') and name.isdigit():
+            recorded = self.server.recorded
+            if not recorded:
+                return None
+            title = sorted(recorded)[int(name) % len(recorded)]
+            articles = recorded[title]
+        else:
+            return None
+            
+        cache_key = (path, params.get('entries'), params.get('body'), params.get('format'))
+        with self.server.cache_lock:
+            if cache_key not in self.server.cache:
+                render = render_atom if params.get('format') == 'atom' else render_rss
+                self.server.cache[cache_key] = render(title, articles)
+            return self.server.cache[cache_key]
+            
+    def log_message(self, format, *args):
+        pass
+
+class FeedFixtureServer:
+    """本地测试源服务器，在后台线程中运行"""
+    
+    def __init__(self, host='127.0.0.1', port=0, **defaults):
+        """初始化服务器
+        
+        参数:
+            port: 监听端口（0表示自动分配）
+            defaults: 查询参数的默认值（entries、body、format、latency、error_rate、etag）
+        """
+        self.httpd = ThreadingHTTPServer((host, port), FixtureRequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.defaults = {k: v for k, v in defaults.items() if v is not None}
+        self.httpd.recorded = load_recorded_feeds()
+        self.httpd.cache = {}
+        self.httpd.cache_lock = threading.Lock()
+        self.thread = None
+        
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+        
+    def start(self):
+        """在后台线程启动服务器"""
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+        
+    def stop(self):
+        """停止服务器"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        
+    def __enter__(self):
+        return self.start()
+        
+    def __exit__(self, *exc):
+        self.stop()
+
+def main():
+    """主函数：在前台运行测试源服务器"""
+    parser = argparse.ArgumentParser(description='本地RSS/Atom测试源服务器')
+    parser.add_argument('--port', type=int, default=8765, help='监听端口')
+    parser.add_argument('--entries', type=int, help='合成源默认条目数')
+    parser.add_argument('--body', type=int, help='合成源每篇正文的大约字节数')
+    parser.add_argument('--format', choices=['rss', 'atom'], help='默认格式')
+    parser.add_argument('--latency', type=float, help='默认响应延迟（毫秒）')
+    parser.add_argument('--error-rate', type=float, help='默认错误率')
+    parser.add_argument('--etag', type=int, choices=[0, 1], help='是否发送ETag')
+    args = parser.parse_args()
+    
+    server = FeedFixtureServer(
+        port=args.port, entries=args.entries, body=args.body, format=args.format,
+        latency=args.latency, error_rate=args.error_rate, etag=args.etag
+    )
+    print(f"🧪 测试源服务器: {server.base_url}/synthetic/<id>.xml, {server.base_url}/recorded/<n>.xml")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# html_archive.py
+# 分页、按需加载的HTML报告：外壳页面 + 分片数据文件 + 紧凑搜索索引
+
+import json
+import os
+import shutil
+
+from report_model import article_fields
+
+# 分类列表每页的文章数
+PAGE_SIZE = 50
+
+# 搜索结果最多显示的篇数
+SEARCH_LIMIT = 50
+
+# 分片中每行文章的字段顺序（页面脚本按 ARCHIVE.fields 读取）
+ROW_FIELDS = ('title', 'link', 'source', 'ai_score', 'published', 'summary')
+
+# 数据分片所在的子目录
+DATA_DIR = 'data'
+
+def article_row(article):
+    """文章在分片中的一行（按 ROW_FIELDS 的顺序）"""
+    fields = article_fields(article)
+    fields['published'] = str(fields['published'])
+    return [fields[field] for field in ROW_FIELDS]
+
+def data_script(name, payload):
+    """数据分片文件内容
+    
+    分片是一段调用 archiveLoaded(名称, JSON数据) 的脚本，页面用 <script> 按需加载，
+    直接以本地文件打开报告时也能工作（file:// 下浏览器不允许 fetch）。
+    """
+    data = json.dumps(payload, ensure_ascii=False, separators=(',', ':'))
+    return f"archiveLoaded({json.dumps(name)},{data});\n"
+
+class HtmlArchiveWriter:
+    """分页HTML报告写入器
+    
+    外壳页面只包含报告信息、分类分布、推荐文章和各分类的目录，大小只与分类数有关；
+    每个分类的文章按 page_size 分页写入 data/c<分类>-p<页>.js，在浏览器中展开分类时
+    才逐页加载。搜索索引 data/search.js 只保存标题、链接、来源编号和分类编号，
+    第一次搜索时才加载。文章只遍历一次，生成时间与文章数成正比。
+    """
+    
+    def __init__(self, renderer, page_size=PAGE_SIZE):
+        """初始化写入器
+        
+        参数:
+            renderer: HTML格式的 ReportRenderer（复用其模板和片段缓存）
+            page_size: 每页文章数
+        """
+        self.renderer = renderer
+        self.templates = renderer.templates
+        self.page_size = max(1, page_size)
+    
+    def write(self, document, directory):
+        """把文档写入 directory（index.html 和 data/），返回外壳页面路径
+        
+        先写入临时目录再整体替换，读者不会看到新旧混杂的分片。
+        """
+        tmp_dir = f"{directory}.tmp"
+        if os.path.exists(tmp_dir):
+            shutil.rmtree(tmp_dir)
+        os.makedirs(os.path.join(tmp_dir, DATA_DIR))
+        
+        categories = []
+        sources, source_ids = [], {}
+        docs = []
+        for category_index, (category, articles) in enumerate(document.sections):
+            pages = (len(articles) + self.page_size - 1) // self.page_size
+            categories.append({'name': category, 'count': len(articles), 'pages': pages})
+            for page in range(pages):
+                rows = []
+                for article in articles[page * self.page_size:(page + 1) * self.page_size]:
+                    row = article_row(article)
+                    rows.append(row)
+                    source = row[ROW_FIELDS.index('source')]
+                    if source not in source_ids:
+                        source_ids[source] = len(sources)
+                        sources.append(source)
+                    docs.append([row[0], row[1], source_ids[source], category_index])
+                self._write_data(tmp_dir, f"c{category_index}-p{page + 1}", rows)
+        self._write_data(tmp_dir, 'search', {'sources': sources, 'docs': docs})
+        
+        manifest = {
+            'data': DATA_DIR,
+            'fields': ROW_FIELDS,
+            'page_size': self.page_size,
+            'search_limit': SEARCH_LIMIT,
+            'categories': categories
+        }
+        section_template = self.templates['archive_section']
+        with open(os.path.join(tmp_dir, 'index.html'), 'w', encoding='utf-8') as f:
+            self.templates['archive'].render_to(f.write, {
+                'date': document.date,
+                'time': document.generated_at.strftime('%H:%M'),
+                'total': document.total,
+                'category_stats': self.renderer.iter_category_stats(document),
+                'top_articles': (self.renderer.article_card(i, article)
+                                 for i, article in enumerate(document.top_articles, 1)),
+                'sections': (section_template.render(dict(category, index=i, category=category['name']))
+                             for i, category in enumerate(categories)),
+                # 内嵌在 <script> 中，转义 "</" 以免提前结束脚本
+                'manifest': json.dumps(manifest, ensure_ascii=False).replace('</', '<\\/'),
+                'generated_at': document.generated_at.strftime('%Y-%m-%d %H:%M:%S')
+            })
+        
+        # 替换旧目录：先移开旧目录再改名，替换完成后删除旧目录
+        old_dir = f"{directory}.old"
+        if os.path.exists(old_dir):
+            shutil.rmtree(old_dir)
+        if os.path.exists(directory):
+            os.replace(directory, old_dir)
+        os.replace(tmp_dir, directory)
+        if os.path.exists(old_dir):
+            shutil.rmtree(old_dir)
+        return os.path.join(directory, 'index.html')
+    
+    @staticmethod
+    def _write_data(directory, name, payload):
+        """写入一个数据分片"""
+        with open(os.path.join(directory, DATA_DIR, f"{name}.js"), 'w', encoding='utf-8') as f:
+            f.write(data_script(name, payload))
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# html_text.py
+# HTML正文转纯文本与按句截断
+
+from html.parser import HTMLParser
+
+# 内容不属于正文的标签
+SKIP_TAGS = frozenset({'script', 'style', 'noscript', 'template', 'head'})
+
+# 块级标签：前后视为空白，避免相邻段落的文字粘连
+BLOCK_TAGS = frozenset({
+    'address', 'article', 'aside', 'blockquote', 'br', 'dd', 'div', 'dl', 'dt', 'figcaption',
+    'figure', 'footer', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li', 'main', 'nav',
+    'ol', 'p', 'pre', 'section', 'table', 'td', 'th', 'tr', 'ul'
+})
+
+# 句末标点（中英文）
+SENTENCE_ENDINGS = ('.', '!', '?', '。', '！', '？')
+
+class TextExtractor(HTMLParser):
+    """单遍HTML文本提取器
+    
+    解码字符实体，跳过脚本和样式，边解析边合并空白；
+    收集到 max_chars 个字符后标记完成，调用方可以停止继续输入。
+    """
+    
+    def __init__(self, max_chars=None):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.parts = []
+        self.length = 0
+        self.skip_depth = 0
+        self.space = False
+        self.done = False
+    
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self.skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self.space = True
+    
+    def handle_startendtag(self, tag, attrs):
+        if tag in BLOCK_TAGS:
+            self.space = True
+    
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+        elif tag in BLOCK_TAGS:
+            self.space = True
+    
+    def handle_data(self, data):
+        if self.skip_depth or self.done or not data:
+            return
+        words = data.split()
+        if not words:
+            self.space = True
+            return
+        
+        if (self.space or data[0].isspace()) and self.length:
+            self.parts.append(' ')
+            self.length += 1
+        text = ' '.join(words)
+        self.parts.append(text)
+        self.length += len(text)
+        self.space = data[-1].isspace()
+        
+        if self.max_chars is not None and self.length >= self.max_chars:
+            self.done = True
+    
+    def text(self):
+        """已提取的文本"""
+        return ''.join(self.parts)
+
+def html_to_text(html, max_chars=None, chunk_size=4096):
+    """把HTML转换为合并空白后的纯文本
+    
+    参数:
+        html: HTML或纯文本
+        max_chars: 只需要前多少个字符（None表示全部）；达到后不再解析剩余部分
+        chunk_size: 每次交给解析器的字符数
+    """
+    if not html:
+        return ''
+    if '<' not in html and '&' not in html:
+        # 纯文本不需要解析
+        text = ' '.join(html.split())
+        return text if max_chars is None else text[:max_chars]
+    
+    extractor = TextExtractor(max_chars)
+    for start in range(0, len(html), chunk_size):
+        extractor.feed(html[start:start + chunk_size])
+        if extractor.done:
+            break
+    else:
+        extractor.close()
+    
+    text = extractor.text()
+    return text if max_chars is None else text[:max_chars]
+
+def truncate_text(text, max_length, min_ratio=0.5):
+    """截断到 max_length 以内，优先在句末标点（含中文标点）处截断
+    
+    参数:
+        min_ratio: 句末截断点至少要达到 max_length 的这个比例，否则直接截断并加省略号
+    """
+    if len(text) <= max_length:
+        return text
+    truncated = text[:max_length]
+    cut_point = max(truncated.rfind(mark) for mark in SENTENCE_ENDINGS)
+    if cut_point > max_length * min_ratio:
+        return truncated[:cut_point + 1]
+    return truncated + "..."
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# http_cache.py
+# RSS源HTTP条件请求缓存
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+
+from blob_store import BlobStore
+
+class FeedHTTPCache:
+    """RSS源HTTP缓存
+    
+    按源URL持久化保存 ETag、Last-Modified、正文哈希，以及上次解析出的文章在
+    blob存储中的引用；缓存文件本身只有每个源一行校验信息，不随文章数增长。
+    服务器返回304或正文哈希未变时，从blob存储读出上次的文章，跳过解析。
+    """
+    
+    def __init__(self, cache_file='data/http_cache.json', blob_store=None):
+        """初始化缓存
+        
+        参数:
+            cache_file: 缓存文件
+            blob_store: 保存解析结果的 BlobStore（默认为缓存文件旁的 blobs/ 目录）
+        """
+        self.cache_file = cache_file
+        self.blob_store = blob_store or BlobStore(os.path.join(os.path.dirname(cache_file) or '.', 'blobs'))
+        self._lock = threading.Lock()
+        self.entries = self.load()
+    
+    def load(self):
+        """从文件加载缓存"""
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return {}
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                entries = json.load(f).get('feeds', {})
+        except Exception as e:
+            print(f"⚠️ 加载HTTP缓存失败: {e}, 使用空缓存")
+            return {}
+        
+        # 旧格式的条目直接内联文章，转存到blob存储
+        for entry in entries.values():
+            if 'articles' in entry:
+                entry['articles_blob'] = self.put_articles(entry.pop('articles'))
+        return entries
+    
+    def save(self):
+        """原子写入缓存文件"""
+        if not self.cache_file:
+            return
+        os.makedirs(os.path.dirname(self.cache_file) or '.', exist_ok=True)
+        with self._lock:
+            data = {'saved_at': datetime.now().isoformat(), 'feeds': self.entries}
+            tmp_file = f"{self.cache_file}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_file, self.cache_file)
+    
+    @staticmethod
+    def hash_body(body):
+        """计算响应正文哈希"""
+        return hashlib.sha256(body).hexdigest()
+    
+    def get(self, url):
+        """获取某个源的缓存条目"""
+        with self._lock:
+            return self.entries.get(url)
+    
+    def restore(self, url, entry):
+        """用其他进程交回的条目替换某个源的缓存（文章已在共享的blob存储中）"""
+        with self._lock:
+            self.entries[url] = dict(entry)
+    
+    def validators(self, url):
+        """返回条件请求所需的 (etag, last_modified)"""
+        entry = self.get(url) or {}
+        return entry.get('etag'), entry.get('last_modified')
+    
+    def put_articles(self, articles):
+        """把解析结果写入blob存储，返回引用（内容相同的结果只保存一份）"""
+        # 缓存的文章不含收集时间，复用时重新填写
+        articles = [{k: v for k, v in a.items() if k != 'collected_at'} for a in articles]
+        return self.blob_store.put(json.dumps(articles, ensure_ascii=False, sort_keys=True))
+    
+    def update(self, url, etag, last_modified, body_hash, articles):
+        """保存一次成功解析的结果"""
+        articles_blob = self.put_articles(articles)
+        with self._lock:
+            self.entries[url] = {
+                'etag': etag,
+                'last_modified': last_modified,
+                'body_hash': body_hash,
+                'checked_at': datetime.now().isoformat(),
+                'articles_blob': articles_blob
+            }
+    
+    def revalidate(self, url, etag=None, last_modified=None):
+        """内容未变化时刷新校验信息，返回缓存的文章；blob缺失时返回None"""
+        with self._lock:
+            entry = self.entries.get(url)
+            if entry is None or not entry.get('articles_blob'):
+                return None
+            try:
+                articles = json.loads(self.blob_store.get(entry['articles_blob']))
+            except (OSError, ValueError) as e:
+                print(f"⚠️ 读取缓存的文章失败: {e}")
+                del self.entries[url]
+                return None
+            if etag:
+                entry['etag'] = etag
+            if last_modified:
+                entry['last_modified'] = last_modified
+            entry['checked_at'] = datetime.now().isoformat()
+            collected_at = datetime.now().isoformat()
+            return [dict(a, collected_at=collected_at) for a in articles]
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# keyword_matcher.py
+# 多关键词单遍匹配（Aho-Corasick自动机）
+
+from collections import deque
+
+def is_word_char(char):
+    """英文字母、数字或下划线"""
+    return char.isascii() and (char.isalnum() or char == '_')
+
+def is_word_match(text, start, end):
+    """text[start:end] 两侧是否满足单词边界（只约束英文/数字端点）"""
+    if start > 0 and is_word_char(text[start]) and is_word_char(text[start - 1]):
+        return False
+    if end < len(text) and is_word_char(text[end - 1]) and is_word_char(text[end]):
+        return False
+    return True
+
+class KeywordMatcher:
+    """多关键词匹配器
+    
+    所有关键词编译成一个Aho-Corasick自动机，文本只需从头到尾扫描一遍就能找出
+    全部命中的关键词，耗时与文本长度成正比，不随关键词数量增长。
+    匹配不区分大小写，语义与 keyword.lower() in text.lower() 相同（子串匹配，允许重叠）。
+    """
+    
+    def __init__(self, groups=None):
+        """初始化匹配器
+        
+        参数:
+            groups: {标签: 关键词列表}，同一关键词可以属于多个标签
+        """
+        self.goto = [{}]
+        self.fail = [0]
+        self.labels = [()]
+        self.keywords = [None]
+        self.matches = None
+        for label, keywords in (groups or {}).items():
+            for keyword in keywords:
+                self.add(keyword, label)
+                
+    def add(self, keyword, label):
+        """加入一个关键词（加入后需重新编译）"""
+        keyword = keyword.lower()
+        if not keyword:
+            return
+        state = 0
+        for char in keyword:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.labels.append(())
+                self.keywords.append(None)
+            state = next_state
+        self.keywords[state] = keyword
+        if label not in self.labels[state]:
+            self.labels[state] += (label,)
+        self.matches = None
+        
+    def build(self):
+        """按广度优先计算失败链接，每个状态汇总其所有后缀关键词"""
+        self.matches = [((self.keywords[s], self.labels[s]),) if self.keywords[s] else ()
+                        for s in range(len(self.goto))]
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                self.matches[next_state] += self.matches[self.fail[next_state]]
+        return self
+        
+    def scan(self, text):
+        """扫描文本一遍，返回 {标签: 命中的关键词集合}（关键词为小写）"""
+        if self.matches is None:
+            self.build()
+        goto, fail, matches = self.goto, self.fail, self.matches
+        hits = {}
+        state = 0
+        for char in text.lower():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for keyword, labels in matches[state]:
+                for label in labels:
+                    hits.setdefault(label, set()).add(keyword)
+        return hits
+    
+    def count(self, text, word_boundary=False):
+        """扫描文本一遍，返回 {关键词: 出现次数}（关键词为小写，重叠出现分别计数）
+        
+        参数:
+            word_boundary: 为True时，以英文字母或数字开头/结尾的关键词两侧不能紧邻英文字母或数字
+                           （"AI" 不再计入 "said"），中文关键词不受影响
+        """
+        if self.matches is None:
+            self.build()
+        goto, fail, matches = self.goto, self.fail, self.matches
+        lowered = text.lower()
+        counts = {}
+        state = 0
+        for position, char in enumerate(lowered):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for keyword, _ in matches[state]:
+                if word_boundary and not is_word_match(lowered, position + 1 - len(keyword), position + 1):
+                    continue
+                counts[keyword] = counts.get(keyword, 0) + 1
+        return counts
+    
+    def iter_matches(self, text):
+        """扫描文本一遍，逐个产出 (起始位置, 结束位置, 标签元组)
+        
+        位置以 text.lower() 为准，调用方可据此自行检查单词边界。
+        """
+        if self.matches is None:
+            self.build()
+        goto, fail, matches = self.goto, self.fail, self.matches
+        state = 0
+        for position, char in enumerate(text.lower()):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for keyword, labels in matches[state]:
+                yield position + 1 - len(keyword), position + 1, labels
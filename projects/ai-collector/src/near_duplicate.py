@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# near_duplicate.py
+# 跨来源近重复文章检测（MinHash + LSH分桶）
+
+import hashlib
+import random
+import re
+from collections import OrderedDict
+
+TAG_PATTERN = re.compile(r'<[^>]+>')
+WORD_PATTERN = re.compile(r'[a-z0-9]+')
+CJK_PATTERN = re.compile(r'[一-鿿]+')
+
+# 出现在几乎所有英文文本中的虚词，不参与特征提取
+STOPWORDS = frozenset("""
+a an and are as at be been but by can for from has have in into is it its more new of on or our
+that the their this to was we were which will with you your not than they he she his her after about
+""".split())
+
+# 以中文为主的短文本（如模板化的新闻标题和一句话摘要）中，模板本身贡献了大部分字符二元组，
+# 不同事件的文章相似度也能到0.6~0.7，这类文章改用精确Jaccard和更高的阈值
+SHORT_CJK_LENGTH = 120
+SHORT_CJK_THRESHOLD = 0.8
+
+def extract_features(title, summary):
+    """提取特征集合：英文/数字相邻单词二元组，以及中文字符二元组
+    
+    去掉虚词后再取二元组，避免 "of the" 这类高频组合让不相关文章的签名趋同。
+    """
+    features = set()
+    text = f"{title} {TAG_PATTERN.sub(' ', summary)}".lower()
+    words = [word for word in WORD_PATTERN.findall(text) if word not in STOPWORDS]
+    if len(words) == 1:
+        features.add(words[0])
+    features.update(f"{words[i]} {words[i + 1]}" for i in range(len(words) - 1))
+    for run in CJK_PATTERN.findall(text):
+        if len(run) == 1:
+            features.add(run)
+        features.update(run[i:i + 2] for i in range(len(run) - 1))
+    return features
+
+def is_short_cjk(title, summary, max_length=SHORT_CJK_LENGTH):
+    """是否为以中文为主的短文本：中文字符不少于英文字母和数字，且少于 max_length 个"""
+    text = f"{title} {TAG_PATTERN.sub(' ', summary)}"
+    cjk = sum(len(run) for run in CJK_PATTERN.findall(text))
+    latin = sum(len(word) for word in WORD_PATTERN.findall(text.lower()))
+    return 0 < cjk < max_length and cjk >= latin
+
+def jaccard(a, b):
+    """两个特征集合的Jaccard相似度"""
+    union = len(a | b)
+    return len(a & b) / union if union else 1.0
+
+def _probe_order(num_bins, seed=0x5EED):
+    """每个桶的固定探测顺序，用于空桶借值"""
+    rng = random.Random(seed)
+    orders = []
+    for i in range(num_bins):
+        order = [j for j in range(num_bins) if j != i]
+        rng.shuffle(order)
+        orders.append(order)
+    return orders
+
+PROBE_ORDERS = {}
+
+def minhash_signature(features, num_bins=96):
+    """单次哈希MinHash签名（One Permutation Hashing）
+    
+    每个特征只哈希一次，按哈希值分到 num_bins 个桶里各取最小值，计算量与特征数成线性。
+    空桶按该桶固定的随机探测顺序向第一个非空桶借值（optimal densification），
+    相邻空桶不会借到同一个值，LSH分段之间保持独立。
+    """
+    bins = [None] * num_bins
+    for feature in features:
+        h = int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'big')
+        i = h % num_bins
+        value = h // num_bins
+        if bins[i] is None or value < bins[i]:
+            bins[i] = value
+            
+    if all(value is None for value in bins):
+        return tuple([0] * num_bins)
+        
+    if num_bins not in PROBE_ORDERS:
+        PROBE_ORDERS[num_bins] = _probe_order(num_bins)
+    orders = PROBE_ORDERS[num_bins]
+    
+    signature = list(bins)
+    for i in range(num_bins):
+        if signature[i] is None:
+            signature[i] = next(bins[j] for j in orders[i] if bins[j] is not None)
+    return tuple(signature)
+
+def estimate_similarity(a, b):
+    """由两个签名估计Jaccard相似度"""
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+class NearDuplicateIndex:
+    """近重复文章索引（MinHash-LSH）
+    
+    每篇文章保存一个固定长度的MinHash签名，签名切成 bands 段，任一段完全相同的
+    文章才进入候选并估计相似度，整体接近线性时间，无需两两比较。
+    capacity 限制索引保留的文章数，超出时淘汰最早加入的，内存占用固定。
+    
+    条目可以带有自己的阈值和特征集合：比较两篇文章时取双方阈值中较高的一个，
+    双方都保存了特征集合时用精确Jaccard代替签名估计（只用于短文本，内存开销很小）。
+    """
+    
+    def __init__(self, threshold=0.4, num_bins=96, bands=32, capacity=100000):
+        """初始化索引
+        
+        参数:
+            threshold: 判为近重复的最小估计Jaccard相似度
+            num_bins: 签名长度
+            bands: LSH分段数（每段 num_bins/bands 个值，默认配置下相似度0.4的候选召回率约88%，0.5约99%）
+            capacity: 索引最多保留的规范文章数
+        """
+        self.threshold = threshold
+        self.num_bins = num_bins
+        self.rows = num_bins // bands
+        self.bands = bands
+        self.capacity = capacity
+        self.buckets = [{} for _ in range(bands)]
+        self.entries = OrderedDict()
+        self._next_id = 0
+        
+    def _band_keys(self, signature):
+        return [signature[b * self.rows:(b + 1) * self.rows] for b in range(self.bands)]
+        
+    def find(self, signature, threshold=None, features=None):
+        """查找与签名近重复的已有条目，返回其对象或None
+        
+        参数:
+            threshold: 本条目的阈值（None表示索引的默认阈值）
+            features: 本条目的特征集合（提供时与同样保存了特征的条目精确比较）
+        """
+        threshold = self.threshold if threshold is None else threshold
+        checked = set()
+        for bucket, key in zip(self.buckets, self._band_keys(signature)):
+            for entry_id in bucket.get(key, ()):
+                if entry_id in checked:
+                    continue
+                checked.add(entry_id)
+                entry_signature, item, entry_threshold, entry_features = self.entries[entry_id]
+                if features is not None and entry_features is not None:
+                    similarity = jaccard(features, entry_features)
+                else:
+                    similarity = estimate_similarity(signature, entry_signature)
+                if similarity >= max(threshold, entry_threshold):
+                    return item
+        return None
+        
+    def add(self, signature, item, threshold=None, features=None):
+        """加入新条目（阈值和特征集合同 find），超出容量时淘汰最早的条目"""
+        entry_id = self._next_id
+        self._next_id += 1
+        threshold = self.threshold if threshold is None else threshold
+        self.entries[entry_id] = (signature, item, threshold, features)
+        for bucket, key in zip(self.buckets, self._band_keys(signature)):
+            bucket.setdefault(key, []).append(entry_id)
+            
+        if len(self.entries) > self.capacity:
+            old_id, (old_signature, *_) = self.entries.popitem(last=False)
+            for bucket, key in zip(self.buckets, self._band_keys(old_signature)):
+                ids = bucket[key]
+                ids.remove(old_id)
+                if not ids:
+                    del bucket[key]
+
+class NearDuplicateDetector:
+    """近重复文章合并器
+    
+    同一事件被多个来源转载时，保留最先出现的文章作为规范文章，
+    其余文章的来源、标题和链接记录到规范文章的 alternate_sources 中。
+    以中文为主的短文本按精确Jaccard和 short_cjk_threshold 判断，
+    同一模板的不同新闻（如"某公司发布新一代大模型某某"）不会被合并。
+    """
+    
+    def __init__(self, threshold=0.4, capacity=100000, short_cjk_threshold=SHORT_CJK_THRESHOLD):
+        """初始化检测器"""
+        self.index = NearDuplicateIndex(threshold, capacity=capacity)
+        self.short_cjk_threshold = max(threshold, short_cjk_threshold)
+        
+    def signature(self, article):
+        """文章的MinHash签名（基于标题和摘要）"""
+        features = extract_features(article.get('title', ''), article.get('summary', ''))
+        return minhash_signature(features, self.index.num_bins)
+        
+    def check(self, article):
+        """检查一篇文章
+        
+        返回:
+            dict: 近重复时返回已有的规范文章（本文已记为其备选来源），否则返回None并把本文加入索引
+        """
+        title, summary = article.get('title', ''), article.get('summary', '')
+        features = extract_features(title, summary)
+        signature = minhash_signature(features, self.index.num_bins)
+        if is_short_cjk(title, summary):
+            threshold, exact_features = self.short_cjk_threshold, features
+        else:
+            threshold, exact_features = None, None
+            
+        canonical = self.index.find(signature, threshold, exact_features)
+        if canonical is None:
+            self.index.add(signature, article, threshold, exact_features)
+            return None
+            
+        if article.get('link') != canonical.get('link'):
+            canonical.setdefault('alternate_sources', []).append({
+                'source': article.get('source', ''),
+                'title': article.get('title', ''),
+                'link': article.get('link', '')
+            })
+        return canonical
+        
+    def deduplicate(self, articles):
+        """合并近重复文章，返回规范文章列表（保持原有顺序）"""
+        return [article for article in articles if self.check(article) is None]
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# process_cache.py
+# 跨运行的文章处理结果缓存
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+from blob_store import BLOB_REF_KEY, is_blob_ref
+
+# 参与缓存键计算的文章字段
+KEY_FIELDS = ('title', 'summary', 'content')
+
+def field_digest(article, field):
+    """字段文本的SHA-256；正文为blob引用时直接使用引用中的哈希，不读取blob"""
+    # dict.get 绕过 BlobArticle 的按需解析
+    value = dict.get(article, field)
+    if is_blob_ref(value):
+        return value[BLOB_REF_KEY]
+    return hashlib.sha256((value or '').encode('utf-8')).hexdigest()
+
+def content_key(article):
+    """文章内容键：标题、摘要和正文哈希的64位摘要（有符号，适合SQLite整数主键）"""
+    combined = '|'.join(field_digest(article, field) for field in KEY_FIELDS)
+    digest = hashlib.blake2b(combined.encode('ascii'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+def config_fingerprint(*parts):
+    """处理配置的指纹：任一部分变化都会得到不同的指纹"""
+    data = json.dumps(parts, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()[:16]
+
+class ProcessingCache:
+    """文章处理结果缓存
+    
+    以文章内容键保存处理结果（AI评分、分类、摘要；与AI无关的判定也会缓存），
+    每条结果记录生成时的配置指纹，关键词配置变化后旧结果不再命中，并在下次清理时删除。
+    超过 ttl_days 未被使用的条目会过期，条目数超过 max_entries 时淘汰最久未使用的。
+    """
+    
+    BATCH_SIZE = 500
+    
+    def __init__(self, db_file='data/process_cache.db', max_entries=200000, ttl_days=30):
+        """打开（或创建）缓存"""
+        os.makedirs(os.path.dirname(db_file) or '.', exist_ok=True)
+        self.db_file = db_file
+        self.max_entries = max_entries
+        self.ttl_days = ttl_days
+        self.conn = sqlite3.connect(db_file)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS results ('
+            'key INTEGER PRIMARY KEY, fingerprint TEXT NOT NULL, fields TEXT NOT NULL, last_used INTEGER NOT NULL)'
+        )
+        self.conn.execute('CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)')
+        self.conn.commit()
+    
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+    
+    def close(self):
+        """关闭缓存"""
+        self.conn.close()
+    
+    def get_many(self, keys, fingerprint, now=None):
+        """批量查找，返回 {key: 处理结果}（与AI无关的文章结果为None），命中的条目刷新使用时间"""
+        found = {}
+        keys = list(set(keys))
+        for i in range(0, len(keys), self.BATCH_SIZE):
+            batch = keys[i:i + self.BATCH_SIZE]
+            placeholders = ','.join('?' * len(batch))
+            rows = self.conn.execute(
+                f'SELECT key, fields FROM results WHERE fingerprint = ? AND key IN ({placeholders})',
+                [fingerprint] + batch
+            )
+            found.update((key, json.loads(fields)) for key, fields in rows)
+        
+        if found:
+            now = int(now or time.time())
+            self.conn.executemany('UPDATE results SET last_used = ? WHERE key = ?', ((now, key) for key in found))
+            self.conn.commit()
+        return found
+    
+    def put_many(self, items, fingerprint, now=None):
+        """批量写入 (key, 处理结果)"""
+        now = int(now or time.time())
+        self.conn.executemany(
+            'INSERT OR REPLACE INTO results (key, fingerprint, fields, last_used) VALUES (?, ?, ?, ?)',
+            ((key, fingerprint, json.dumps(fields, ensure_ascii=False), now) for key, fields in items)
+        )
+        self.conn.commit()
+    
+    def evict(self, fingerprint=None, now=None):
+        """清理缓存，返回删除数量
+        
+        参数:
+            fingerprint: 当前配置指纹，其他指纹的条目全部删除（None表示不按指纹清理）
+        """
+        now = int(now or time.time())
+        removed = 0
+        if fingerprint is not None:
+            removed += self.conn.execute('DELETE FROM results WHERE fingerprint != ?', (fingerprint,)).rowcount
+        
+        cutoff = now - int(self.ttl_days * 86400)
+        removed += self.conn.execute('DELETE FROM results WHERE last_used < ?', (cutoff,)).rowcount
+        
+        # 超出容量时按最久未使用淘汰
+        excess = len(self) - self.max_entries
+        if excess > 0:
+            removed += self.conn.execute(
+                'DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY last_used LIMIT ?)', (excess,)
+            ).rowcount
+        self.conn.commit()
+        return removed
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# ranking.py
+# 多信号文章排序：相关度、时效、来源优先级与多样性
+
+import argparse
+import heapq
+import json
+from datetime import datetime, timezone
+
+from blob_store import load_run_file
+from report_model import primary_category
+from stream_parser import parse_date
+
+# 各信号的默认权重（每个信号都归一到0-1）
+DEFAULT_SIGNAL_WEIGHTS = {
+    'relevance': 1.0,
+    'freshness': 0.4,
+    'priority': 0.3
+}
+
+def load_source_priorities(config_file):
+    """从RSS源配置读取 {源名称: priority}（数值越小越优先）"""
+    try:
+        with open(config_file, 'r', encoding='utf-8') as f:
+            feeds = json.load(f).get('feeds', [])
+    except Exception as e:
+        print(f"⚠️ 读取源优先级失败: {e}")
+        return {}
+    return {feed['name']: feed['priority'] for feed in feeds if 'name' in feed and 'priority' in feed}
+
+class ArticleRanker:
+    """多信号文章排序器
+    
+    每篇文章的基础分是各信号的加权和：
+    - relevance: AI相关度评分 / 10
+    - freshness: 按半衰期指数衰减的新鲜度，发布时间未知时取0.5
+    - priority: feeds_config.json 中的 priority 映射到0-1（1最优先），未配置的来源取0.5
+    先用堆在 O(n log m) 内选出基础分最高的 m = k × candidate_factor 篇候选，
+    再在候选中逐篇贪心选择：已选文章每有一篇同来源扣 diversity_penalty，
+    同主分类扣一半，避免前几名被同一来源或同一话题占满。
+    """
+    
+    def __init__(self, weights=None, half_life_hours=24.0, source_priorities=None,
+                 diversity_penalty=0.15, candidate_factor=4, now=None):
+        """初始化排序器
+        
+        参数:
+            weights: {信号名: 权重}，未给出的信号使用默认权重
+            half_life_hours: 新鲜度半衰期（小时）
+            source_priorities: {源名称: priority}，可由 load_source_priorities 读取
+            diversity_penalty: 多样性惩罚（0表示不考虑多样性）
+            candidate_factor: 多样性重排的候选数是k的多少倍
+            now: 计算新鲜度的参考时间（默认每次排序时的当前时间）
+        """
+        self.weights = dict(DEFAULT_SIGNAL_WEIGHTS, **(weights or {}))
+        self.half_life_hours = half_life_hours
+        self.source_priorities = source_priorities or {}
+        self.max_priority = max(self.source_priorities.values(), default=1)
+        self.diversity_penalty = diversity_penalty
+        self.candidate_factor = max(1, candidate_factor)
+        self.now = now
+        self.reference_time = now or datetime.now(timezone.utc)
+    
+    def freshness(self, article):
+        """按半衰期衰减的新鲜度（0-1）"""
+        published = parse_date(article.get('published', ''))
+        if published is None:
+            return 0.5
+        age_hours = max(0.0, (self.reference_time - published).total_seconds() / 3600)
+        return 0.5 ** (age_hours / self.half_life_hours)
+    
+    def priority(self, article):
+        """来源优先级（0-1，priority为1的来源得1分）"""
+        priority = self.source_priorities.get(article.get('source'))
+        if priority is None or self.max_priority <= 1:
+            return 0.5
+        return 1 - (priority - 1) / (self.max_priority - 1)
+    
+    @staticmethod
+    def relevance(article):
+        """AI相关度（0-1）"""
+        return min(max(article.get('ai_score', 0) / 10, 0.0), 1.0)
+    
+    def signals(self, article):
+        """文章的各项信号值"""
+        return {
+            'relevance': self.relevance(article),
+            'freshness': self.freshness(article),
+            'priority': self.priority(article)
+        }
+    
+    def partial_score(self, article):
+        """不含新鲜度的部分基础分（不需要解析发布时间）"""
+        return (self.weights.get('relevance', 0) * self.relevance(article)
+                + self.weights.get('priority', 0) * self.priority(article))
+    
+    def score(self, article):
+        """基础分：各信号的加权和"""
+        return self.partial_score(article) + self.weights.get('freshness', 0) * self.freshness(article)
+    
+    def top_k(self, articles, k=5):
+        """选出排名前k的文章（按排名顺序）；articles 可以是任意可迭代对象"""
+        if k <= 0:
+            return []
+        self.reference_time = self.now or datetime.now(timezone.utc)
+        size = k * self.candidate_factor if self.diversity_penalty else k
+        
+        # 大小为 size 的最小堆，堆顶是当前入选候选中最差的一篇；
+        # 新鲜度最多贡献其权重，连同它也进不了堆的文章不必解析发布时间
+        weight_freshness = self.weights.get('freshness', 0)
+        heap = []
+        for i, article in enumerate(articles):
+            partial = self.partial_score(article)
+            if len(heap) >= size and partial + max(weight_freshness, 0) <= heap[0][0]:
+                continue
+            item = (partial + weight_freshness * self.freshness(article), -i, article)
+            if len(heap) < size:
+                heapq.heappush(heap, item)
+            elif item[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, item)
+        heap.sort(key=lambda item: item[:2], reverse=True)
+        candidates = [(score, -neg_index, article) for score, neg_index, article in heap]
+        if not self.diversity_penalty:
+            return [article for _, _, article in candidates]
+        
+        selected = []
+        source_counts, category_counts = {}, {}
+        while candidates and len(selected) < k:
+            best = max(range(len(candidates)), key=lambda j: (
+                self._adjusted(candidates[j], source_counts, category_counts), -candidates[j][1]))
+            _, _, article = candidates.pop(best)
+            selected.append(article)
+            source = article.get('source')
+            category = primary_category(article)
+            source_counts[source] = source_counts.get(source, 0) + 1
+            category_counts[category] = category_counts.get(category, 0) + 1
+        return selected
+    
+    def _adjusted(self, candidate, source_counts, category_counts):
+        """扣除多样性惩罚后的得分"""
+        score, _, article = candidate
+        penalty = source_counts.get(article.get('source'), 0)
+        penalty += 0.5 * category_counts.get(primary_category(article), 0)
+        return score - self.diversity_penalty * penalty
+
+def main():
+    """主函数：输出处理结果文件中排名靠前的文章"""
+    parser = argparse.ArgumentParser(description='按综合排名输出文章')
+    parser.add_argument('input', help='处理后的文章文件（processed_articles_*.json）')
+    parser.add_argument('--top', type=int, default=5, help='输出前几篇')
+    parser.add_argument('--config', default='feeds_config.json', help='RSS源配置（读取来源优先级）')
+    parser.add_argument('--json', action='store_true', help='输出JSON')
+    args = parser.parse_args()
+    
+    ranker = ArticleRanker(source_priorities=load_source_priorities(args.config))
+    articles = load_run_file(args.input).get('articles', [])
+    top_articles = ranker.top_k(articles, args.top)
+    
+    if args.json:
+        print(json.dumps([
+            {'title': a.get('title'), 'link': a.get('link'), 'source': a.get('source'),
+             'ai_score': a.get('ai_score'), 'rank_score': round(ranker.score(a), 3)}
+            for a in top_articles
+        ], ensure_ascii=False, indent=2))
+        return
+    for i, article in enumerate(top_articles, 1):
+        print(f"{i}. [{ranker.score(article):.2f}] {article.get('title', '')} - {article.get('source', '')}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# relevance_scorer.py
+# TF-IDF相关度评分（主题词、文档频率和分数尺度来自分类规则文件）
+
+import argparse
+import json
+import math
+
+try:
+    import numpy as np
+except ImportError:  # 没有NumPy时使用纯Python实现，结果相同
+    np = None
+
+from blob_store import load_run_file
+from html_text import html_to_text
+from keyword_matcher import KeywordMatcher
+
+# 分类规则文件中相关度评分配置的键
+RELEVANCE_KEY = 'relevance'
+
+# 校准时把该分位数的原始得分定为满分
+FULL_SCORE_QUANTILE = 0.99
+
+def ai_keywords(rules_config):
+    """AI规则组中的关键词（正则规则项不参与相关度评分）"""
+    keywords = []
+    for item in rules_config.get('ai', {}).get('terms', []):
+        if isinstance(item, str):
+            keywords.append(item)
+        elif isinstance(item, dict) and item.get('keyword'):
+            keywords.append(item['keyword'])
+    return keywords
+
+def article_document(article):
+    """参与相关度评分的 (标题, 正文)：处理后的摘要，没有时用原摘要的纯文本"""
+    return article.get('title', ''), article.get('processed_summary') or html_to_text(article.get('summary', ''))
+
+class RelevanceScorer:
+    """AI主题相关度评分器（TF-IDF）
+    
+    一批文章先扫描成稀疏的文档-词矩阵（COO三元组：文档、词、词频），
+    再整体计算 Σ 主题权重 × (1 + ln 词频) × IDF，按文本长度归一后线性映射到0-10分，
+    原始得分达到 full_score 即为10分。IDF由规则文件中保存的语料文档频率计算，
+    不随同批的其他文章变化，同一篇文章单独评分和成批评分得分相同。英文主题词按整词匹配。
+    安装了NumPy时矩阵运算向量化完成，否则退回等价的纯Python实现。
+    """
+    
+    def __init__(self, weights, document_frequency=None, documents=0, title_weight=2.0, full_score=10.0):
+        """初始化评分器
+        
+        参数:
+            weights: {主题词: 权重}
+            document_frequency: {主题词: 语料中包含该词的文档数}（没有时所有词的IDF相同）
+            documents: 语料的文档数
+            title_weight: 标题中出现的词频倍数
+            full_score: 记为10分的原始得分，更高的得分同样为10分
+        """
+        self.weights = dict(weights)
+        self.title_weight = title_weight
+        self.full_score = full_score
+        self.term_index = {}
+        self.term_weights = []
+        for term, weight in self.weights.items():
+            key = term.lower()
+            if key not in self.term_index:
+                self.term_index[key] = len(self.term_weights)
+                self.term_weights.append(weight)
+        frequencies = {term.lower(): count for term, count in (document_frequency or {}).items()}
+        self.idf = [math.log((1 + documents) / (1 + frequencies.get(term, 0))) + 1 for term in self.term_index]
+        self.matcher = KeywordMatcher({'topic': list(self.term_index)}).build()
+    
+    @classmethod
+    def from_rules(cls, rules_config):
+        """由分类规则配置构建；没有相关度配置时以AI规则组的关键词为主题词（权重均为1）"""
+        config = rules_config.get(RELEVANCE_KEY) or {}
+        weights = config.get('topic_weights') or {keyword: 1.0 for keyword in ai_keywords(rules_config)}
+        return cls(weights, config.get('document_frequency'), config.get('documents', 0),
+                   config.get('title_weight', 2.0), config.get('full_score', 10.0))
+    
+    def document_terms(self, documents):
+        """把 (标题, 正文) 列表扫描成COO三元组和文档长度
+        
+        返回:
+            tuple: (文档下标列表, 词下标列表, 加权词频列表, 文档字符数列表)
+        """
+        rows, cols, counts, lengths = [], [], [], []
+        for row, (title, body) in enumerate(documents):
+            frequencies = {}
+            for term, count in self.matcher.count(title, word_boundary=True).items():
+                frequencies[term] = count * self.title_weight
+            for term, count in self.matcher.count(body, word_boundary=True).items():
+                frequencies[term] = frequencies.get(term, 0) + count
+            for term, frequency in frequencies.items():
+                rows.append(row)
+                cols.append(self.term_index[term])
+                counts.append(frequency)
+            lengths.append(len(title) + len(body))
+        return rows, cols, counts, lengths
+    
+    def raw_scores(self, documents):
+        """一批 (标题, 正文) 按长度归一后的原始得分"""
+        documents = list(documents)
+        if not documents:
+            return []
+        rows, cols, counts, lengths = self.document_terms(documents)
+        if np is not None:
+            return self._raw_numpy(len(documents), rows, cols, counts, lengths)
+        return self._raw_python(len(documents), rows, cols, counts, lengths)
+    
+    def score(self, documents):
+        """为一批 (标题, 正文) 评分，返回0-10分的列表（保留一位小数）"""
+        return [round(min(10.0, 10 * raw / self.full_score), 1) for raw in self.raw_scores(documents)]
+    
+    def _raw_numpy(self, n_docs, rows, cols, counts, lengths):
+        cols = np.asarray(cols, dtype=np.int64)
+        counts = np.asarray(counts, dtype=np.float64)
+        contributions = np.asarray(self.term_weights)[cols] * (1 + np.log(counts)) * np.asarray(self.idf)[cols]
+        raw = np.bincount(np.asarray(rows, dtype=np.int64), weights=contributions, minlength=n_docs)
+        raw /= 1 + np.log1p(np.asarray(lengths, dtype=np.float64) / 500)
+        return raw.tolist()
+    
+    def _raw_python(self, n_docs, rows, cols, counts, lengths):
+        raw = [0.0] * n_docs
+        for row, col, count in zip(rows, cols, counts):
+            raw[row] += self.term_weights[col] * (1 + math.log(count)) * self.idf[col]
+        return [value / (1 + math.log1p(length / 500)) for value, length in zip(raw, lengths)]
+
+def calibrate(documents, weights, title_weight=2.0, quantile=FULL_SCORE_QUANTILE):
+    """由语料计算相关度评分配置（写入分类规则文件的 relevance 项）
+    
+    参数:
+        documents: 语料的 (标题, 正文) 列表
+        weights: {主题词: 权重}
+        quantile: 以该分位数的原始得分作为满分
+    """
+    documents = list(documents)
+    scorer = RelevanceScorer(weights, title_weight=title_weight)
+    _, cols, _, _ = scorer.document_terms(documents)
+    document_frequency = {term: 0 for term in scorer.term_index}
+    terms = list(scorer.term_index)
+    for col in cols:
+        document_frequency[terms[col]] += 1
+    
+    # 原文大小写的主题词 -> 文档数（未出现的词省略，按0计）
+    frequencies = {term: document_frequency[term.lower()] for term in weights if document_frequency[term.lower()]}
+    raw = sorted(RelevanceScorer(weights, frequencies, len(documents), title_weight).raw_scores(documents))
+    full_score = raw[int(quantile * (len(raw) - 1))] if raw else 10.0
+    return {
+        'title_weight': title_weight,
+        'full_score': round(full_score, 2) or 10.0,
+        'documents': len(documents),
+        'topic_weights': dict(weights),
+        'document_frequency': frequencies
+    }
+
+def main():
+    """主函数：用已处理的文章重新校准规则文件中的相关度评分配置，输出新的 relevance 项"""
+    parser = argparse.ArgumentParser(description='校准AI相关度评分的文档频率和满分尺度')
+    parser.add_argument('files', nargs='+', help='processed_articles_*.json')
+    parser.add_argument('--rules', default='classification_rules.json', help='分类规则文件（读取主题词和标题倍数）')
+    args = parser.parse_args()
+    
+    with open(args.rules, 'r', encoding='utf-8') as f:
+        rules_config = json.load(f)
+    config = rules_config.get(RELEVANCE_KEY) or {}
+    weights = config.get('topic_weights') or {keyword: 1.0 for keyword in ai_keywords(rules_config)}
+    
+    # 同一篇文章出现在多个运行文件中时只计一次
+    articles = {}
+    for input_file in args.files:
+        for article in load_run_file(input_file).get('articles', []):
+            articles.setdefault(article.get('link') or article.get('title'), article)
+    documents = [article_document(article) for article in articles.values()]
+    
+    print(json.dumps({RELEVANCE_KEY: calibrate(documents, weights, config.get('title_weight', 2.0))},
+                     ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -2,223 +2,60 @@
 # report_generator.py
 # AI技术动态报告生成器
 
-import json
-from datetime import datetime
+from datetime import date as calendar_date, datetime
+import io
 import os
 
+from blob_store import load_run_file
+from daily_report import DailyReportState, state_path
+from html_archive import HtmlArchiveWriter
+from ranking import ArticleRanker
+from report_model import ReportDocument, ReportRenderer
+from report_templates import TEMPLATES_DIR, FragmentCache
+
 class AITechReportGenerator:
     """AI技术动态报告生成器"""
     
-    def __init__(self):
-        """初始化生成器"""
-        pass
+    def __init__(self, ranker=None, templates_dir=TEMPLATES_DIR, fragment_cache=None):
+        """初始化生成器
+        
+        参数:
+            ranker: 选择推荐文章的 ArticleRanker（默认不区分来源优先级）
+            templates_dir: 报告模板目录（templates/markdown、templates/html）
+            fragment_cache: 分类片段缓存，两种格式共用（默认新建）
+        """
+        self.ranker = ranker or ArticleRanker()
+        self.fragment_cache = fragment_cache if fragment_cache is not None else FragmentCache()
+        self.renderers = {
+            kind: ReportRenderer(kind, templates_dir, self.fragment_cache)
+            for kind in ('markdown', 'html')
+        }
+    
+    def build_document(self, articles, date=None):
+        """一次遍历文章，构建Markdown和HTML共用的报告文档"""
+        return ReportDocument.build(articles, self.ranker, date)
     
     def generate_markdown_report(self, articles, date=None):
         """生成Markdown格式报告"""
-        if not date:
-            date = datetime.now().strftime('%Y年%m月%d日')
-        
-        report_time = datetime.now().strftime('%H:%M')
-        
-        # 统计信息
-        total_articles = len(articles)
-        
-        # 按分类统计
-        category_stats = {}
-        for article in articles:
-            for category in article.get('categories', []):
-                category_stats[category] = category_stats.get(category, 0) + 1
-        
-        # 生成报告
-        report = f"""# 🤖 AI技术动态日报
-
-## 📅 报告信息
-- **报告日期**: {date}
-- **生成时间**: {report_time}
-- **文章总数**: {total_articles}篇
-- **数据来源**: RSS订阅 + AI过滤
-
-## 📊 今日概览
-
-### 分类分布
-"""
-        
-        # 添加分类统计
-        for category, count in sorted(category_stats.items(), key=lambda x: x[1], reverse=True):
-            percentage = (count / total_articles * 100) if total_articles > 0 else 0
-            report += f"- **{category}**: {count}篇 ({percentage:.1f}%)\n"
-        
-        report += f"""
-### 高质量文章推荐
-基于AI相关度评分，推荐以下高质量文章：
-"""
-        
-        # 按AI评分排序，取前5篇
-        sorted_articles = sorted(articles, key=lambda x: x.get('ai_score', 0), reverse=True)
-        top_articles = sorted_articles[:5]
-        
-        for i, article in enumerate(top_articles, 1):
-            report += f"""
-#### {i}. {article['title']}
-
-**来源**: {article['source']}  
-**分类**: {', '.join(article.get('categories', ['其他']))}  
-**AI相关度**: {article.get('ai_score', 0)}/10  
-**发布时间**: {article.get('published', '未知')}
-
-**摘要**: {article.get('processed_summary', article.get('summary', '暂无摘要'))}
-
-[阅读原文]({article['link']})
-
----
-"""
-        
-        report += """
-## 📰 全部文章列表
-
-按分类组织：
-"""
-        
-        # 按分类组织文章
-        articles_by_category = {}
-        for article in articles:
-            categories = article.get('categories', ['其他'])
-            primary_category = categories[0] if categories else '其他'
-            
-            if primary_category not in articles_by_category:
-                articles_by_category[primary_category] = []
-            articles_by_category[primary_category].append(article)
-        
-        # 按分类输出文章
-        for category, cat_articles in sorted(articles_by_category.items()):
-            report += f"\n### {category} ({len(cat_articles)}篇)\n\n"
-            
-            for i, article in enumerate(cat_articles, 1):
-                # 简化显示
-                title = article['title']
-                if len(title) > 60:
-                    title = title[:57] + "..."
-                
-                source = article['source']
-                ai_score = article.get('ai_score', 0)
-                
-                report += f"{i}. **{title}** - {source} (AI:{ai_score}/10)  \n"
-                report += f"   [{article['link'][:50]}...]({article['link']})\n\n"
-        
-        report += f"""
-## 📈 今日总结
-
-今日共收集到 **{total_articles}** 篇AI技术相关文章，涵盖{len(category_stats)}个分类。
-
-### 重点关注：
-"""
-        
-        # 找出最多的分类
-        if category_stats:
-            top_category = max(category_stats.items(), key=lambda x: x[1])
-            report += f"1. **{top_category[0]}** 领域最为活跃，共有{top_category[1]}篇文章\n"
-        
-        # 找出AI评分最高的文章
-        if articles:
-            top_ai_article = max(articles, key=lambda x: x.get('ai_score', 0))
-            report += f"2. **AI相关度最高**的文章是：{top_ai_article['title'][:40]}... (评分:{top_ai_article.get('ai_score', 0)}/10)\n"
-        
-        report += f"""
-### 明日预告
-明天将继续为您收集最新的AI技术动态，重点关注技术突破和行业应用。
-
----
-*报告由MOSS AI技术动态收集系统自动生成*  
-*生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*
-"""
-        
-        return report
+        out = io.StringIO()
+        self.renderers['markdown'].render(self.build_document(articles, date), out)
+        return out.getvalue()
     
     def generate_html_report(self, articles, date=None):
-        """生成HTML格式报告（简化版）"""
-        markdown_report = self.generate_markdown_report(articles, date)
-        
-        # 简单的Markdown转HTML
-        html_report = f"""<!DOCTYPE html>
-<html lang="zh-CN">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>AI技术动态日报 - {date if date else datetime.now().strftime('%Y年%m月%d日')}</title>
-    <style>
-        body {{ font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; line-height: 1.6; max-width: 800px; margin: 0 auto; padding: 20px; }}
-        h1 {{ color: #333; border-bottom: 2px solid #4CAF50; padding-bottom: 10px; }}
-        h2 {{ color: #555; margin-top: 30px; }}
-        h3 {{ color: #666; }}
-        .article {{ margin: 20px 0; padding: 15px; background: #f9f9f9; border-left: 4px solid #4CAF50; }}
-        .stats {{ background: #e8f5e9; padding: 15px; border-radius: 5px; margin: 20px 0; }}
-        a {{ color: #2196F3; text-decoration: none; }}
-        a:hover {{ text-decoration: underline; }}
-        .footer {{ margin-top: 40px; padding-top: 20px; border-top: 1px solid #ddd; color: #777; font-size: 0.9em; }}
-    </style>
-</head>
-<body>
-"""
-        
-        # 简单的Markdown转HTML转换
-        lines = markdown_report.split('\n')
-        in_list = False
-        
-        for line in lines:
-            if line.startswith('# '):
-                html_report += f'<h1>{line[2:]}</h1>\n'
-            elif line.startswith('## '):
-                html_report += f'<h2>{line[3:]}</h2>\n'
-            elif line.startswith('### '):
-                html_report += f'<h3>{line[4:]}</h3>\n'
-            elif line.startswith('- '):
-                if not in_list:
-                    html_report += '<ul>\n'
-                    in_list = True
-                html_report += f'<li>{line[2:]}</li>\n'
-            elif line.strip() == '' and in_list:
-                html_report += '</ul>\n'
-                in_list = False
-            elif line.startswith('   '):
-                html_report += f'<p style="margin-left: 20px;">{line.strip()}</p>\n'
-            elif line.startswith('**') and line.endswith('**'):
-                content = line[2:-2]
-                html_report += f'<p><strong>{content}</strong></p>\n'
-            elif line.startswith('[') and '](' in line:
-                # 链接处理
-                import re
-                link_pattern = r'\[([^\]]+)\]\(([^)]+)\)'
-                matches = re.findall(link_pattern, line)
-                if matches:
-                    for text, url in matches:
-                        line = line.replace(f'[{text}]({url})', f'<a href="{url}">{text}</a>')
-                    html_report += f'<p>{line}</p>\n'
-                else:
-                    html_report += f'<p>{line}</p>\n'
-            elif line.strip():
-                html_report += f'<p>{line}</p>\n'
-            else:
-                html_report += '<br>\n'
-        
-        if in_list:
-            html_report += '</ul>\n'
-        
-        html_report += f"""
-    <div class="footer">
-        <p>报告由MOSS AI技术动态收集系统自动生成</p>
-        <p>生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
-    </div>
-</body>
-</html>"""
-        
-        return html_report
+        """生成HTML格式报告"""
+        out = io.StringIO()
+        self.renderers['html'].render(self.build_document(articles, date), out)
+        return out.getvalue()
     
-    def save_report(self, report, report_type='markdown', date=None):
-        """保存报告到文件"""
+    def report_path(self, report_type='markdown', date=None, daily=False):
+        """报告文件路径：../reports/<类型>/ai_report_<日期>_<时间>.<扩展名>
+        
+        daily 为 True 时每天只有一个文件 ai_report_<日期>.<扩展名>
+        """
         if not date:
             date = datetime.now().strftime('%Y%m%d')
         
-        timestamp = datetime.now().strftime('%H%M%S')
+        suffix = '' if daily else '_' + datetime.now().strftime('%H%M%S')
         
         # 确定文件扩展名
         if report_type == 'markdown':
@@ -235,12 +72,25 @@ class AITechReportGenerator:
         report_dir = f"../reports/{subdir}"
         os.makedirs(report_dir, exist_ok=True)
         
-        # 生成文件名
-        filename = f"{report_dir}/ai_report_{date}_{timestamp}.{ext}"
+        return f"{report_dir}/ai_report_{date}{suffix}.{ext}"
+    
+    def save_report(self, report, report_type='markdown', date=None, daily=False):
+        """保存报告到文件（先写临时文件再替换，读者不会看到写了一半的报告）
+        
+        参数:
+            report: 报告文本，或 render(out) 函数（直接流式写入文件）
+            daily: 写入当天唯一的报告文件（覆盖之前的版本）
+        """
+        filename = self.report_path(report_type, date, daily)
         
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                f.write(report)
+            tmp_file = f"{filename}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                if callable(report):
+                    report(f)
+                else:
+                    f.write(report)
+            os.replace(tmp_file, filename)
             
             print(f"💾 报告已保存: {filename}")
             return filename
@@ -249,27 +99,95 @@ class AITechReportGenerator:
             print(f"❌ 保存报告失败: {e}")
             return None
     
-    def generate_and_save(self, articles, date=None):
-        """生成并保存报告"""
-        print("📝 生成AI技术动态报告...")
+    def archive_dir(self, date=None):
+        """分页HTML报告目录：../reports/archive/<日期>/"""
+        if not date:
+            date = datetime.now().strftime('%Y%m%d')
+        return f"../reports/archive/{date}"
+    
+    def save_html_archive(self, document, date=None):
+        """保存分页、按需加载的HTML报告（同一天的旧版本被整体替换）"""
+        directory = self.archive_dir(date)
+        try:
+            os.makedirs(os.path.dirname(directory), exist_ok=True)
+            filename = HtmlArchiveWriter(self.renderers['html']).write(document, directory)
+            print(f"💾 分页报告已保存: {filename}")
+            return filename
+        except Exception as e:
+            print(f"❌ 保存分页报告失败: {e}")
+            return None
+    
+    def generate_and_save(self, articles, date=None, archive=False):
+        """生成并保存报告：文档只构建一次，两种格式直接流式写入各自的文件
         
-        # 生成Markdown报告
-        markdown_report = self.generate_markdown_report(articles, date)
-        md_file = self.save_report(markdown_report, 'markdown', date)
+        参数:
+            archive: 同时生成分页、按需加载的HTML报告（适合文章很多的时候）
+        """
+        print("📝 生成AI技术动态报告...")
         
-        # 生成HTML报告
-        html_report = self.generate_html_report(articles, date)
-        html_file = self.save_report(html_report, 'html', date)
+        document = self.build_document(articles, date)
+        md_file = self.save_report(lambda out: self.renderers['markdown'].render(document, out), 'markdown', date)
+        html_file = self.save_report(lambda out: self.renderers['html'].render(document, out), 'html', date)
+        archive_file = self.save_html_archive(document, date) if archive else None
         
         print(f"✅ 报告生成完成!")
         print(f"   Markdown: {md_file}")
         print(f"   HTML: {html_file}")
+        if archive:
+            print(f"   分页HTML: {archive_file}")
+        
+        return {
+            'markdown': md_file,
+            'html': html_file,
+            'archive': archive_file,
+            'report_date': document.date,
+            'article_count': document.total
+        }
+    
+    def update_daily_report(self, articles, day=None, state_dir='data/reports', archive=False):
+        """增量更新当天的报告
+        
+        每天只保留一份报告（ai_report_<日期>.md/.html）和它的状态文件。新文章合并进
+        状态后更新统计和推荐文章，再由状态中的文章、统计和分组重新渲染，最后原子地覆盖报告文件。
+        
+        参数:
+            articles: 本次运行处理后的文章（已收录的文章会被跳过）
+            day: 报告日期（默认今天）
+            state_dir: 报告状态目录
+            archive: 同时更新当天的分页HTML报告
+        """
+        day = day or calendar_date.today()
+        date_tag = day.strftime('%Y%m%d')
+        path = state_path(day, state_dir)
+        state = DailyReportState.load(path, day)
+        added = state.merge(articles)
+        
+        report_files = {kind: self.report_path(kind, date_tag, daily=True) for kind in self.renderers}
+        if archive:
+            report_files['archive'] = os.path.join(self.archive_dir(date_tag), 'index.html')
+        if not added and all(os.path.exists(f) for f in report_files.values()):
+            print(f"ℹ️ 没有新文章，当天报告无需更新 ({len(state.articles)}篇)")
+            return dict(report_files, report_date=day.strftime('%Y年%m月%d日'), article_count=len(state.articles), new_articles=0)
+        
+        print(f"📝 更新当天报告: 新增 {added} 篇，共 {len(state.articles)} 篇")
+        document = state.document(self.ranker)
+        md_file = self.save_report(lambda out: self.renderers['markdown'].render(document, out), 'markdown', date_tag, daily=True)
+        html_file = self.save_report(lambda out: self.renderers['html'].render(document, out), 'html', date_tag, daily=True)
+        archive_file = self.save_html_archive(document, date_tag) if archive else None
+        if not md_file or not html_file or (archive and not archive_file):
+            # 报告没有写成功时不保存状态，下次运行会重新合并这些文章
+            return None
+        
+        # 报告文件写入后再保存状态
+        state.save(path)
         
         return {
             'markdown': md_file,
             'html': html_file,
-            'report_date': date if date else datetime.now().strftime('%Y年%m月%d日'),
-            'article_count': len(articles)
+            'archive': archive_file,
+            'report_date': document.date,
+            'article_count': document.total,
+            'new_articles': added
         }
 
 def main():
@@ -288,9 +206,8 @@ def main():
     
     try:
         # 加载处理后的文章
-        with open(test_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            articles = data.get('articles', [])
+        data = load_run_file(test_file)
+        articles = data.get('articles', [])
         
         print(f"📂 加载文章: {len(articles)}篇")
         
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# report_model.py
+# 报告文档模型：一次构建，经预编译模板流式渲染为Markdown和HTML
+
+from datetime import datetime
+
+from report_templates import TEMPLATES_DIR, FragmentCache, load_templates
+
+# 推荐文章数
+TOP_ARTICLES = 5
+
+class ReportDocument:
+    """报告的中间文档
+    
+    一次遍历文章就得到分类统计、按主分类分组的文章和综合排名前几的推荐文章，
+    Markdown和HTML渲染器都只读取这个文档，不再各自遍历或重新解析报告。
+    """
+    
+    def __init__(self, date, generated_at, total, category_stats, top_articles, sections):
+        self.date = date
+        self.generated_at = generated_at
+        self.total = total
+        self.category_stats = category_stats
+        self.top_articles = top_articles
+        self.sections = sections
+    
+    @classmethod
+    def build(cls, articles, ranker, date=None, now=None, top_n=TOP_ARTICLES):
+        """由文章构建文档（articles 可以是任意可迭代对象，只遍历一次）
+        
+        参数:
+            ranker: 选择推荐文章的 ArticleRanker
+            date: 报告日期文字（默认今天）
+            now: 生成时间（默认当前时间）
+        """
+        now = now or datetime.now()
+        category_stats = {}
+        sections = {}
+        total = 0
+        
+        def scan():
+            # 排序器消费文章的同时完成统计和分组
+            nonlocal total
+            for article in articles:
+                total += 1
+                for category in article.get('categories', []):
+                    category_stats[category] = category_stats.get(category, 0) + 1
+                sections.setdefault(primary_category(article), []).append(article)
+                yield article
+        
+        top_articles = ranker.top_k(scan(), top_n)
+        return cls(
+            date=date or now.strftime('%Y年%m月%d日'),
+            generated_at=now,
+            total=total,
+            category_stats=sorted(category_stats.items(), key=lambda item: item[1], reverse=True),
+            top_articles=top_articles,
+            sections=sorted(sections.items())
+        )
+    
+    @property
+    def top_category(self):
+        """文章最多的分类 (分类, 篇数)，没有分类时为None"""
+        return self.category_stats[0] if self.category_stats else None
+    
+    @property
+    def top_article(self):
+        """综合排名第一的文章"""
+        return self.top_articles[0] if self.top_articles else None
+    
+    def percentage(self, count):
+        """分类占文章总数的百分比"""
+        return count / self.total * 100 if self.total > 0 else 0
+
+def primary_category(article):
+    """文章的主分类（第一个分类）"""
+    categories = article.get('categories', ['其他'])
+    return categories[0] if categories else '其他'
+
+def article_fields(article):
+    """渲染文章卡片所需的字段（两种格式共用同一套缺省值）"""
+    return {
+        'title': article['title'],
+        'source': article['source'],
+        'categories': ', '.join(article.get('categories', ['其他'])),
+        'ai_score': article.get('ai_score', 0),
+        'published': article.get('published', '未知'),
+        'summary': article.get('processed_summary', article.get('summary', '暂无摘要')),
+        'link': article['link'],
+        'alternates': article.get('alternate_sources', [])
+    }
+
+def list_fields(article):
+    """全部文章列表中一行所需的字段（标题截断，转载来源合并计数）"""
+    title = article['title']
+    if len(title) > 60:
+        title = title[:57] + "..."
+    source = article['source']
+    alternates = article.get('alternate_sources', [])
+    if alternates:
+        source += f" 等{len(alternates) + 1}个来源"
+    return {'title': title, 'source': source, 'ai_score': article.get('ai_score', 0), 'link': article['link']}
+
+def list_key(article):
+    """决定列表行内容的字段值（与 list_fields 用到的字段一致），用于分类片段的缓存键"""
+    return (article['link'], article['title'], article['source'], article.get('ai_score', 0),
+            len(article.get('alternate_sources', [])))
+
+class ReportRenderer:
+    """基于预编译模板的报告渲染器
+    
+    模板每个进程只编译一次；全部文章列表按分类整段经片段缓存渲染，缓存键由模板版本、
+    分类和各篇文章的列表字段组成。新到几篇文章后重新渲染报告时，没有新文章的分类
+    直接复用，只有收到新文章的分类需要重新渲染。
+    """
+    
+    def __init__(self, kind='markdown', templates_dir=TEMPLATES_DIR, fragment_cache=None):
+        """初始化渲染器
+        
+        参数:
+            kind: 'markdown' 或 'html'
+            templates_dir: 模板目录（默认项目下的 templates/）
+            fragment_cache: 共享的 FragmentCache（默认新建）
+        """
+        self.kind = kind
+        self.templates = load_templates(kind, templates_dir)
+        self.fragment_cache = fragment_cache if fragment_cache is not None else FragmentCache()
+    
+    def render(self, document, out):
+        """把文档逐段写入 out（文件或 io.StringIO）"""
+        self.templates['report'].render_to(out.write, {
+            'date': document.date,
+            'time': document.generated_at.strftime('%H:%M'),
+            'total': document.total,
+            'category_stats': self.iter_category_stats(document),
+            'top_articles': (self.article_card(i, article) for i, article in enumerate(document.top_articles, 1)),
+            'sections': self.iter_sections(document),
+            'category_count': len(document.category_stats),
+            'highlights': self.iter_highlights(document),
+            'generated_at': document.generated_at.strftime('%Y-%m-%d %H:%M:%S')
+        })
+    
+    def iter_category_stats(self, document):
+        """分类分布的各行"""
+        template = self.templates['category_stat']
+        for category, count in document.category_stats:
+            yield template.render({
+                'category': category,
+                'count': count,
+                'percentage': f"{document.percentage(count):.1f}"
+            })
+    
+    def article_card(self, index, article):
+        """推荐文章卡片"""
+        fields = article_fields(article)
+        alternates = ''
+        if fields['alternates']:
+            link_template = self.templates['alternate_link']
+            links = ' | '.join(link_template.render({'source': alt['source'], 'link': alt['link']})
+                               for alt in fields['alternates'])
+            alternates = self.templates['alternates'].render({'links': links})
+        fields.update(index=index, published=str(fields['published']), alternates=alternates)
+        return self.templates['article_card'].render(fields)
+    
+    def iter_sections(self, document):
+        """按分类组织的全部文章列表（每个分类整段经片段缓存）"""
+        template = self.templates['section']
+        version = (template.version, self.templates['article_item'].version)
+        self.fragment_cache.reserve(len(document.sections))
+        for category, articles in document.sections:
+            key = (version, category, tuple(list_key(article) for article in articles))
+            items = (self.article_item(i, article) for i, article in enumerate(articles, 1))
+            yield self.fragment_cache.render(key, template,
+                                             {'category': category, 'count': len(articles), 'items': items})
+    
+    def article_item(self, index, article):
+        """文章列表中的一行"""
+        fields = list_fields(article)
+        fields.update(index=index, link_short=fields['link'][:50])
+        return self.templates['article_item'].render(fields)
+    
+    def iter_highlights(self, document):
+        """总结中的重点关注"""
+        if document.top_category:
+            category, count = document.top_category
+            yield self.templates['highlight_category'].render({'category': category, 'count': count})
+        if document.top_article:
+            article = document.top_article
+            yield self.templates['highlight_article'].render({
+                'title': article['title'][:40],
+                'ai_score': article.get('ai_score', 0)
+            })
+
+# 每个进程的默认渲染器（模板和片段缓存在多次渲染之间复用）
+_default_renderers = {}
+
+def default_renderer(kind):
+    """某种格式的默认渲染器"""
+    if kind not in _default_renderers:
+        _default_renderers[kind] = ReportRenderer(kind)
+    return _default_renderers[kind]
+
+def render_markdown(document, out):
+    """把文档以Markdown格式逐段写入 out（文件或 io.StringIO）"""
+    default_renderer('markdown').render(document, out)
+
+def render_html(document, out):
+    """把文档以HTML格式逐段写入 out（文本内容全部转义）"""
+    default_renderer('html').render(document, out)
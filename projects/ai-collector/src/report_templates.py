@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# report_templates.py
+# 报告模板：加载时编译一次，整段渲染结果按片段缓存
+
+from collections import OrderedDict
+import hashlib
+import os
+import re
+from html import escape
+
+# 模板目录：templates/<格式>/<模板名>.<扩展名>
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'templates')
+
+# 各格式的模板子目录和是否自动转义
+TEMPLATE_KINDS = {
+    'markdown': {'extension': '.md', 'autoescape': False},
+    'html': {'extension': '.html', 'autoescape': True},
+    'site': {'extension': '.html', 'autoescape': True}
+}
+
+# 占位符 {{ 字段 }} 或 {{ 字段|raw }}（raw表示不转义，用于已渲染的片段）
+PLACEHOLDER_PATTERN = re.compile(r'\{\{\s*(\w+)(?:\|(raw))?\s*\}\}')
+
+class CompiledTemplate:
+    """编译后的模板
+    
+    编译时把模板拆成文字段和占位符，渲染时只按顺序写出，不再解析模板文本。
+    字段值可以是字符串或数字，也可以是字符串的可迭代对象（逐段写出，不转义）。
+    """
+    
+    def __init__(self, name, source, autoescape=False):
+        """编译模板"""
+        self.name = name
+        self.version = hashlib.sha256(source.encode('utf-8')).hexdigest()[:12]
+        self.autoescape = autoescape
+        
+        # (是否为占位符, 文字或字段名, 是否转义)
+        self.parts = []
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(source):
+            if match.start() > position:
+                self.parts.append((False, source[position:match.start()], False))
+            self.parts.append((True, match.group(1), autoescape and not match.group(2)))
+            position = match.end()
+        if position < len(source):
+            self.parts.append((False, source[position:], False))
+    
+    def iter_render(self, values):
+        """按顺序逐段产出渲染结果（可迭代字段在轮到它时才被消费）"""
+        for is_field, text, escaped in self.parts:
+            if not is_field:
+                yield text
+                continue
+            try:
+                value = values[text]
+            except KeyError:
+                raise KeyError(f"模板 {self.name} 缺少字段 {text}")
+            if isinstance(value, (str, int, float)):
+                value = str(value)
+                yield escape(value) if escaped else value
+            else:
+                yield from value
+    
+    def render_to(self, write, values):
+        """把模板逐段写入 write"""
+        for piece in self.iter_render(values):
+            write(piece)
+    
+    def render(self, values):
+        """渲染为字符串"""
+        return ''.join(self.iter_render(values))
+
+class TemplateSet:
+    """一种输出格式的全部模板"""
+    
+    def __init__(self, kind, directory=TEMPLATES_DIR):
+        """读取并编译 directory/<kind>/ 下的所有模板"""
+        if kind not in TEMPLATE_KINDS:
+            raise ValueError(f"未知的模板格式: {kind}")
+        options = TEMPLATE_KINDS[kind]
+        self.kind = kind
+        self.templates = {}
+        template_dir = os.path.join(directory, kind)
+        for filename in sorted(os.listdir(template_dir)):
+            name, extension = os.path.splitext(filename)
+            if extension != options['extension']:
+                continue
+            with open(os.path.join(template_dir, filename), 'r', encoding='utf-8', newline='') as f:
+                self.templates[name] = CompiledTemplate(name, f.read(), options['autoescape'])
+        self.version = hashlib.sha256(
+            ''.join(f"{name}:{template.version}" for name, template in self.templates.items()).encode('utf-8')
+        ).hexdigest()[:12]
+    
+    def __getitem__(self, name):
+        return self.templates[name]
+
+# 每个进程只加载、编译一次
+_template_sets = {}
+
+def load_templates(kind, directory=TEMPLATES_DIR):
+    """获取某种格式的模板（同一进程内复用已编译的结果）"""
+    key = (os.path.abspath(directory), kind)
+    if key not in _template_sets:
+        _template_sets[key] = TemplateSet(kind, directory)
+    return _template_sets[key]
+
+class FragmentCache:
+    """渲染片段缓存（LRU）
+    
+    键由调用方给出：模板版本加上决定片段内容的字段值组成的元组，查找时只计算元组的哈希，
+    不做序列化。字段和模板都没有变化时直接复用之前渲染的片段；修改模板后版本变化，
+    旧片段自然不再命中。只缓存整段内容（如报告中的一个分类），逐篇文章的小片段
+    直接渲染比计算缓存键更快。
+    """
+    
+    def __init__(self, max_entries=256):
+        """初始化空缓存"""
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def reserve(self, count):
+        """保证至少能容纳 count 个片段（渲染前按文档的段数调用，同一次渲染的片段不会互相挤出）"""
+        self.max_entries = max(self.max_entries, count)
+    
+    def render(self, key, template, values):
+        """渲染片段，命中缓存时直接返回（values 中的可迭代字段只在未命中时才被消费）
+        
+        参数:
+            key: 片段键，应包含 template.version 和决定片段内容的全部字段值
+        """
+        fragment = self.entries.get(key)
+        if fragment is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return fragment
+        
+        self.misses += 1
+        fragment = template.render(values)
+        self.entries[key] = fragment
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return fragment
+    
+    def __len__(self):
+        return len(self.entries)
@@ -4,17 +4,79 @@
 
 import feedparser
 import time
-from datetime import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from urllib.parse import urlparse
 import json
 import os
+import xml.etree.ElementTree as ET
+
+from feed_fetcher import FeedFetcher
+from http_cache import FeedHTTPCache
+from seen_index import SeenArticleIndex
+from feed_scheduler import FeedScheduler
+from circuit_breaker import FeedCircuitBreaker, CircuitOpenError
+from blob_store import save_run_file
+from stream_parser import StreamingFeedParser, parse_date
+from stats_aggregator import StatsAggregator
+
+class HostRateLimiter:
+    """按主机限速：同一主机的两次请求之间至少间隔 delay 秒"""
+    
+    def __init__(self, delay=1.0):
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._next_slot = {}
+    
+    def wait(self, url):
+        """为该URL所在主机预约下一个请求时间片，必要时等待"""
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, 0))
+            self._next_slot[host] = slot + self.delay
+        
+        # 在锁外等待，不阻塞其他主机的请求
+        if slot > now:
+            time.sleep(slot - now)
 
 class AITechRSSCollector:
     """AI技术动态RSS收集器"""
     
-    def __init__(self, config_file=None):
-        """初始化收集器"""
+    def __init__(self, config_file=None, max_workers=8, host_delay=1.0, http_cache_file=None,
+                 seen_index_file='data/seen_articles.db', stream_parse=False, max_entries=10,
+                 schedule_file='data/feed_schedule.json', breaker_file=None, fetcher=None):
+        """初始化收集器
+        
+        参数:
+            config_file: RSS源配置文件
+            max_workers: 并发获取的最大线程数（1表示逐个获取）
+            host_delay: 同一主机两次请求之间的最小间隔（秒）
+            http_cache_file: HTTP条件请求缓存文件（None表示不缓存）
+            seen_index_file: 已见文章索引文件（仅在只取新文章时使用）
+            stream_parse: 使用流式解析，只读取需要保留的条目
+            max_entries: 每个源最多取的文章数
+            schedule_file: 自适应调度状态文件（仅在按调度获取时使用）
+            breaker_file: 熔断器状态文件（None表示熔断状态不跨运行保存）
+            fetcher: 自定义的 FeedFetcher（超时、重试等参数）
+        """
         self.feeds = self.load_feeds(config_file)
         self.articles = []
+        self.max_workers = max(1, max_workers)
+        self.rate_limiter = HostRateLimiter(host_delay)
+        self.fetcher = fetcher or FeedFetcher()
+        self.breaker = FeedCircuitBreaker(breaker_file)
+        self.http_cache = FeedHTTPCache(http_cache_file) if http_cache_file else None
+        self.seen_index_file = seen_index_file
+        self.stream_parse = stream_parse
+        self.max_entries = max_entries
+        self.schedule_file = schedule_file
+        self.fetch_results = []
+        self.stats = StatsAggregator()
+        # 只取新文章时，本次运行出现过的文章键和各源水位线；输出保存后由 commit_seen 写入索引
+        self.pending_seen = set()
+        self.pending_watermarks = {}
         
     def load_feeds(self, config_file=None):
         """加载RSS源配置"""
@@ -57,70 +119,353 @@ class AITechRSSCollector:
             try:
                 with open(config_file, 'r', encoding='utf-8') as f:
                     config = json.load(f)
-                    return config.get('feeds', default_feeds)
+                    feeds = config.get('feeds', default_feeds)
+                    # 按priority排序（数值越小越优先），未设置的排在最后
+                    return sorted(feeds, key=lambda feed: feed.get('priority', float('inf')))
             except Exception as e:
                 print(f"⚠️ 加载配置文件失败: {e}, 使用默认配置")
         
         return default_feeds
     
-    def fetch_feed(self, feed_config):
-        """获取单个RSS源的内容"""
+    def fetch_feed(self, feed_config, watermark=None):
+        """获取单个RSS源的内容
+        
+        参数:
+            feed_config: RSS源配置
+            watermark: 流式解析时，遇到不晚于该时间（datetime）的条目即停止
+        """
+        return self.fetch_feed_result(feed_config, watermark)['articles']
+    
+    def fetch_feed_result(self, feed_config, watermark=None):
+        """获取单个RSS源，并返回包含成功状态和耗时的结果
+        
+        返回:
+            dict: articles、ok、error、not_modified、latency(秒)
+        """
+        url = feed_config['url']
+        result = {'articles': [], 'ok': False, 'error': None, 'not_modified': False, 'skipped': False,
+                  'latency': 0.0}
+        started = time.monotonic()
         try:
+            self.breaker.check(url)
             print(f"📡 正在获取: {feed_config['name']}...")
-            feed = feedparser.parse(feed_config['url'])
+            etag, last_modified = self.http_cache.validators(url) if self.http_cache else (None, None)
+            response = self.fetcher.fetch(url, etag, last_modified, stream=self.stream_parse)
             
-            if feed.bozo:
-                print(f"⚠️ 解析RSS失败: {feed.bozo_exception}")
-                return []
+            # 304或正文未变化时直接复用上次的解析结果
+            if response['status'] == 304:
+                cached = self._reuse_cached(feed_config, response)
+                if cached is not None:
+                    print(f"♻️ 未变化(304): {feed_config['name']} - {len(cached)}篇文章")
+                    result.update(articles=cached, ok=True, not_modified=True)
+                    self.breaker.record_success(url)
+                    return result
+                # 本地没有缓存却收到304，去掉校验头重新获取
+                response = self.fetcher.fetch(url, stream=self.stream_parse)
             
-            articles = []
-            for entry in feed.entries[:10]:  # 每个源最多取10条
-                # 提取文章信息
-                article = {
-                    'title': entry.get('title', '无标题'),
-                    'link': entry.get('link', ''),
-                    'published': entry.get('published', ''),
-                    'summary': entry.get('summary', ''),
-                    'content': entry.get('content', [{}])[0].get('value', '') if entry.get('content') else '',
-                    'source': feed_config['name'],
-                    'category': feed_config['category'],
-                    'feed_url': feed_config['url'],
-                    'collected_at': datetime.now().isoformat()
-                }
-                articles.append(article)
+            if self.stream_parse:
+                try:
+                    articles = self._parse_stream(feed_config, response, watermark)
+                except ET.ParseError as e:
+                    # 不规范的XML交给容错的feedparser重新处理
+                    print(f"⚠️ 流式解析失败({e})，改用完整解析: {feed_config['name']}")
+                    articles = self._parse_full(feed_config, self.fetcher.fetch(url))
+            else:
+                articles = self._parse_full(feed_config, response)
             
+            if articles is None:
+                result['error'] = '解析RSS失败'
+                self.breaker.record_failure(url)
+                return result
             print(f"✅ 获取成功: {feed_config['name']} - {len(articles)}篇文章")
-            return articles
+            result.update(articles=articles, ok=True)
+            self.breaker.record_success(url)
+            return result
             
+        except CircuitOpenError as e:
+            # 熔断跳过时没有发出请求，不算一次失败
+            print(f"⛔ {feed_config['name']}: {e}")
+            result['error'] = str(e)
+            result['skipped'] = True
+            return result
         except Exception as e:
+            self.breaker.record_failure(url)
             print(f"❌ 获取失败 {feed_config['name']}: {e}")
-            return []
+            result['error'] = str(e)
+            return result
+        finally:
+            result['latency'] = time.monotonic() - started
+    
+    def _parse_full(self, feed_config, response):
+        """用feedparser解析完整正文；正文哈希未变化时复用缓存，解析失败返回None"""
+        url = feed_config['url']
+        body_hash = FeedHTTPCache.hash_body(response['body'])
+        cached_entry = self.http_cache.get(url) if self.http_cache else None
+        if cached_entry and cached_entry.get('body_hash') == body_hash:
+            cached = self._reuse_cached(feed_config, response)
+            if cached is not None:
+                print(f"♻️ 内容未变化: {feed_config['name']}")
+                return cached
+        
+        feed = feedparser.parse(response['body'], response_headers=response['headers'])
+        
+        if feed.bozo:
+            print(f"⚠️ 解析RSS失败: {feed.bozo_exception}")
+            return None
+        
+        articles = [self._build_article(entry, feed_config) for entry in feed.entries[:self.max_entries]]
+        
+        if self.http_cache:
+            self.http_cache.update(url, response['etag'], response['last_modified'], body_hash, articles)
+        return articles
     
-    def fetch_all_feeds(self):
-        """获取所有启用的RSS源"""
+    def _parse_stream(self, feed_config, response, watermark=None):
+        """边下载边解析，取满条目数或到达水位线即停止读取"""
+        parser = StreamingFeedParser(self.max_entries, watermark)
+        entries = parser.parse(response['chunks'])
+        articles = [self._build_article(entry, feed_config) for entry in entries]
+        
+        # 未读完整正文，无法计算正文哈希，只保存ETag/Last-Modified；
+        # 按水位线截断的结果不完整，不写入缓存
+        if self.http_cache and not watermark:
+            self.http_cache.update(feed_config['url'], response['etag'], response['last_modified'], None, articles)
+        return articles
+    
+    @staticmethod
+    def _build_article(entry, feed_config):
+        """从feedparser（或流式解析器）条目提取文章信息"""
+        return {
+            'title': entry.get('title', '无标题'),
+            'link': entry.get('link', ''),
+            'guid': entry.get('id', ''),
+            'published': entry.get('published', ''),
+            'summary': entry.get('summary', ''),
+            'content': entry.get('content', [{}])[0].get('value', '') if entry.get('content') else '',
+            'source': feed_config['name'],
+            'category': feed_config['category'],
+            'feed_url': feed_config['url'],
+            'collected_at': datetime.now().isoformat()
+        }
+    
+    def _reuse_cached(self, feed_config, response):
+        """复用HTTP缓存中的文章，来源信息以当前配置为准"""
+        if not self.http_cache:
+            return None
+        cached = self.http_cache.revalidate(feed_config['url'], response['etag'], response['last_modified'])
+        if cached is None:
+            return None
+        for article in cached:
+            article['source'] = feed_config['name']
+            article['category'] = feed_config['category']
+        return cached
+    
+    def _fetch_feed_politely(self, feed_config, watermark=None):
+        """按主机限速后获取单个RSS源"""
+        self.rate_limiter.wait(feed_config['url'])
+        return self.fetch_feed_result(feed_config, watermark)
+    
+    def iter_feed_results(self, scheduled=False, budget=None, watermarks=None):
+        """并发获取所有启用的RSS源，按完成先后逐个产出 (源配置, 文章列表)
+        
+        参数:
+            scheduled: 只获取自适应调度器认为到期的源，并记录本次结果
+            budget: 按调度获取时，本次最多获取的源数量
+            watermarks: 流式解析时各源的水位线 {feed_url: datetime}
+        """
         print("🚀 开始获取AI技术动态...")
         print(f"📊 配置了 {len(self.feeds)} 个RSS源")
         
-        all_articles = []
-        enabled_count = 0
+        enabled_feeds = [feed for feed in self.feeds if feed.get('enabled', True)]
+        watermarks = watermarks or {}
+        self.fetch_results = []
+        self.stats = StatsAggregator()
         
-        for feed in self.feeds:
-            if not feed.get('enabled', True):
-                continue
-                
-            enabled_count += 1
-            articles = self.fetch_feed(feed)
-            all_articles.extend(articles)
-            
-            # 避免请求过快
-            time.sleep(1)
+        scheduler = FeedScheduler(self.schedule_file) if scheduled else None
+        if scheduler:
+            enabled_feeds = scheduler.due_feeds(enabled_feeds, budget=budget)
+            print(f"⏰ 本次到期: {len(enabled_feeds)}个源")
+        
+        try:
+            if enabled_feeds:
+                workers = min(self.max_workers, len(enabled_feeds))
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='feed') as executor:
+                    futures = {
+                        executor.submit(self._fetch_feed_politely, feed, watermarks.get(feed['url'])): feed
+                        for feed in enabled_feeds
+                    }
+                    for future in as_completed(futures):
+                        feed, result = futures[future], future.result()
+                        self.fetch_results.append({
+                            'url': feed['url'],
+                            'ok': result['ok'],
+                            'not_modified': result['not_modified'],
+                            'skipped': result['skipped'],
+                            'latency': result['latency'],
+                            'articles': len(result['articles'])
+                        })
+                        self.stats.record_fetch(result)
+                        if scheduler:
+                            scheduler.record_result(feed, result)
+                        yield feed, result['articles']
+        finally:
+            if scheduler:
+                scheduler.save()
+            self.breaker.save()
+            if self.http_cache:
+                self.http_cache.save()
+    
+    def fetch_all_feeds(self, new_only=False, scheduled=False, budget=None):
+        """并发获取所有启用的RSS源，结果按配置顺序合并
+        
+        参数:
+            new_only: 只返回之前运行中没有见过的文章
+            scheduled: 只获取自适应调度器认为到期的源，并记录本次结果
+            budget: 按调度获取时，本次最多获取的源数量
+        """
+        # 只取新文章时，流式解析可以在上次的水位线处停止
+        watermarks = self.load_watermarks() if new_only and self.stream_parse else {}
+        self.reset_seen()
+        
+        # 按配置顺序合并，输出与逐个获取时一致
+        position = {id(feed): i for i, feed in enumerate(self.feeds)}
+        completed = sorted(self.iter_feed_results(scheduled, budget, watermarks),
+                           key=lambda item: position[id(item[0])])
+        all_articles = [article for _, articles in completed for article in articles]
         
-        print(f"🎯 完成获取: {enabled_count}个源, 共{len(all_articles)}篇文章")
+        if new_only:
+            all_articles = self.filter_new_articles(all_articles)
+        for article in all_articles:
+            self.stats.record_collected(article)
+        
+        print(f"🎯 完成获取: {len(completed)}个源, 共{len(all_articles)}篇文章")
         self.articles = all_articles
         return all_articles
     
-    def save_articles(self, output_file=None):
-        """保存文章到文件"""
+    def iter_articles(self, new_only=False, scheduled=False, budget=None):
+        """边获取边产出文章：每个源完成后立即产出其文章，不等待其他源
+        
+        参数同 fetch_all_feeds；产出顺序为源的完成顺序，全部文章同时累积到 self.articles
+        """
+        watermarks = self.load_watermarks() if new_only and self.stream_parse else {}
+        self.reset_seen()
+        self.articles = []
+        feed_count = 0
+        # 已见文章索引每次运行只打开一次
+        index = self.open_seen_index() if new_only else None
+        try:
+            for _, articles in self.iter_feed_results(scheduled, budget, watermarks):
+                feed_count += 1
+                if new_only and articles:
+                    articles = self.filter_new_articles(articles, index)
+                self.articles.extend(articles)
+                for article in articles:
+                    self.stats.record_collected(article)
+                yield from articles
+        finally:
+            if index:
+                index.close()
+        
+        print(f"🎯 完成获取: {feed_count}个源, 共{len(self.articles)}篇文章")
+    
+    def open_seen_index(self):
+        """打开已见文章索引并清理过期条目"""
+        index = SeenArticleIndex(self.seen_index_file)
+        expired = index.expire()
+        if expired:
+            print(f"🧹 清理过期索引条目: {expired}条")
+        return index
+    
+    def filter_new_articles(self, articles, index=None):
+        """使用已见文章索引过滤掉之前运行中收集过的文章（本次运行中的重复也会去掉）
+        
+        这里只过滤、不写入索引：文章键和各源水位线先记在 pending_seen、pending_watermarks 中，
+        报告或输出保存成功后再由 commit_seen 写入。处理或保存失败时，下次运行仍会把这些
+        文章当作新文章。
+        
+        参数:
+            index: 已打开的 SeenArticleIndex（None表示临时打开一次）
+        """
+        own_index = index is None
+        if own_index:
+            index = self.open_seen_index()
+        try:
+            new_articles = index.filter_new(articles, mark=False, pending=self.pending_seen)
+        finally:
+            if own_index:
+                index.close()
+        for url, newest in self.newest_by_feed(articles).items():
+            self.pending_watermarks[url] = max(newest, self.pending_watermarks.get(url, newest))
+        
+        print(f"🆕 新文章: {len(new_articles)}/{len(articles)} 篇")
+        return new_articles
+    
+    def reset_seen(self):
+        """丢弃尚未提交的已见记录（开始新的一次收集时调用）"""
+        self.pending_seen = set()
+        self.pending_watermarks = {}
+    
+    def commit_seen(self):
+        """把本次收集的文章记为已见并推进各源水位线，返回记录的文章数
+        
+        应在报告或输出文件保存成功之后调用。
+        """
+        if not self.pending_seen and not self.pending_watermarks:
+            return 0
+        index = SeenArticleIndex(self.seen_index_file)
+        try:
+            index.mark_seen(self.pending_seen)
+            index.update_watermarks(self.pending_watermarks)
+        finally:
+            index.close()
+        committed = len(self.pending_seen)
+        self.reset_seen()
+        return committed
+    
+    def feed_state(self, url):
+        """某个源的熔断器记录和HTTP缓存条目（分片收集时由工作进程经工作队列交回协调者）"""
+        entry = self.http_cache.get(url) if self.http_cache else None
+        return {'breaker': self.breaker.snapshot(url), 'http_cache': dict(entry) if entry else None}
+    
+    def apply_feed_states(self, states):
+        """合并各源的状态 {源URL: feed_state(url)}，然后保存熔断器和HTTP缓存文件一次"""
+        for url, state in states.items():
+            if state.get('breaker'):
+                self.breaker.restore(url, state['breaker'])
+            if state.get('http_cache') and self.http_cache:
+                self.http_cache.restore(url, state['http_cache'])
+        self.breaker.save()
+        if self.http_cache:
+            self.http_cache.save()
+    
+    def load_watermarks(self):
+        """读取各源的水位线 {feed_url: datetime}"""
+        index = SeenArticleIndex(self.seen_index_file)
+        try:
+            return {
+                url: datetime.fromtimestamp(ts, tz=timezone.utc)
+                for url, ts in index.get_watermarks().items()
+            }
+        finally:
+            index.close()
+    
+    @staticmethod
+    def newest_by_feed(articles):
+        """统计每个源中最新文章的发布时间戳"""
+        newest = {}
+        for article in articles:
+            published = parse_date(article.get('published'))
+            if published:
+                ts = int(published.timestamp())
+                newest[article['feed_url']] = max(ts, newest.get(article['feed_url'], ts))
+        return newest
+    
+    def save_articles(self, output_file=None, blob_store=None):
+        """保存文章到文件
+        
+        参数:
+            output_file: 输出文件
+            blob_store: BlobStore，提供时正文只保存一次，文件中只写引用
+        """
         if not self.articles:
             print("⚠️ 没有文章可保存")
             return None
@@ -129,16 +474,11 @@ class AITechRSSCollector:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             output_file = f"../data/ai_articles_{timestamp}.json"
         
-        # 确保目录存在
-        os.makedirs(os.path.dirname(output_file), exist_ok=True)
-        
         try:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump({
-                    'collected_at': datetime.now().isoformat(),
-                    'article_count': len(self.articles),
-                    'articles': self.articles
-                }, f, ensure_ascii=False, indent=2)
+            save_run_file(output_file, {
+                'collected_at': datetime.now().isoformat(),
+                'article_count': len(self.articles)
+            }, self.articles, blob_store)
             
             print(f"💾 文章已保存到: {output_file}")
             return output_file
@@ -148,26 +488,8 @@ class AITechRSSCollector:
             return None
     
     def get_statistics(self):
-        """获取统计信息"""
-        if not self.articles:
-            return {"total": 0}
-        
-        stats = {
-            'total': len(self.articles),
-            'by_source': {},
-            'by_category': {}
-        }
-        
-        for article in self.articles:
-            # 按来源统计
-            source = article['source']
-            stats['by_source'][source] = stats['by_source'].get(source, 0) + 1
-            
-            # 按分类统计
-            category = article['category']
-            stats['by_category'][category] = stats['by_category'].get(category, 0) + 1
-        
-        return stats
+        """获取统计信息（获取过程中增量累计，不重新遍历文章）"""
+        return self.stats.collection_statistics()
 
 def main():
     """主函数"""
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# rule_engine.py
+# 分类规则：从配置文件加载、编译，并在文件变化时热更新
+
+from collections import namedtuple
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+from keyword_matcher import KeywordMatcher, is_word_match
+
+# 规则文件中AI判定规则组的名称，其余规则组都在 categories 下
+AI_GROUP = 'ai'
+
+# 一篇文章的规则判定结果
+RuleMatch = namedtuple('RuleMatch', ['is_ai', 'ai_weight', 'categories'])
+
+class RuleSet:
+    """编译后的分类规则（只读）
+    
+    规则文件格式:
+        {
+            "ai": {"terms": [...], "exclude": [...], "min_weight": 1},
+            "categories": {"分类名": {"terms": [...], "exclude": [...], "min_weight": 1}, ...},
+            "default_category": "其他"
+        }
+    
+    每个规则项可以是字符串（不区分大小写的子串关键词，权重1），也可以是对象:
+        {"keyword": "AI", "word_boundary": true, "weight": 0.5}
+        {"regex": "GPT-?\\d", "weight": 2}
+    一个规则组命中规则项的权重之和（同一规则项只计一次）达到 min_weight、
+    且没有命中任何 exclude 规则项时，规则组成立。
+    
+    所有规则组的关键词编译进同一个Aho-Corasick自动机，一篇文章只扫描一遍；
+    正则表达式单独预编译。编译完成后不再修改，可以在线程之间安全共享。
+    """
+    
+    def __init__(self, config):
+        """编译规则配置，配置有误时抛出 ValueError"""
+        if not isinstance(config, dict) or AI_GROUP not in config:
+            raise ValueError(f"规则配置缺少 '{AI_GROUP}' 规则组")
+        self.config = config
+        self.fingerprint = hashlib.sha256(
+            json.dumps(config, ensure_ascii=False, sort_keys=True).encode('utf-8')
+        ).hexdigest()[:16]
+        self.default_category = config.get('default_category', '其他')
+        
+        # 规则组0为AI判定，之后按配置顺序为各分类
+        categories = config.get('categories', {})
+        self.group_names = [AI_GROUP] + list(categories)
+        groups = [config[AI_GROUP]] + list(categories.values())
+        self.min_weights = []
+        
+        # 规则项编号 -> (规则组, 是否为排除项, 权重, 是否要求单词边界)
+        self.terms = []
+        self.matcher = KeywordMatcher()
+        self.patterns = []
+        for group_index, group in enumerate(groups):
+            name = self.group_names[group_index]
+            if not isinstance(group, dict):
+                raise ValueError(f"规则组 '{name}' 必须是对象")
+            self.min_weights.append(float(group.get('min_weight', 1)))
+            for exclude, items in ((False, group.get('terms', [])), (True, group.get('exclude', []))):
+                for item in items:
+                    self._add_term(name, group_index, exclude, item)
+        self.matcher.build()
+    
+    def _add_term(self, name, group_index, exclude, item):
+        """编译一个规则项"""
+        if isinstance(item, str):
+            item = {'keyword': item}
+        if not isinstance(item, dict) or ('keyword' in item) == ('regex' in item):
+            raise ValueError(f"规则组 '{name}' 中的规则项无效: {item!r}")
+        
+        term_id = len(self.terms)
+        self.terms.append((group_index, exclude, float(item.get('weight', 1)), bool(item.get('word_boundary', False))))
+        if 'keyword' in item:
+            if not item['keyword']:
+                raise ValueError(f"规则组 '{name}' 中有空关键词")
+            self.matcher.add(item['keyword'], term_id)
+        else:
+            try:
+                pattern = re.compile(item['regex'], re.IGNORECASE)
+            except re.error as e:
+                raise ValueError(f"规则组 '{name}' 中的正则表达式无效 {item['regex']!r}: {e}")
+            self.patterns.append((term_id, pattern))
+    
+    @classmethod
+    def from_keywords(cls, ai_keywords, category_keywords, default_category='其他'):
+        """由关键词列表构建规则（每个关键词为权重1的子串匹配）"""
+        return cls({
+            AI_GROUP: {'terms': list(ai_keywords)},
+            'categories': {category: {'terms': list(keywords)} for category, keywords in category_keywords.items()},
+            'default_category': default_category
+        })
+    
+    def current(self):
+        """与 HotReloadingRules 接口一致：静态规则总是返回自身"""
+        return self
+    
+    def matched_terms(self, text):
+        """返回文本命中的规则项编号集合"""
+        lowered = text.lower()
+        matched = set()
+        for start, end, term_ids in self.matcher.iter_matches(lowered):
+            for term_id in term_ids:
+                if term_id in matched:
+                    continue
+                if self.terms[term_id][3] and not is_word_match(lowered, start, end):
+                    continue
+                matched.add(term_id)
+        for term_id, pattern in self.patterns:
+            if pattern.search(text):
+                matched.add(term_id)
+        return matched
+    
+    def evaluate(self, text):
+        """对文本做一次扫描，给出AI判定、AI规则权重和命中的分类（按配置顺序）"""
+        weights = [0.0] * len(self.group_names)
+        excluded = [False] * len(self.group_names)
+        for term_id in self.matched_terms(text):
+            group_index, exclude, weight, _ = self.terms[term_id]
+            if exclude:
+                excluded[group_index] = True
+            else:
+                weights[group_index] += weight
+        
+        passed = [not excluded[i] and weights[i] > 0 and weights[i] >= self.min_weights[i]
+                  for i in range(len(self.group_names))]
+        categories = [self.group_names[i] for i in range(1, len(self.group_names)) if passed[i]]
+        return RuleMatch(passed[0], weights[0], categories)
+
+def load_rules(rules_file):
+    """读取并编译规则文件，文件不存在或格式有误时抛出 OSError/ValueError"""
+    with open(rules_file, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    return RuleSet(config)
+
+class HotReloadingRules:
+    """随规则文件变化自动重新编译的规则
+    
+    current() 最多每 check_interval 秒检查一次文件修改时间，变化后在调用线程中
+    重新编译，编译成功才用一次属性赋值替换当前规则；编译失败时保留旧规则。
+    调用方在一批处理开始时取一次 current()，整批都使用同一份规则，
+    替换发生在批次之间，进行中的处理不受影响。
+    """
+    
+    def __init__(self, rules_file, check_interval=2.0):
+        """加载规则文件（首次加载失败时直接抛出异常）"""
+        self.rules_file = rules_file
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._signature = self._file_signature()
+        self._rules = load_rules(rules_file)
+        self._checked_at = time.monotonic()
+    
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.rules_file)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    
+    def current(self):
+        """返回当前生效的规则（必要时先检查文件是否变化）"""
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval:
+            self._checked_at = now
+            self.reload_if_changed()
+        return self._rules
+    
+    def reload_if_changed(self):
+        """文件变化时重新编译，返回是否替换了规则"""
+        signature = self._file_signature()
+        if signature is None or signature == self._signature:
+            return False
+        
+        with self._lock:
+            if signature == self._signature:
+                return False
+            self._signature = signature
+            try:
+                rules = load_rules(self.rules_file)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ 分类规则重新加载失败，继续使用旧规则: {e}")
+                return False
+            if rules.fingerprint == self._rules.fingerprint:
+                return False
+            self._rules = rules
+        
+        print(f"🔄 分类规则已更新: {os.path.basename(self.rules_file)} ({rules.fingerprint})")
+        return True
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# seen_index.py
+# 跨运行的已见文章索引
+
+import hashlib
+import os
+import sqlite3
+import time
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# 规范化链接时丢弃的跟踪参数
+TRACKING_PARAMS = {'fbclid', 'gclid', 'mc_cid', 'mc_eid', 'ref', 'spm'}
+
+def canonicalize_link(link):
+    """规范化文章链接：忽略协议、www前缀、默认端口、跟踪参数、锚点和末尾斜杠"""
+    parts = urlsplit(link.strip())
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    
+    path = parts.path.rstrip('/') or '/'
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith('utm_') and k.lower() not in TRACKING_PARAMS
+    )
+    return urlunsplit(('', host, path, urlencode(query), ''))
+
+def article_key(article):
+    """文章唯一标识：优先使用GUID，其次规范化链接，最后使用来源+标题"""
+    guid = (article.get('guid') or '').strip()
+    if guid:
+        identity = f"guid:{guid}"
+    elif article.get('link'):
+        identity = f"link:{canonicalize_link(article['link'])}"
+    else:
+        identity = f"title:{article.get('source', '')}:{article.get('title', '')}"
+    
+    # 64位哈希作为主键，百万级条目下碰撞概率可忽略
+    digest = hashlib.blake2b(identity.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+class SeenArticleIndex:
+    """已见文章索引
+    
+    使用SQLite保存 (64位文章哈希, 最后见到时间)，主键查找在百万级条目下仍然很快。
+    超过 ttl_days 未再见到的条目会被清理。
+    """
+    
+    BATCH_SIZE = 500
+    
+    def __init__(self, db_file='data/seen_articles.db', ttl_days=90):
+        """打开（或创建）索引"""
+        os.makedirs(os.path.dirname(db_file) or '.', exist_ok=True)
+        self.db_file = db_file
+        self.ttl_days = ttl_days
+        self.conn = sqlite3.connect(db_file)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS seen (key INTEGER PRIMARY KEY, last_seen INTEGER NOT NULL)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS seen_last_seen ON seen (last_seen)')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS watermarks (feed_url TEXT PRIMARY KEY, newest INTEGER NOT NULL)')
+        self.conn.commit()
+    
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM seen').fetchone()[0]
+    
+    def close(self):
+        """关闭索引"""
+        self.conn.close()
+    
+    def expire(self, now=None):
+        """清理过期条目，返回删除数量"""
+        now = int(now or time.time())
+        cutoff = now - int(self.ttl_days * 86400)
+        cursor = self.conn.execute('DELETE FROM seen WHERE last_seen < ?', (cutoff,))
+        self.conn.commit()
+        return cursor.rowcount
+    
+    def known_keys(self, keys):
+        """返回 keys 中已在索引里的部分"""
+        known = set()
+        keys = list(keys)
+        for i in range(0, len(keys), self.BATCH_SIZE):
+            batch = keys[i:i + self.BATCH_SIZE]
+            placeholders = ','.join('?' * len(batch))
+            rows = self.conn.execute(f'SELECT key FROM seen WHERE key IN ({placeholders})', batch)
+            known.update(row[0] for row in rows)
+        return known
+    
+    def mark_seen(self, keys, now=None):
+        """记录（或刷新）文章的最后见到时间"""
+        now = int(now or time.time())
+        self.conn.executemany(
+            'INSERT OR REPLACE INTO seen (key, last_seen) VALUES (?, ?)',
+            ((key, now) for key in keys)
+        )
+        self.conn.commit()
+    
+    def filter_new(self, articles, mark=True, pending=None):
+        """过滤掉已见过的文章（同一批中的重复也只保留第一篇）
+        
+        参数:
+            articles: 文章列表
+            mark: 是否把本批文章记为已见
+            pending: 本次运行中已出现、尚未记为已见的键的集合（原地加入本批的键），
+                     不立即标记时用它在多批之间去重，之后再用 mark_seen 提交
+        
+        返回:
+            list: 新文章
+        """
+        keyed = [(article_key(article), article) for article in articles]
+        known = self.known_keys({key for key, _ in keyed})
+        if pending is not None:
+            known.update(pending)
+        
+        new_articles = []
+        for key, article in keyed:
+            if key not in known:
+                known.add(key)
+                new_articles.append(article)
+        
+        if pending is not None:
+            pending.update(key for key, _ in keyed)
+        if mark:
+            # 已见文章也刷新时间，仍在源中出现的文章不会因过期而被当成新文章
+            self.mark_seen({key for key, _ in keyed})
+        return new_articles
+    
+    def get_watermarks(self):
+        """返回每个源已见过的最新发布时间 {feed_url: 时间戳}"""
+        return dict(self.conn.execute('SELECT feed_url, newest FROM watermarks'))
+    
+    def update_watermarks(self, newest_by_feed):
+        """推进各源的水位线（只会变大）"""
+        self.conn.executemany(
+            'INSERT INTO watermarks (feed_url, newest) VALUES (?, ?) '
+            'ON CONFLICT(feed_url) DO UPDATE SET newest = max(newest, excluded.newest)',
+            newest_by_feed.items()
+        )
+        self.conn.commit()
@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+# sharded_collector.py
+# 分片多进程/多机RSS收集
+
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from datetime import datetime, timezone
+
+from rss_collector import AITechRSSCollector
+from feed_scheduler import FeedScheduler
+from stats_aggregator import StatsAggregator
+
+class FeedWorkQueue:
+    """基于SQLite的RSS源工作队列
+    
+    协调者把一次收集拆成按源的任务写入队列，工作进程以租约方式领取任务：
+    - 领取时写入租约到期时间，进程崩溃后租约过期，任务可被其他工作进程重新领取
+    - 结果按 (run_id, position) 唯一写入，先完成者生效，重复完成不会产生重复结果
+    - 收集器参数随批次保存、各源的水位线随任务保存，其他机器上的工作进程不需要额外配置
+    - 各源的熔断器记录和HTTP缓存条目随结果交回，由协调者统一合并保存，工作进程不写共享的状态文件
+    - 多台机器共享同一个数据库文件即可加入同一次收集（需要支持文件锁的共享存储）
+    """
+    
+    def __init__(self, db_file='data/work_queue.db', lease_seconds=600, max_attempts=3):
+        """打开（或创建）队列
+        
+        参数:
+            db_file: 队列数据库文件
+            lease_seconds: 任务租约时长（秒），应大于单个源的最长获取时间
+            max_attempts: 单个任务最多被领取的次数，超过后标记为失败
+        """
+        os.makedirs(os.path.dirname(db_file) or '.', exist_ok=True)
+        self.db_file = db_file
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.conn = sqlite3.connect(db_file, timeout=30, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                created_at TEXT NOT NULL,
+                feed_count INTEGER NOT NULL,
+                options_json TEXT NOT NULL DEFAULT '{}'
+            );
+            CREATE TABLE IF NOT EXISTS tasks (
+                run_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                feed_json TEXT NOT NULL,
+                watermark INTEGER,
+                state TEXT NOT NULL DEFAULT 'pending',
+                worker TEXT,
+                lease_until REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (run_id, position)
+            );
+            CREATE TABLE IF NOT EXISTS results (
+                run_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                ok INTEGER NOT NULL,
+                skipped INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                latency REAL,
+                articles_json TEXT NOT NULL,
+                state_json TEXT,
+                worker TEXT,
+                finished_at TEXT NOT NULL,
+                PRIMARY KEY (run_id, position)
+            );
+        """)
+        # 旧版本创建的表缺少后来增加的列
+        self._add_column('runs', 'options_json', "TEXT NOT NULL DEFAULT '{}'")
+        self._add_column('tasks', 'watermark', 'INTEGER')
+        self._add_column('results', 'skipped', 'INTEGER NOT NULL DEFAULT 0')
+        self._add_column('results', 'state_json', 'TEXT')
+        
+    def _add_column(self, table, column, definition):
+        """表中没有该列时补上"""
+        columns = {row[1] for row in self.conn.execute(f'PRAGMA table_info({table})')}
+        if column not in columns:
+            self.conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+        
+    def close(self):
+        """关闭队列"""
+        self.conn.close()
+        
+    def create_run(self, feeds, watermarks=None, options=None):
+        """为一次收集创建任务，返回 run_id
+        
+        参数:
+            feeds: 源配置列表
+            watermarks: {源URL: 上次见到的最新发布时间(datetime)}，随任务交给工作进程（流式解析时提前停止）
+            options: 工作进程中 AITechRSSCollector 的参数（需能序列化为JSON）
+        """
+        timestamps = {url: int(watermark.timestamp()) for url, watermark in (watermarks or {}).items()}
+        run_id = datetime.now().strftime('%Y%m%d_%H%M%S_') + uuid.uuid4().hex[:6]
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            self.conn.execute(
+                'INSERT INTO runs (run_id, created_at, feed_count, options_json) VALUES (?, ?, ?, ?)',
+                (run_id, datetime.now().isoformat(), len(feeds), json.dumps(options or {}, ensure_ascii=False))
+            )
+            self.conn.executemany(
+                'INSERT INTO tasks (run_id, position, feed_json, watermark) VALUES (?, ?, ?, ?)',
+                ((run_id, i, json.dumps(feed, ensure_ascii=False), timestamps.get(feed['url']))
+                 for i, feed in enumerate(feeds))
+            )
+            self.conn.execute('COMMIT')
+        except Exception:
+            self.conn.execute('ROLLBACK')
+            raise
+        return run_id
+        
+    def latest_run(self):
+        """最近一次收集的 run_id"""
+        row = self.conn.execute('SELECT run_id FROM runs ORDER BY created_at DESC LIMIT 1').fetchone()
+        return row[0] if row else None
+        
+    def run_options(self, run_id):
+        """某次收集保存的收集器参数"""
+        row = self.conn.execute('SELECT options_json FROM runs WHERE run_id = ?', (run_id,)).fetchone()
+        return json.loads(row[0]) if row else {}
+        
+    def claim(self, run_id, worker_id, now=None):
+        """领取一个待处理（或租约已过期）的任务
+        
+        返回:
+            tuple: (position, feed, watermark)，没有可领取的任务时返回None
+        """
+        now = now or time.time()
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            # 领取次数用尽的任务标记为失败，避免一个会让进程崩溃的源无限重试
+            self.conn.execute(
+                "UPDATE tasks SET state = 'failed' WHERE run_id = ? AND state != 'done' "
+                "AND attempts >= ? AND (state = 'pending' OR lease_until < ?)",
+                (run_id, self.max_attempts, now)
+            )
+            row = self.conn.execute(
+                "SELECT position, feed_json, watermark FROM tasks WHERE run_id = ? "
+                "AND (state = 'pending' OR (state = 'claimed' AND lease_until < ?)) "
+                "ORDER BY position LIMIT 1",
+                (run_id, now)
+            ).fetchone()
+            if row:
+                self.conn.execute(
+                    "UPDATE tasks SET state = 'claimed', worker = ?, lease_until = ?, attempts = attempts + 1 "
+                    "WHERE run_id = ? AND position = ?",
+                    (worker_id, now + self.lease_seconds, run_id, row[0])
+                )
+            self.conn.execute('COMMIT')
+        except Exception:
+            self.conn.execute('ROLLBACK')
+            raise
+        if row is None:
+            return None
+        watermark = datetime.fromtimestamp(row[2], tz=timezone.utc) if row[2] is not None else None
+        return row[0], json.loads(row[1]), watermark
+        
+    def complete(self, run_id, position, worker_id, result, state=None):
+        """提交任务结果；同一任务已有结果时忽略（先完成者生效）
+        
+        参数:
+            state: 该源获取后的熔断器记录和HTTP缓存条目（AITechRSSCollector.feed_state）
+        """
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            self.conn.execute(
+                'INSERT OR IGNORE INTO results '
+                '(run_id, position, ok, skipped, error, latency, articles_json, state_json, worker, finished_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (run_id, position, int(result['ok']), int(result.get('skipped', False)), result['error'],
+                 result['latency'], json.dumps(result['articles'], ensure_ascii=False),
+                 json.dumps(state, ensure_ascii=False) if state else None, worker_id, datetime.now().isoformat())
+            )
+            self.conn.execute(
+                "UPDATE tasks SET state = 'done', lease_until = NULL WHERE run_id = ? AND position = ?",
+                (run_id, position)
+            )
+            self.conn.execute('COMMIT')
+        except Exception:
+            self.conn.execute('ROLLBACK')
+            raise
+            
+    def release_worker(self, run_id, worker_id):
+        """释放某个（已退出的）工作进程持有的任务，使其可以立即被重新领取"""
+        self.conn.execute(
+            "UPDATE tasks SET state = 'pending', worker = NULL, lease_until = NULL "
+            "WHERE run_id = ? AND worker = ? AND state = 'claimed'",
+            (run_id, worker_id)
+        )
+        
+    def progress(self, run_id):
+        """各状态的任务数量"""
+        rows = self.conn.execute('SELECT state, COUNT(*) FROM tasks WHERE run_id = ? GROUP BY state', (run_id,))
+        return dict(rows)
+        
+    def remaining(self, run_id):
+        """尚未结束（待处理或处理中）的任务数"""
+        progress = self.progress(run_id)
+        return progress.get('pending', 0) + progress.get('claimed', 0)
+        
+    def results(self, run_id):
+        """按源的原始顺序返回 {position: 获取结果}，格式同 fetch_feed_result"""
+        rows = self.conn.execute(
+            'SELECT position, ok, skipped, error, latency, articles_json FROM results '
+            'WHERE run_id = ? ORDER BY position',
+            (run_id,)
+        )
+        return {
+            position: {
+                'articles': json.loads(articles_json),
+                'ok': bool(ok),
+                'error': error,
+                'not_modified': False,
+                'skipped': bool(skipped),
+                'latency': latency or 0.0
+            }
+            for position, ok, skipped, error, latency, articles_json in rows
+        }
+    
+    def feed_states(self, run_id):
+        """各源交回的状态 {源URL: 熔断器记录和HTTP缓存条目}"""
+        rows = self.conn.execute(
+            'SELECT tasks.feed_json, results.state_json FROM results JOIN tasks '
+            'ON tasks.run_id = results.run_id AND tasks.position = results.position '
+            'WHERE results.run_id = ? AND results.state_json IS NOT NULL ORDER BY results.position',
+            (run_id,)
+        )
+        return {json.loads(feed_json)['url']: json.loads(state_json) for feed_json, state_json in rows}
+
+def default_worker_id():
+    """工作进程标识：主机名-进程号"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+def run_worker(db_file, run_id=None, worker_id=None, collector_options=None, poll_interval=1.0):
+    """工作进程主循环：领取任务、获取RSS源、提交结果，直到该次收集没有剩余任务
+    
+    熔断器和HTTP缓存的更新随结果写入工作队列，不写回状态文件：多个进程各自覆盖
+    整个文件会互相丢失更新，由协调者在所有任务结束后合并保存一次。
+    
+    参数:
+        db_file: 队列数据库文件
+        run_id: 要加入的收集（None表示最近一次）
+        worker_id: 工作进程标识
+        collector_options: 传给 AITechRSSCollector 的参数（覆盖该次收集保存的参数）
+        poll_interval: 其他进程的任务仍在处理中时的等待间隔（秒）
+        
+    返回:
+        int: 本进程完成的任务数
+    """
+    queue = FeedWorkQueue(db_file)
+    worker_id = worker_id or default_worker_id()
+    run_id = run_id or queue.latest_run()
+    options = queue.run_options(run_id) if run_id else {}
+    options.update(collector_options or {})
+    collector = AITechRSSCollector(**options)
+    done = 0
+    
+    try:
+        while run_id:
+            task = queue.claim(run_id, worker_id)
+            if task is None:
+                if queue.remaining(run_id) == 0:
+                    break
+                # 其他进程的任务可能因崩溃而租约过期，稍后再尝试领取
+                time.sleep(poll_interval)
+                continue
+                
+            position, feed, watermark = task
+            collector.rate_limiter.wait(feed['url'])
+            result = collector.fetch_feed_result(feed, watermark)
+            queue.complete(run_id, position, worker_id, result, collector.feed_state(feed['url']))
+            done += 1
+    finally:
+        queue.close()
+        
+    print(f"👷 工作进程 {worker_id} 完成 {done} 个源")
+    return done
+
+class ShardedRSSCollector:
+    """分片RSS收集协调者
+    
+    把启用的源写入工作队列，启动N个本地工作进程并行领取；其他机器上也可以用
+    `python sharded_collector.py worker --queue <db> --run-id <id>` 加入。
+    所有任务结束后按原始顺序合并结果，接口与 AITechRSSCollector 保持一致。
+    """
+    
+    def __init__(self, config_file=None, workers=4, queue_file='data/work_queue.db', **collector_options):
+        """初始化协调者
+        
+        参数:
+            config_file: RSS源配置文件
+            workers: 本地工作进程数
+            queue_file: 工作队列数据库文件
+            collector_options: 传给每个工作进程中 AITechRSSCollector 的其他参数
+        """
+        self.workers = max(1, workers)
+        self.queue_file = queue_file
+        self.collector_options = dict(collector_options, config_file=config_file)
+        self.collector = AITechRSSCollector(**self.collector_options)
+        self.feeds = self.collector.feeds
+        self.articles = []
+        
+    def fetch_all_feeds(self, new_only=False, scheduled=False, budget=None):
+        """分片获取所有启用的RSS源，结果按配置顺序合并（参数同 AITechRSSCollector.fetch_all_feeds）"""
+        enabled_feeds = [feed for feed in self.feeds if feed.get('enabled', True)]
+        
+        scheduler = FeedScheduler(self.collector.schedule_file) if scheduled else None
+        if scheduler:
+            enabled_feeds = scheduler.due_feeds(enabled_feeds, budget=budget)
+            
+        print(f"🚀 分片获取AI技术动态: {len(enabled_feeds)}个源, {self.workers}个工作进程")
+        
+        # 只取新文章时，流式解析可以在上次的水位线处停止
+        watermarks = self.collector.load_watermarks() if new_only and self.collector.stream_parse else {}
+        
+        queue = FeedWorkQueue(self.queue_file)
+        try:
+            run_id = queue.create_run(enabled_feeds, watermarks, self.collector_options)
+            print(f"🗂️ 收集批次: {run_id}")
+            self.run_workers(queue, run_id)
+            
+            if queue.remaining(run_id):
+                # 所有工作进程都已退出但仍有任务，由协调者自己处理
+                run_worker(self.queue_file, run_id, collector_options=self.collector_options)
+                
+            progress = queue.progress(run_id)
+            if progress.get('failed'):
+                print(f"⚠️ {progress['failed']}个源多次导致工作进程异常，已放弃")
+            results = queue.results(run_id)
+            # 各工作进程交回的熔断器和HTTP缓存更新在这里合并，状态文件只写一次
+            self.collector.apply_feed_states(queue.feed_states(run_id))
+        finally:
+            queue.close()
+            
+        all_articles = []
+        stats = StatsAggregator()
+        for position, feed in enumerate(enabled_feeds):
+            result = results.get(position)
+            if result is None:
+                continue
+            stats.record_fetch(result)
+            all_articles.extend(result['articles'])
+            if scheduler:
+                scheduler.record_result(feed, result)
+        if scheduler:
+            scheduler.save()
+            
+        if new_only:
+            self.collector.reset_seen()
+            all_articles = self.collector.filter_new_articles(all_articles)
+        for article in all_articles:
+            stats.record_collected(article)
+            
+        print(f"🎯 完成获取: {len(enabled_feeds)}个源, 共{len(all_articles)}篇文章")
+        self.articles = all_articles
+        self.collector.articles = all_articles
+        self.collector.stats = stats
+        return all_articles
+        
+    def run_workers(self, queue, run_id):
+        """启动本地工作进程并等待结束；异常退出的进程持有的任务立即释放"""
+        processes = {}
+        for i in range(self.workers):
+            worker_id = f"{default_worker_id()}-w{i}"
+            process = multiprocessing.Process(
+                target=run_worker,
+                args=(self.queue_file, run_id, worker_id, self.collector_options),
+                name=worker_id
+            )
+            process.start()
+            processes[worker_id] = process
+            
+        for worker_id, process in processes.items():
+            process.join()
+            if process.exitcode != 0:
+                print(f"⚠️ 工作进程 {worker_id} 异常退出({process.exitcode})，释放其任务")
+                queue.release_worker(run_id, worker_id)
+                
+    def save_articles(self, output_file=None, blob_store=None):
+        """保存文章到文件"""
+        return self.collector.save_articles(output_file, blob_store)
+        
+    def commit_seen(self):
+        """输出保存成功后把本次收集的文章记为已见"""
+        return self.collector.commit_seen()
+        
+    @property
+    def stats(self):
+        """本次收集的增量统计"""
+        return self.collector.stats
+    
+    def get_statistics(self):
+        """获取统计信息"""
+        return self.collector.get_statistics()
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='分片RSS收集')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    coordinator = subparsers.add_parser('coordinator', help='创建收集批次并启动本地工作进程')
+    coordinator.add_argument('--config', help='RSS源配置文件')
+    coordinator.add_argument('--workers', type=int, default=4, help='本地工作进程数')
+    coordinator.add_argument('--queue', default='data/work_queue.db', help='工作队列数据库文件')
+    coordinator.add_argument('--output', help='原始文章输出文件')
+    coordinator.add_argument('--http-cache', default='data/http_cache.json', help='HTTP条件请求缓存文件')
+    coordinator.add_argument('--breaker-file', default='data/circuit_breakers.json', help='熔断器状态文件')
+    coordinator.add_argument('--stream', action='store_true', help='流式解析RSS')
+    
+    worker = subparsers.add_parser('worker', help='加入已有的收集批次')
+    worker.add_argument('--queue', default='data/work_queue.db', help='工作队列数据库文件')
+    worker.add_argument('--run-id', help='要加入的收集批次（默认最近一次，收集器参数沿用该批次）')
+    
+    args = parser.parse_args()
+    
+    if args.command == 'coordinator':
+        collector = ShardedRSSCollector(args.config, workers=args.workers, queue_file=args.queue,
+                                        http_cache_file=args.http_cache, breaker_file=args.breaker_file,
+                                        stream_parse=args.stream)
+        if collector.fetch_all_feeds():
+            collector.save_articles(args.output)
+    else:
+        run_worker(args.queue, args.run_id)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+# stats_aggregator.py
+# 增量统计：计数器与可合并的分位数草图
+
+import json
+import math
+import os
+from datetime import date, datetime, timedelta
+
+class QuantileSketch:
+    """可合并的分位数草图（DDSketch）
+    
+    非负数值按对数分桶，桶边界以 gamma = (1+α)/(1-α) 为公比，
+    任一分位数的估计值相对误差不超过 relative_accuracy（α）。
+    桶数只取决于数值范围而非样本数，两个草图按桶相加即可合并。
+    """
+    
+    # 小于该值的数值计入零桶
+    MIN_VALUE = 1e-9
+    
+    def __init__(self, relative_accuracy=0.01):
+        """初始化空草图"""
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.buckets = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+    
+    def add(self, value, count=1):
+        """加入一个数值（负数按0计）"""
+        value = max(float(value), 0.0)
+        if value < self.MIN_VALUE:
+            self.zero_count += count
+        else:
+            index = math.ceil(math.log(value) / self.log_gamma)
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += count
+        self.sum += value * count
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+    
+    def merge(self, other):
+        """合并另一个相同精度的草图"""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("只能合并相同精度的分位数草图")
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+        return self
+    
+    def quantile(self, q):
+        """估计 q 分位数（0 <= q <= 1），没有数据时返回None"""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                # 桶 (gamma^(i-1), gamma^i] 的代表值，相对误差不超过α
+                estimate = 2 * self.gamma ** index / (self.gamma + 1)
+                return min(max(estimate, self.min), self.max)
+        return self.max
+    
+    def mean(self):
+        """平均值，没有数据时返回None"""
+        return self.sum / self.count if self.count else None
+    
+    def to_dict(self):
+        """转为可JSON序列化的字典"""
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.min,
+            'max': self.max,
+            'zero_count': self.zero_count,
+            'buckets': {str(index): count for index, count in sorted(self.buckets.items())}
+        }
+    
+    @classmethod
+    def from_dict(cls, data):
+        """由 to_dict 的结果恢复草图"""
+        sketch = cls(data.get('relative_accuracy', 0.01))
+        sketch.buckets = {int(index): count for index, count in data.get('buckets', {}).items()}
+        sketch.zero_count = data.get('zero_count', 0)
+        sketch.count = data.get('count', 0)
+        sketch.sum = data.get('sum', 0.0)
+        sketch.min = data.get('min')
+        sketch.max = data.get('max')
+        return sketch
+
+def score_bucket(score):
+    """AI评分档位：7分及以上为high，4分及以上为medium，其余为low"""
+    if score >= 7:
+        return 'high'
+    if score >= 4:
+        return 'medium'
+    return 'low'
+
+class StatsAggregator:
+    """增量统计聚合器
+    
+    文章流经收集和处理各环节时逐篇记录，不需要事后重新遍历文章列表：
+    - 计数器：总数、按来源、按源分类、按处理分类、按实体、按评分档位、源获取结果
+    - 分位数草图：AI评分、摘要长度、源获取耗时
+    快照是普通字典，可以保存为JSON；不同工作进程或不同运行的统计可以直接合并。
+    """
+    
+    # 计数器分组
+    COUNTER_GROUPS = ('totals', 'source', 'feed_category', 'category', 'entity', 'score_bucket', 'fetch')
+    
+    # 分位数草图
+    SKETCHES = ('ai_score', 'summary_length', 'fetch_latency')
+    
+    def __init__(self, relative_accuracy=0.01):
+        """初始化空统计"""
+        self.relative_accuracy = relative_accuracy
+        self.counters = {group: {} for group in self.COUNTER_GROUPS}
+        self.sketches = {name: QuantileSketch(relative_accuracy) for name in self.SKETCHES}
+    
+    def increment(self, group, key, count=1):
+        """计数器加一"""
+        counter = self.counters.setdefault(group, {})
+        counter[key] = counter.get(key, 0) + count
+    
+    def total(self, key):
+        """总数计数器的值"""
+        return self.counters['totals'].get(key, 0)
+    
+    def record_fetch(self, result):
+        """记录一次源获取结果（格式同 fetch_feed_result）"""
+        self.increment('totals', 'feeds')
+        if result.get('skipped'):
+            self.increment('fetch', 'skipped')
+        elif result.get('not_modified'):
+            self.increment('fetch', 'not_modified')
+        elif result.get('ok'):
+            self.increment('fetch', 'ok')
+        else:
+            self.increment('fetch', 'failed')
+        self.sketches['fetch_latency'].add(result.get('latency') or 0.0)
+    
+    def record_collected(self, article):
+        """记录一篇收集到的文章"""
+        self.increment('totals', 'collected')
+        self.increment('source', article.get('source', ''))
+        self.increment('feed_category', article.get('category', ''))
+    
+    def record_processed(self, article):
+        """记录一篇处理完成的文章（分类、实体、摘要长度和评分）"""
+        self.increment('totals', 'processed')
+        for category in article.get('categories', []):
+            self.increment('category', category)
+        for entity in article.get('entities', []):
+            self.increment('entity', entity)
+        self.sketches['summary_length'].add(len(article.get('processed_summary', '')))
+        self.record_score(article.get('ai_score', 0))
+    
+    def record_score(self, score):
+        """记录一个AI评分"""
+        self.increment('score_bucket', score_bucket(score))
+        self.sketches['ai_score'].add(score)
+    
+    def reset_scores(self):
+        """清空评分统计（整批重新评分前调用）"""
+        self.counters['score_bucket'] = {}
+        self.sketches['ai_score'] = QuantileSketch(self.relative_accuracy)
+    
+    def merge(self, other):
+        """合并另一份统计（StatsAggregator 或快照字典）"""
+        if isinstance(other, dict):
+            other = StatsAggregator.from_snapshot(other)
+        for group, counter in other.counters.items():
+            for key, count in counter.items():
+                self.increment(group, key, count)
+        for name, sketch in other.sketches.items():
+            self.sketches.setdefault(name, QuantileSketch(sketch.relative_accuracy)).merge(sketch)
+        return self
+    
+    def snapshot(self):
+        """可JSON序列化的快照"""
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'counters': {group: dict(counter) for group, counter in self.counters.items()},
+            'sketches': {name: sketch.to_dict() for name, sketch in self.sketches.items()}
+        }
+    
+    @classmethod
+    def from_snapshot(cls, data):
+        """由快照恢复统计"""
+        stats = cls(data.get('relative_accuracy', 0.01))
+        for group, counter in data.get('counters', {}).items():
+            stats.counters.setdefault(group, {}).update(counter)
+        for name, sketch in data.get('sketches', {}).items():
+            stats.sketches[name] = QuantileSketch.from_dict(sketch)
+        return stats
+    
+    def top(self, group, limit=10):
+        """某组计数最多的前 limit 项 [(键, 计数), ...]"""
+        return sorted(self.counters.get(group, {}).items(), key=lambda item: (-item[1], item[0]))[:limit]
+    
+    def quantiles(self, name, qs=(0.5, 0.9, 0.99)):
+        """某个草图的分位数 {'p50': ..., 'p90': ..., 'p99': ...}"""
+        sketch = self.sketches[name]
+        return {f"p{round(q * 100):g}": sketch.quantile(q) for q in qs}
+    
+    def collection_statistics(self):
+        """收集统计（格式同 AITechRSSCollector.get_statistics）"""
+        if not self.total('collected'):
+            return {"total": 0}
+        return {
+            'total': self.total('collected'),
+            'by_source': dict(self.counters['source']),
+            'by_category': dict(self.counters['feed_category']),
+            'fetch': dict(self.counters['fetch'], feeds=self.total('feeds')),
+            'fetch_latency': self.quantiles('fetch_latency')
+        }
+    
+    def processing_statistics(self):
+        """处理统计（格式同 AITechContentProcessor.get_processing_statistics）"""
+        if not self.total('processed'):
+            return {"total": 0}
+        buckets = self.counters['score_bucket']
+        return {
+            'total_processed': self.total('processed'),
+            'category_distribution': dict(self.counters['category']),
+            'ai_score_distribution': {bucket: buckets.get(bucket, 0) for bucket in ('high', 'medium', 'low')},
+            'top_entities': self.top('entity', 10),
+            'ai_score_quantiles': self.quantiles('ai_score'),
+            'summary_length_quantiles': self.quantiles('summary_length')
+        }
+
+class DailyStatsStore:
+    """按天保存的统计快照
+    
+    每天一个文件 stats_YYYY-MM-DD.json，每次运行结束时把本次统计合并进当天的快照；
+    查看多周的统计时只需合并这些快照，不需要重新读取任何文章文件。
+    """
+    
+    def __init__(self, directory='data/stats'):
+        """初始化存储目录"""
+        self.directory = directory
+    
+    def path(self, day):
+        """某一天的快照文件"""
+        return os.path.join(self.directory, f"stats_{day.isoformat()}.json")
+    
+    def load_day(self, day):
+        """读取某一天的统计，不存在时返回空统计"""
+        path = self.path(day)
+        if not os.path.exists(path):
+            return StatsAggregator()
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return StatsAggregator.from_snapshot(json.load(f).get('stats', {}))
+        except Exception as e:
+            print(f"⚠️ 读取统计快照失败 {path}: {e}")
+            return StatsAggregator()
+    
+    def add(self, stats, day=None):
+        """把一次运行的统计合并进当天的快照并原子写入，返回合并后的当天统计"""
+        day = day or date.today()
+        merged = self.load_day(day).merge(stats)
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(day)
+        tmp_file = f"{path}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({'day': day.isoformat(), 'updated_at': datetime.now().isoformat(),
+                       'stats': merged.snapshot()}, f, ensure_ascii=False)
+        os.replace(tmp_file, path)
+        return merged
+    
+    def load_range(self, start, end=None):
+        """合并 [start, end] 日期范围内（含两端）每天的统计"""
+        end = end or date.today()
+        merged = StatsAggregator()
+        day = start
+        while day <= end:
+            if os.path.exists(self.path(day)):
+                merged.merge(self.load_day(day))
+            day += timedelta(days=1)
+        return merged
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# stream_parser.py
+# 流式RSS/Atom解析器
+
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+ATOM_NS = '{http://www.w3.org/2005/Atom}'
+CONTENT_ENCODED = '{http://purl.org/rss/1.0/modules/content/}encoded'
+ENTRY_TAGS = {'item', 'entry'}
+
+def local_name(tag):
+    """去掉命名空间的标签名"""
+    return tag.rsplit('}', 1)[-1]
+
+def parse_date(value):
+    """解析RSS(RFC 822)或Atom(ISO 8601)日期，统一为带时区的datetime；失败返回None"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+class StreamingFeedParser:
+    """流式RSS/Atom解析器
+    
+    基于 XMLPullParser 增量解析，每解析完一个条目就释放其XML节点。
+    取满 max_entries 条，或遇到不晚于 watermark 的条目时立即停止读取，
+    因此内存和耗时只取决于保留的条目数，而不是源文档大小。
+    """
+    
+    def __init__(self, max_entries=10, watermark=None):
+        """初始化解析器
+        
+        参数:
+            max_entries: 最多保留的条目数
+            watermark: 上次见到的最新发布时间（datetime），遇到不晚于它的条目即停止
+        """
+        self.max_entries = max_entries
+        self.watermark = watermark
+    
+    def parse(self, chunks):
+        """从字节块迭代器中解析条目，返回与feedparser条目字段一致的dict列表"""
+        parser = ET.XMLPullParser(events=('start', 'end'))
+        entries = []
+        parents = []
+        
+        try:
+            for chunk in chunks:
+                parser.feed(chunk)
+                for event, elem in parser.read_events():
+                    if event == 'start':
+                        parents.append(elem)
+                        continue
+                    
+                    parents.pop()
+                    if local_name(elem.tag) not in ENTRY_TAGS:
+                        continue
+                    
+                    entry = self.parse_entry(elem)
+                    # 释放已处理的节点，避免整棵树常驻内存
+                    elem.clear()
+                    if parents:
+                        parents[-1].remove(elem)
+                    
+                    if self.watermark and entry['published_parsed'] and entry['published_parsed'] <= self.watermark:
+                        return entries
+                    entries.append(entry)
+                    if len(entries) >= self.max_entries:
+                        return entries
+        finally:
+            # 提前结束时关闭上游迭代器（即关闭HTTP连接）
+            close = getattr(chunks, 'close', None)
+            if close:
+                close()
+        
+        parser.close()
+        return entries
+    
+    def parse_entry(self, elem):
+        """把 <item>/<entry> 节点转成条目dict"""
+        is_atom = elem.tag.startswith(ATOM_NS)
+        fields = {}
+        content = ''
+        link = ''
+        
+        for child in elem:
+            name = local_name(child.tag)
+            if child.tag == CONTENT_ENCODED or (is_atom and name == 'content'):
+                content = self.element_text(child)
+            elif name == 'link':
+                if is_atom:
+                    # Atom优先取 rel="alternate"（或未指定rel）的链接
+                    if child.get('rel', 'alternate') == 'alternate' and not link:
+                        link = child.get('href', '')
+                else:
+                    link = (child.text or '').strip()
+            elif name not in fields:
+                fields[name] = self.element_text(child)
+        
+        published = fields.get('pubDate') or fields.get('published') or fields.get('date') or fields.get('updated', '')
+        entry = {
+            'title': fields.get('title', '无标题'),
+            'link': link,
+            'id': fields.get('guid') or fields.get('id', ''),
+            'published': published.strip(),
+            'published_parsed': parse_date(published),
+            'summary': fields.get('description') or fields.get('summary', ''),
+            'content': [{'value': content}] if content else []
+        }
+        return entry
+    
+    @staticmethod
+    def element_text(elem):
+        """节点文本；XHTML等内嵌子节点时序列化为HTML"""
+        if len(elem) == 0:
+            return elem.text or ''
+        parts = [elem.text or '']
+        for child in elem:
+            parts.append(ET.tostring(child, encoding='unicode'))
+        return ''.join(parts)
@@ -0,0 +1,7 @@
+# conftest.py
+# 测试与 run_collector.py 一样直接导入 src/ 下的模块
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
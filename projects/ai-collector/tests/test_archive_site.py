@@ -0,0 +1,82 @@
+# test_archive_site.py
+# 归档站点：由处理后的文章文件构建，保留完整字段，按输入文件增量重建
+
+import json
+import os
+
+from archive_site import ArchiveSiteBuilder
+from blob_store import BlobStore, save_run_file
+
+LONG_TITLE = '一个很长的标题：' + '大模型推理优化' * 20
+
+def make_articles(prefix, count):
+    return [{
+        'title': f"{prefix}{i}",
+        'link': f"http://example.com/{prefix}/{i}",
+        'source': f"来源{i % 2}",
+        'categories': ['技术突破', '学术研究'] if i % 2 else ['应用案例'],
+        'ai_score': i,
+        'published': f"2026-02-0{1 + i % 2}T08:00:00",
+        'summary': '<p>原始摘要</p>',
+        'processed_summary': f"{prefix}{i}的摘要" + '。' * 300,
+        'content': '正文不进入站点'
+    } for i in range(count)]
+
+def save(data_dir, name, articles):
+    save_run_file(os.path.join(data_dir, name), {'article_count': len(articles)}, articles,
+                  BlobStore(os.path.join(data_dir, 'blobs')))
+
+def day_data(builder, day):
+    with open(os.path.join(builder.output_dir, 'data', 'days', f"{day}.json"), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def test_site_keeps_full_titles_summaries_and_dates(tmp_path):
+    data_dir = str(tmp_path / 'data')
+    articles = make_articles('文章', 4)
+    articles[0]['title'] = LONG_TITLE
+    save(data_dir, 'processed_articles_20260201_080000.json', articles)
+    
+    builder = ArchiveSiteBuilder(str(tmp_path / 'reports'), data_dir)
+    result = builder.build()
+    assert result['days'] == 1 and result['days_merged'] == 1
+    
+    stored = {article['link']: article for article in day_data(builder, '20260201')['articles']}
+    first = stored['http://example.com/文章/0']
+    assert first['title'] == LONG_TITLE
+    assert first['summary'] == articles[0]['processed_summary']
+    assert first['published'] == '2026-02-01T08:00:00'
+    assert stored['http://example.com/文章/1']['categories'] == ['技术突破', '学术研究']
+    assert stored['http://example.com/文章/1']['category'] == '技术突破'
+    
+    with open(os.path.join(builder.output_dir, 'days', '20260201.html'), 'r', encoding='utf-8') as f:
+        page = f.read()
+    assert LONG_TITLE in page and '2026-02-02T08:00:00' in page and '文章3的摘要' in page
+
+def test_later_file_overrides_and_unchanged_pages_are_skipped(tmp_path):
+    data_dir = str(tmp_path / 'data')
+    reports_dir = str(tmp_path / 'reports')
+    save(data_dir, 'processed_articles_20260201_080000.json', make_articles('文章', 4))
+    save(data_dir, 'processed_articles_20260202_080000.json', make_articles('次日', 2))
+    builder = ArchiveSiteBuilder(reports_dir, data_dir)
+    first = builder.build()
+    assert first['days'] == 2 and first['pages_skipped'] == 0
+    
+    again = builder.build()
+    assert again['days_merged'] == 0 and again['pages_built'] == 0
+    
+    # 同一天的后一次运行更新了一篇文章，并带来一份报告文件：只重新合并这一天
+    updated = make_articles('文章', 1)
+    updated[0]['ai_score'] = 9
+    save(data_dir, 'processed_articles_20260201_120000.json', updated)
+    os.makedirs(os.path.join(reports_dir, 'markdown'))
+    with open(os.path.join(reports_dir, 'markdown', 'ai_report_20260201.md'), 'w', encoding='utf-8') as f:
+        f.write('# 报告\n')
+    
+    result = builder.build()
+    assert result['days_merged'] == 1
+    assert 0 < result['pages_built'] < first['pages_built']
+    
+    data = day_data(builder, '20260201')
+    assert len(data['articles']) == 4
+    assert data['reports'] == ['markdown/ai_report_20260201.md']
+    assert {article['link']: article['ai_score'] for article in data['articles']}['http://example.com/文章/0'] == 9
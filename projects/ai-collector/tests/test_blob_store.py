@@ -0,0 +1,48 @@
+# test_blob_store.py
+# blob存储与运行文件的读写往返
+
+import json
+import os
+
+from blob_store import BLOB_REF_KEY, MIN_BLOB_SIZE, BlobArticle, BlobStore, load_run_file, save_run_file
+
+LONG_TEXT = '大语言模型的推理能力持续提升。' * 40
+
+def test_put_get_round_trip(tmp_path):
+    store = BlobStore(str(tmp_path / 'blobs'))
+    key = store.put(LONG_TEXT)
+    
+    assert store.get(key) == LONG_TEXT
+    assert store.put(LONG_TEXT) == key
+    assert store.resolve({BLOB_REF_KEY: key}) == LONG_TEXT
+    assert store.resolve('短文本') == '短文本'
+    files = [name for _, _, names in os.walk(store.root) for name in names]
+    assert files == [key[2:]]
+
+def test_externalize_only_large_fields(tmp_path):
+    store = BlobStore(str(tmp_path / 'blobs'))
+    article = {'title': 'AI', 'summary': '短摘要', 'content': LONG_TEXT}
+    stored = store.externalize(article)
+    
+    assert len(article['summary']) < MIN_BLOB_SIZE
+    assert stored['summary'] == '短摘要'
+    assert stored['content'] == {BLOB_REF_KEY: store.put(LONG_TEXT)}
+    assert article['content'] == LONG_TEXT
+
+def test_run_file_round_trip(tmp_path):
+    store = BlobStore(str(tmp_path / 'blobs'))
+    articles = [{'title': f"文章{i}", 'content': LONG_TEXT + str(i), 'summary': LONG_TEXT} for i in range(3)]
+    output_file = str(tmp_path / 'runs' / 'raw_articles.json')
+    save_run_file(output_file, {'article_count': len(articles)}, articles, store)
+    
+    # 文件中只保存引用，相同的摘要只存一份
+    with open(output_file, 'r', encoding='utf-8') as f:
+        raw = json.load(f)
+    assert LONG_TEXT not in json.dumps(raw, ensure_ascii=False)
+    assert len({article['summary'][BLOB_REF_KEY] for article in raw['articles']}) == 1
+    
+    data = load_run_file(output_file)
+    assert data['article_count'] == 3
+    assert all(isinstance(article, BlobArticle) for article in data['articles'])
+    assert [dict((field, article[field]) for field in article) for article in data['articles']] == articles
+    assert data['articles'][0].get('missing', '默认') == '默认'
@@ -0,0 +1,34 @@
+# test_content_processor.py
+# 多进程分析：输出与单进程处理完全一致
+
+import content_processor
+from content_processor import AITechContentProcessor
+
+TOPICS = ['OpenAI发布新一代大语言模型', 'Transformer推理加速论文', '机器学习平台落地案例', '本周股市行情回顾']
+
+def make_articles(count):
+    return [{
+        'title': f"{TOPICS[i % len(TOPICS)]} #{i}",
+        'link': f"http://example.com/{i}",
+        'source': f"来源{i % 3}",
+        'summary': '' if i % 7 == 0 else f"<p>{TOPICS[(i + 1) % len(TOPICS)]}，第{i}篇的摘要。</p>" * 5,
+        'content': f"<p>{TOPICS[i % len(TOPICS)]}的正文。</p>" * 20
+    } for i in range(count)]
+
+def test_parallel_analysis_matches_single_process(monkeypatch):
+    articles = make_articles(300)
+    processor = AITechContentProcessor()
+    serial = list(processor.iter_process_articles(articles, workers=1))
+    
+    # 单核机器上并行路径会退回当前进程，这里让它按两个核运行以覆盖进程池
+    monkeypatch.setattr(content_processor.os, 'cpu_count', lambda: 2)
+    parallel = list(processor.iter_process_articles(articles, workers=2, chunk_size=64))
+    assert serial and parallel == serial
+
+def test_workers_are_capped_at_cpu_count(monkeypatch):
+    def no_pool(*args):
+        raise AssertionError('只有一个核时不应启动进程池')
+    
+    monkeypatch.setattr(content_processor.os, 'cpu_count', lambda: 1)
+    monkeypatch.setattr(AITechContentProcessor, '_iter_parallel_analysis', no_pool)
+    assert list(AITechContentProcessor().iter_process_articles(make_articles(20), workers=4))
@@ -0,0 +1,67 @@
+# test_daily_report.py
+# 日内增量报告：分多次合并的结果与一次性重新生成的报告一致
+
+import io
+import json
+from datetime import date, datetime, timezone
+
+from daily_report import STATE_VERSION, DailyReportState, state_path
+from ranking import ArticleRanker
+from report_model import ReportDocument, ReportRenderer
+
+DAY = date(2026, 2, 1)
+NOW = datetime(2026, 2, 1, 9, 30)
+CATEGORIES = ['技术突破', '应用案例', '学术研究']
+
+def make_articles(count):
+    return [{
+        'title': f"文章{i}",
+        'link': f"http://example.com/{i}",
+        'source': f"来源{i % 4}",
+        'categories': [CATEGORIES[i % 3]] if i % 5 else [],
+        'ai_score': (i * 7) % 10,
+        'published': f"2026-02-01T0{i % 9}:00:00",
+        'processed_summary': f"摘要{i}",
+        'content': '正文不进入报告状态'
+    } for i in range(count)]
+
+def render(document):
+    out = io.StringIO()
+    ReportRenderer('markdown').render(document, out)
+    return out.getvalue()
+
+def test_merged_state_matches_full_rebuild(tmp_path):
+    ranker = ArticleRanker(now=datetime(2026, 2, 1, tzinfo=timezone.utc))
+    articles = make_articles(30)
+    path = state_path(DAY, str(tmp_path))
+    
+    state = DailyReportState.load(path, DAY)
+    assert state.merge(articles[:20]) == 20
+    state.save(path)
+    
+    # 下一次运行：重新读取状态，已收录的文章跳过
+    state = DailyReportState.load(path, DAY)
+    assert state.merge(articles[15:]) == 10
+    state.save(path)
+    
+    full = ReportDocument.build(articles, ranker, date=DAY.strftime('%Y年%m月%d日'), now=NOW)
+    assert render(DailyReportState.load(path, DAY).document(ranker, NOW)) == render(full)
+
+def test_state_keeps_only_report_data(tmp_path):
+    path = state_path(DAY, str(tmp_path))
+    state = DailyReportState(DAY)
+    state.merge(make_articles(3))
+    state.save(path)
+    
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    assert data['version'] == STATE_VERSION
+    assert set(data) == {'version', 'day', 'updated_at', 'articles', 'category_counts', 'sections'}
+    assert all('content' not in record for record in data['articles'].values())
+
+def test_old_state_version_starts_over(tmp_path):
+    path = state_path(DAY, str(tmp_path))
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'version': STATE_VERSION - 1, 'day': DAY.isoformat(), 'articles': {'x': {}},
+                   'category_counts': {}, 'sections': {}, 'fragments': {'k': '片段'}}, f)
+    assert DailyReportState.load(path, DAY).articles == {}
@@ -0,0 +1,58 @@
+# test_feed_fetcher.py
+# 单次请求的总时限：服务器慢慢滴送数据时也要按时中止
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from feed_fetcher import FeedFetcher, FetchTimeoutError
+
+# 慢速源：声明1MB的正文，每0.05秒只发送100字节（远快于读取超时）
+DRIP_SIZE = 100
+DRIP_INTERVAL = 0.05
+
+class DripHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/rss+xml')
+        self.send_header('Content-Length', str(1024 * 1024))
+        self.end_headers()
+        try:
+            for _ in range(200):
+                self.wfile.write(b' ' * DRIP_SIZE)
+                self.wfile.flush()
+                time.sleep(DRIP_INTERVAL)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+    
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def drip_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), DripHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/feed"
+    server.shutdown()
+    server.server_close()
+
+def test_slow_drip_aborts_near_max_duration(drip_url):
+    fetcher = FeedFetcher(read_timeout=5, max_duration=0.5, retries=0)
+    start = time.monotonic()
+    with pytest.raises(FetchTimeoutError):
+        fetcher.fetch(drip_url)
+    elapsed = time.monotonic() - start
+    assert 0.5 <= elapsed < 0.5 + 4 * DRIP_INTERVAL
+
+def test_slow_drip_stream_aborts_near_max_duration(drip_url):
+    fetcher = FeedFetcher(read_timeout=5, max_duration=0.5, retries=0)
+    start = time.monotonic()
+    chunks = fetcher.fetch(drip_url, stream=True)['chunks']
+    with pytest.raises(FetchTimeoutError):
+        for _ in chunks:
+            pass
+    assert time.monotonic() - start < 0.5 + 4 * DRIP_INTERVAL
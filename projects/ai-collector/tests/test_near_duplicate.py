@@ -0,0 +1,40 @@
+# test_near_duplicate.py
+# 近重复合并：转载合并，同一模板的不同中文短新闻不合并
+
+from near_duplicate import NearDuplicateDetector, is_short_cjk
+
+# 同一模板、不同事件的中文短新闻
+TEMPLATED = [
+    ('OpenAI发布新一代大语言模型GPT-5', '据报道，OpenAI今日正式发布新一代大语言模型GPT-5，性能大幅提升。'),
+    ('谷歌发布新一代大语言模型Gemini 3', '据报道，谷歌今日正式发布新一代大语言模型Gemini 3，性能大幅提升。'),
+    ('百度发布新一代大语言模型文心5.0', '据报道，百度今日正式发布新一代大语言模型文心5.0，性能大幅提升。'),
+    ('阿里巴巴发布新一代大语言模型通义千问3', '据报道，阿里巴巴今日正式发布新一代大语言模型通义千问3，性能大幅提升。'),
+    ('腾讯发布新一代大语言模型混元2', '据报道，腾讯今日正式发布新一代大语言模型混元2，性能大幅提升。')
+]
+
+def article(title, summary, source, index):
+    return {'title': title, 'summary': summary, 'source': source, 'link': f"http://example.com/{source}/{index}"}
+
+def test_same_template_headlines_are_kept():
+    articles = [article(title, summary, 'a', i) for i, (title, summary) in enumerate(TEMPLATED)]
+    assert all(is_short_cjk(a['title'], a['summary']) for a in articles)
+    assert NearDuplicateDetector(0.4).deduplicate(articles) == articles
+
+def test_chinese_repost_is_merged():
+    original = article(*TEMPLATED[0], 'a', 0)
+    repost = article('OpenAI发布新一代大语言模型GPT-5', 'OpenAI今日正式发布新一代大语言模型GPT-5，性能大幅提升。', 'b', 0)
+    other = article(*TEMPLATED[1], 'a', 1)
+    
+    kept = NearDuplicateDetector(0.4).deduplicate([original, other, repost])
+    assert kept == [original, other]
+    assert original['alternate_sources'] == [{'source': 'b', 'title': repost['title'], 'link': repost['link']}]
+
+def test_english_repost_is_merged():
+    summary = ('Researchers released an open source language model that matches larger proprietary systems '
+               'on reasoning benchmarks while running on a single consumer GPU, according to the paper.')
+    original = article('Open model matches proprietary systems on reasoning', summary, 'a', 0)
+    repost = article('Open model matches proprietary systems on reasoning benchmarks',
+                     summary.replace('according to the paper', 'the authors said'), 'b', 0)
+    
+    assert not is_short_cjk(original['title'], original['summary'])
+    assert NearDuplicateDetector(0.4).deduplicate([original, repost]) == [original]
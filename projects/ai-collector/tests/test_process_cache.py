@@ -0,0 +1,74 @@
+# test_process_cache.py
+# 处理缓存：内容键与配置指纹变化时的失效
+
+import copy
+import json
+
+import pytest
+
+from blob_store import BlobStore
+from content_processor import AITechContentProcessor, RULES_FILE
+from process_cache import ProcessingCache, config_fingerprint, content_key
+from rule_engine import RuleSet
+
+ARTICLE = {
+    'title': 'OpenAI发布新一代大语言模型',
+    'summary': '新模型在推理和代码生成上有明显突破，' * 20,
+    'content': '',
+    'link': 'http://example.com/1'
+}
+
+# 与真实分析结果不同的标记结果，用来确认是否命中缓存
+MARKER = {'ai_score': 1.5, 'categories': ['缓存'], 'entities': [], 'processed_summary': '来自缓存'}
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ProcessingCache(str(tmp_path / 'process_cache.db'))
+    yield cache
+    cache.close()
+
+@pytest.fixture
+def rules_config():
+    with open(RULES_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def process(rules_config, cache):
+    processor = AITechContentProcessor(dedupe_threshold=None, cache=cache, rules=RuleSet(rules_config), entities=None)
+    return list(processor.iter_process_articles([ARTICLE])), processor
+
+def test_content_key_follows_content(tmp_path):
+    key = content_key(ARTICLE)
+    assert content_key(dict(ARTICLE, link='http://example.com/2')) == key
+    assert content_key(dict(ARTICLE, title=ARTICLE['title'] + '！')) != key
+    
+    # 正文外置为blob引用时，内容键与内联正文相同
+    stored = BlobStore(str(tmp_path / 'blobs')).externalize(ARTICLE)
+    assert stored['summary'] != ARTICLE['summary']
+    assert content_key(stored) == key
+
+def test_other_fingerprint_misses_and_is_evicted(cache):
+    old, new = config_fingerprint('rules', 1), config_fingerprint('rules', 2)
+    key = content_key(ARTICLE)
+    cache.put_many([(key, MARKER)], old)
+    
+    assert cache.get_many([key], old) == {key: MARKER}
+    assert cache.get_many([key], new) == {}
+    assert cache.evict(new) == 1
+    assert len(cache) == 0
+
+def test_rule_change_invalidates_cached_results(cache, rules_config):
+    (first,), processor = process(rules_config, cache)
+    fingerprint = processor.cache_fingerprint_for(processor.rule_set)
+    
+    # 同样的规则命中缓存（用标记结果替换后可以看出来）
+    cache.put_many([(content_key(ARTICLE), MARKER)], fingerprint)
+    (cached,), _ = process(rules_config, cache)
+    assert cached['processed_summary'] == MARKER['processed_summary']
+    
+    # 修改规则后指纹变化，重新分析并清理旧结果
+    changed = copy.deepcopy(rules_config)
+    changed['ai']['terms'].append('智能体')
+    (recomputed,), processor = process(changed, cache)
+    assert processor.cache_fingerprint_for(processor.rule_set) != fingerprint
+    assert recomputed['processed_summary'] == first['processed_summary']
+    assert cache.get_many([content_key(ARTICLE)], fingerprint) == {}
@@ -0,0 +1,49 @@
+# test_relevance_scorer.py
+# 相关度评分：得分与同批文章无关，NumPy与纯Python实现一致
+
+import json
+
+import pytest
+
+import relevance_scorer
+from content_processor import RULES_FILE
+from relevance_scorer import RelevanceScorer
+
+DOCUMENTS = [
+    ('OpenAI发布新一代大语言模型', 'OpenAI 今天发布了新的 LLM，支持多模态输入和智能体工作流。'),
+    ('Deep learning for protein folding', 'A neural network trained with deep learning predicts structures.'),
+    ('AI芯片市场观察', '多家公司发布AI芯片。'),
+    ('Quarterly earnings report', 'The company said revenue grew, without mentioning AI products.'),
+    ('Claude and Gemini add multimodal prompts', 'Anthropic and Google ship multimodal prompt features for chatbot users.')
+]
+
+@pytest.fixture
+def scorer():
+    with open(RULES_FILE, 'r', encoding='utf-8') as f:
+        return RelevanceScorer.from_rules(json.load(f))
+
+def test_score_does_not_depend_on_batch(scorer):
+    batch = scorer.score(DOCUMENTS)
+    assert [scorer.score([document])[0] for document in DOCUMENTS] == batch
+    assert scorer.score(DOCUMENTS[:2]) == batch[:2]
+
+def test_scale_is_linear_up_to_full_score():
+    scorer = RelevanceScorer({'LLM': 1.0}, title_weight=1.0, full_score=3.0)
+    documents = [('', ' '.join(['LLM'] * count)) for count in (1, 2, 4, 64)]
+    raws = scorer.raw_scores(documents)
+    scores = scorer.score(documents)
+    assert scores[:3] == [round(10 * raw / 3.0, 1) for raw in raws[:3]]
+    assert scores[0] < scores[1] < scores[2] < 10.0
+    assert raws[3] > 3.0 and scores[3] == 10.0
+
+def test_python_fallback_matches_numpy(scorer, monkeypatch):
+    if relevance_scorer.np is None:
+        pytest.skip('未安装NumPy')
+    expected = scorer.score(DOCUMENTS)
+    monkeypatch.setattr(relevance_scorer, 'np', None)
+    assert scorer.score(DOCUMENTS) == expected
+
+def test_rules_without_relevance_use_ai_keywords():
+    scorer = RelevanceScorer.from_rules({'ai': {'terms': ['AI', {'keyword': '大模型'}, {'regex': 'GPT-?\\d'}]}})
+    assert list(scorer.term_index) == ['ai', '大模型']
+    assert scorer.score([('AI', ''), ('天气', '')])[1] == 0.0
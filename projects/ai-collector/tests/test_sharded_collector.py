@@ -0,0 +1,150 @@
+# test_sharded_collector.py
+# 工作队列的租约、重复提交和工作进程崩溃后的收尾
+
+import json
+import threading
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from sharded_collector import FeedWorkQueue, ShardedRSSCollector, run_worker
+
+# 每个测试源的条目发布时间（从新到旧）
+ITEM_DATES = [datetime(2026, 3, day, 8, 0, tzinfo=timezone.utc) for day in (3, 2, 1)]
+
+def rss_document(name):
+    """一个包含 ITEM_DATES 条目的RSS文档"""
+    items = ''.join(
+        f"<item><title>{name} 第{i}篇</title><link>http://example.com/{name}/{i}</link>"
+        f"<guid>{name}-{i}</guid><description>AI 模型发布</description>"
+        f"<pubDate>{format_datetime(published)}</pubDate></item>"
+        for i, published in enumerate(ITEM_DATES)
+    )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>{name}</title>{items}</channel></rss>'
+
+class FeedHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith('/missing'):
+            self.send_error(404)
+            return
+        body = rss_document(self.path.strip('/')).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/rss+xml; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def feed_server():
+    """本地RSS服务，返回 feed(name) 构造源配置"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FeedHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    yield lambda name: {'name': name, 'url': f"{base}/{name}", 'category': '测试', 'enabled': True}
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def options(tmp_path):
+    """工作进程的收集器参数：所有状态文件都放在临时目录"""
+    return {
+        'host_delay': 0,
+        'seen_index_file': str(tmp_path / 'seen.db'),
+        'schedule_file': str(tmp_path / 'schedule.json'),
+        'breaker_file': str(tmp_path / 'breakers.json')
+    }
+
+def fake_result(title):
+    return {'articles': [{'title': title}], 'ok': True, 'error': None, 'not_modified': False, 'latency': 0.1}
+
+def test_expired_lease_is_claimed_again(tmp_path):
+    queue = FeedWorkQueue(str(tmp_path / 'queue.db'), lease_seconds=10)
+    run_id = queue.create_run([{'name': 'a', 'url': 'http://example.com/a'}])
+    
+    assert queue.claim(run_id, 'w1', now=1000)[0] == 0
+    assert queue.claim(run_id, 'w2', now=1005) is None
+    assert queue.claim(run_id, 'w2', now=1011)[0] == 0
+    assert queue.progress(run_id) == {'claimed': 1}
+    queue.close()
+
+def test_task_fails_after_max_attempts(tmp_path):
+    queue = FeedWorkQueue(str(tmp_path / 'queue.db'), lease_seconds=10, max_attempts=2)
+    run_id = queue.create_run([{'name': 'a', 'url': 'http://example.com/a'}])
+    
+    assert queue.claim(run_id, 'w1', now=1000) is not None
+    assert queue.claim(run_id, 'w2', now=1011) is not None
+    assert queue.claim(run_id, 'w3', now=1022) is None
+    assert queue.progress(run_id) == {'failed': 1}
+    assert queue.remaining(run_id) == 0
+    queue.close()
+
+def test_duplicate_result_keeps_first(tmp_path):
+    queue = FeedWorkQueue(str(tmp_path / 'queue.db'), lease_seconds=10)
+    run_id = queue.create_run([{'name': 'a', 'url': 'http://example.com/a'}])
+    
+    # w1 的租约过期后 w2 重新领取并先完成，w1 随后迟到的结果被忽略
+    queue.claim(run_id, 'w1', now=1000)
+    queue.claim(run_id, 'w2', now=1011)
+    queue.complete(run_id, 0, 'w2', fake_result('第一次'))
+    queue.complete(run_id, 0, 'w1', fake_result('迟到'))
+    
+    results = queue.results(run_id)
+    assert list(results) == [0]
+    assert results[0]['articles'] == [{'title': '第一次'}]
+    assert queue.remaining(run_id) == 0
+    queue.close()
+
+def test_run_finishes_after_worker_crash(tmp_path, feed_server, options):
+    db_file = str(tmp_path / 'queue.db')
+    queue = FeedWorkQueue(db_file)
+    run_id = queue.create_run([feed_server('a'), feed_server('b')], options=options)
+    
+    # 崩溃的工作进程领取了第一个任务却没有提交结果
+    assert queue.claim(run_id, 'crashed')[0] == 0
+    queue.release_worker(run_id, 'crashed')
+    
+    assert run_worker(db_file, run_id, 'survivor', poll_interval=0.01) == 2
+    results = queue.results(run_id)
+    assert sorted(results) == [0, 1]
+    assert all(result['ok'] and len(result['articles']) == len(ITEM_DATES) for result in results.values())
+    assert queue.remaining(run_id) == 0
+    queue.close()
+
+def test_worker_uses_watermark_and_options_from_run(tmp_path, feed_server, options):
+    db_file = str(tmp_path / 'queue.db')
+    queue = FeedWorkQueue(db_file)
+    feed = feed_server('a')
+    run_id = queue.create_run([feed], watermarks={feed['url']: ITEM_DATES[1]},
+                              options=dict(options, stream_parse=True))
+    
+    # 工作进程没有收到任何参数，流式解析和水位线都来自批次
+    run_worker(db_file, run_id, 'w1')
+    articles = queue.results(run_id)[0]['articles']
+    assert [article['title'] for article in articles] == ['a 第0篇']
+    queue.close()
+
+def test_parallel_workers_keep_every_feed_state(tmp_path, feed_server, options):
+    # 多个工作进程各自更新不同源的HTTP缓存和熔断器，协调者合并后所有源的记录都应保留
+    good = [feed_server(f"good{i}") for i in range(12)]
+    missing = [feed_server(f"missing{i}") for i in range(4)]
+    config_file = tmp_path / 'feeds.json'
+    config_file.write_text(json.dumps({'feeds': good + missing}), encoding='utf-8')
+    cache_file = tmp_path / 'http_cache.json'
+    
+    collector = ShardedRSSCollector(str(config_file), workers=3, queue_file=str(tmp_path / 'queue.db'),
+                                    http_cache_file=str(cache_file), **options)
+    collector.fetch_all_feeds()
+    
+    cache = json.loads(cache_file.read_text(encoding='utf-8'))['feeds']
+    assert sorted(cache) == sorted(feed['url'] for feed in good)
+    assert all(entry['articles_blob'] for entry in cache.values())
+    circuits = json.loads((tmp_path / 'breakers.json').read_text(encoding='utf-8'))['circuits']
+    assert {url: circuit['failures'] for url, circuit in circuits.items() if circuit['failures']} == \
+        {feed['url']: 1 for feed in missing}
+    assert not list(tmp_path.glob('*.tmp'))
@@ -0,0 +1,52 @@
+# test_stats_aggregator.py
+# 分位数草图的相对误差上限与合并
+
+import random
+
+import pytest
+
+from stats_aggregator import QuantileSketch
+
+QUANTILES = (0.0, 0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.95, 0.99, 1.0)
+
+def exact_quantile(sorted_values, q):
+    """与 QuantileSketch.quantile 相同秩定义的精确分位数"""
+    return sorted_values[int(q * (len(sorted_values) - 1))]
+
+def assert_within_bound(sketch, values):
+    values = sorted(values)
+    for q in QUANTILES:
+        exact = exact_quantile(values, q)
+        assert sketch.quantile(q) == pytest.approx(exact, rel=sketch.relative_accuracy, abs=1e-12), q
+
+@pytest.mark.parametrize('relative_accuracy', [0.01, 0.05])
+def test_quantile_relative_error_bound(relative_accuracy):
+    rng = random.Random(7)
+    values = [rng.lognormvariate(0, 2) for _ in range(20000)] + [0.0] * 50
+    sketch = QuantileSketch(relative_accuracy)
+    for value in values:
+        sketch.add(value)
+    
+    assert_within_bound(sketch, values)
+    assert sketch.count == len(values)
+    assert sketch.mean() == pytest.approx(sum(values) / len(values))
+
+def test_merged_sketch_keeps_bound():
+    rng = random.Random(11)
+    parts = [[rng.uniform(0, 10) for _ in range(3000)], [rng.expovariate(0.01) for _ in range(3000)]]
+    sketches = []
+    for part in parts:
+        sketch = QuantileSketch(0.01)
+        for value in part:
+            sketch.add(value)
+        sketches.append(sketch)
+    
+    merged = QuantileSketch.from_dict(sketches[0].to_dict()).merge(sketches[1])
+    assert_within_bound(merged, parts[0] + parts[1])
+    
+    with pytest.raises(ValueError):
+        merged.merge(QuantileSketch(0.05))
+
+def test_empty_sketch():
+    assert QuantileSketch().quantile(0.5) is None
+    assert QuantileSketch().mean() is None